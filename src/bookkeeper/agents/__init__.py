@@ -1,8 +1,18 @@
 """Specialized agents for GitLab, GitHub, and S3 knowledge base"""
 
-from .github import query_github_agent
-from .gitlab import query_gitlab_agent
-from .s3 import query_s3_agent
+import importlib
 
 __all__ = ["query_github_agent", "query_gitlab_agent", "query_s3_agent"]
 
+# Agents pull in strands and MCP; import them on first use to keep startup fast
+_MODULES = {
+    "query_github_agent": ".github",
+    "query_gitlab_agent": ".gitlab",
+    "query_s3_agent": ".s3",
+}
+
+
+def __getattr__(name):
+    if name in _MODULES:
+        return getattr(importlib.import_module(_MODULES[name], __name__), name)
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
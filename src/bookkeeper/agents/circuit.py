@@ -0,0 +1,217 @@
+"""
+Circuit breakers for the sub-agents.
+
+Each source's recent calls are kept in a sliding window. A call fails when
+the sub-agent raises, answers with its "Error running ..." message or, with
+a latency threshold, takes longer than it. Once the window's failure rate
+reaches ``error_rate`` the circuit opens: calls to the source are refused
+at once instead of waiting for another timeout.
+
+After ``open_seconds`` the circuit is half-open. A source with a probe (a
+cheap health check, e.g. listing the MCP tools) is probed in the background
+while calls keep being refused; a source without one lets a single call
+through as a trial. Success closes the circuit, failure opens it again.
+A trial answered without reaching the source (shared with a concurrent
+call, or refused for want of a free MCP session) records nothing and frees
+the trial for the next call.
+"""
+
+import threading
+import time
+from collections import deque
+from typing import Any, Callable, Deque, Dict, Optional
+
+from .mcp_pool import PoolExhaustedError
+from .results import is_error_answer
+
+CLOSED = "closed"
+OPEN = "open"
+HALF_OPEN = "half_open"
+
+
+class _Circuit:
+    def __init__(self, window: int):
+        self.state = CLOSED
+        self.outcomes: Deque[bool] = deque(maxlen=window)
+        self.opened_at = 0.0
+        # Thread running the half-open trial call, None when no trial runs
+        self.trial_thread: Optional[int] = None
+        self.probing = False
+        self.opened = 0
+        self.rejected = 0
+
+
+class CircuitBreaker:
+    """
+    Per-source circuit breakers.
+
+    Args:
+        error_rate: Failure rate (0-1) of the window opening a circuit
+        latency_threshold: Seconds after which a call counts as failed
+            (0: only errors count)
+        window: Number of recent calls kept per source
+        min_calls: Calls to observe before a circuit may open
+        open_seconds: Seconds a circuit stays open before probing recovery
+        probes: Health check of each source, raising on failure; sources
+            without one are probed with a real call
+    """
+
+    def __init__(
+        self,
+        error_rate: float = 0.5,
+        latency_threshold: float = 0,
+        window: int = 20,
+        min_calls: int = 5,
+        open_seconds: float = 30,
+        probes: Optional[Dict[str, Callable[[], Any]]] = None,
+    ):
+        self.error_rate = error_rate
+        self.latency_threshold = latency_threshold
+        self.window = window
+        self.min_calls = min_calls
+        self.open_seconds = open_seconds
+        self.probes = probes or {}
+        self._circuits: Dict[str, _Circuit] = {}
+        self._lock = threading.Lock()
+
+    def _circuit(self, source: str) -> _Circuit:
+        circuit = self._circuits.get(source)
+        if circuit is None:
+            circuit = self._circuits[source] = _Circuit(self.window)
+        return circuit
+
+    def _open(self, source: str, circuit: _Circuit):
+        # Called with the lock held
+        if circuit.state != OPEN:
+            circuit.opened += 1
+            print(f"Circuit of {source} opened for {self.open_seconds:.0f}s")
+        circuit.state = OPEN
+        circuit.opened_at = time.monotonic()
+        circuit.trial_thread = None
+        if source in self.probes and not circuit.probing:
+            circuit.probing = True
+            timer = threading.Timer(self.open_seconds, self._probe, args=(source,))
+            timer.daemon = True
+            timer.start()
+
+    def _close(self, source: str, circuit: _Circuit):
+        # Called with the lock held
+        circuit.state = CLOSED
+        circuit.outcomes.clear()
+        circuit.trial_thread = None
+        print(f"Circuit of {source} closed")
+
+    def _probe(self, source: str):
+        with self._lock:
+            self._circuit(source).state = HALF_OPEN
+        try:
+            self.probes[source]()
+            healthy = True
+        except Exception as e:
+            print(f"Probe of {source} failed: {e}")
+            healthy = False
+        with self._lock:
+            circuit = self._circuit(source)
+            circuit.probing = False
+            if healthy:
+                self._close(source, circuit)
+            else:
+                self._open(source, circuit)
+
+    def allow(self, source: str) -> bool:
+        """
+        Whether a call to ``source`` may run; refused calls are counted.
+
+        Returns:
+            False while the circuit is open, or half-open with its probe or
+            trial call still running
+        """
+        with self._lock:
+            circuit = self._circuit(source)
+            if circuit.state == CLOSED:
+                return True
+            if (
+                circuit.state == OPEN
+                and source not in self.probes
+                and time.monotonic() - circuit.opened_at >= self.open_seconds
+            ):
+                circuit.state = HALF_OPEN
+            if circuit.state == HALF_OPEN and source not in self.probes and circuit.trial_thread is None:
+                circuit.trial_thread = threading.get_ident()
+                return True
+            circuit.rejected += 1
+            return False
+
+    def record(self, source: str, ok: bool, latency: float):
+        """
+        Record the outcome of a call allowed by ``allow()``, in its thread.
+
+        Args:
+            source: Name of the sub-agent
+            ok: Whether the call answered without error
+            latency: Seconds the call took
+        """
+        failed = not ok or bool(self.latency_threshold and latency > self.latency_threshold)
+        with self._lock:
+            circuit = self._circuit(source)
+            if circuit.state == HALF_OPEN and circuit.trial_thread == threading.get_ident():
+                if failed:
+                    self._open(source, circuit)
+                else:
+                    self._close(source, circuit)
+                return
+            if circuit.state != CLOSED:
+                # A call started before the circuit opened
+                return
+            circuit.outcomes.append(failed)
+            failures = sum(circuit.outcomes)
+            if len(circuit.outcomes) >= self.min_calls and failures / len(circuit.outcomes) >= self.error_rate:
+                self._open(source, circuit)
+
+    def release(self, source: str):
+        """
+        End a call allowed by ``allow()``, in its thread, whatever happened.
+
+        Frees the half-open trial when the call recorded no outcome, so the
+        circuit does not wait forever for it.
+        """
+        with self._lock:
+            circuit = self._circuit(source)
+            if circuit.trial_thread == threading.get_ident():
+                circuit.trial_thread = None
+
+    def call(self, source: str, query_fn: Callable[[str], str], query: str) -> str:
+        """Run an allowed call and record its outcome; a busy MCP pool is not a failure"""
+        started = time.monotonic()
+        try:
+            result = query_fn(query)
+        except PoolExhaustedError:
+            raise
+        except Exception:
+            self.record(source, False, time.monotonic() - started)
+            raise
+        self.record(source, not is_error_answer(result), time.monotonic() - started)
+        return result
+
+    def state(self, source: str) -> str:
+        with self._lock:
+            return self._circuit(source).state
+
+    def stats(self) -> Dict[str, Any]:
+        """Return the state, recent failure rate, openings and refused calls of each source"""
+        with self._lock:
+            return {
+                "error_rate": self.error_rate,
+                "latency_threshold": self.latency_threshold,
+                "sources": {
+                    source: {
+                        "state": circuit.state,
+                        "failure_rate": (
+                            round(sum(circuit.outcomes) / len(circuit.outcomes), 3) if circuit.outcomes else 0.0
+                        ),
+                        "opened": circuit.opened,
+                        "rejected": circuit.rejected,
+                    }
+                    for source, circuit in self._circuits.items()
+                },
+            }
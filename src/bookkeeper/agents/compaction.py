@@ -0,0 +1,126 @@
+"""
+Compaction of sub-agent answers before they reach the orchestrator model.
+
+Answers holding the expected JSON are re-serialized without the surrounding
+prose, with long fields truncated and items added best score first until the
+source's token budget is spent. Other answers are de-duplicated line by line
+and truncated to the budget.
+"""
+
+import json
+import re
+import threading
+from typing import Any, Dict, List
+
+from .results import parse_source_result
+
+# Rough characters-per-token ratio, as used for rate limiting
+CHARS_PER_TOKEN = 4
+TRUNCATION_MARK = "…"
+
+
+def count_tokens(text: str) -> int:
+    """Estimate the number of tokens of a text"""
+    return len(text) // CHARS_PER_TOKEN
+
+
+def _truncate(text: str, max_chars: int) -> str:
+    return text if len(text) <= max_chars else text[: max_chars - 1].rstrip() + TRUNCATION_MARK
+
+
+def _compact_item(item: Dict[str, Any], field_chars: int) -> Dict[str, Any]:
+    compact = {}
+    for name, value in item.items():
+        if isinstance(value, str):
+            value = _truncate(re.sub(r"\s+", " ", value).strip(), field_chars)
+        elif isinstance(value, list):
+            value = value[:10]
+        if value not in ("", [], None):
+            compact[name] = value
+    return compact
+
+
+class ResultCompactor:
+    """
+    Enforce a token budget on each source's answers.
+
+    Args:
+        budgets: Token budget of each source; sources without one (or 0)
+            are passed through unchanged
+        field_chars: Maximum characters kept per text field
+    """
+
+    def __init__(self, budgets: Dict[str, int], field_chars: int = 300):
+        self.budgets = budgets
+        self.field_chars = field_chars
+        self._lock = threading.Lock()
+        self.compacted = 0
+        self.tokens_before = 0
+        self.tokens_after = 0
+
+    def _compact_json(self, text: str, budget: int):
+        parsed = parse_source_result(text)
+        if parsed is None:
+            return None
+        payload: Dict[str, List[Dict[str, Any]]] = {}
+        items = [
+            ("projets_similaires", p.similarite_score, p.model_dump(exclude={"sources"}))
+            for p in parsed.projets_similaires
+        ] + [
+            ("documents_pertinents", d.pertinence_score, d.model_dump())
+            for d in parsed.documents_pertinents
+        ]
+        used = 0
+        for field, _, item in sorted(items, key=lambda entry: entry[1], reverse=True):
+            item = _compact_item(item, self.field_chars)
+            cost = count_tokens(json.dumps(item, ensure_ascii=False, separators=(",", ":")))
+            if payload and used + cost > budget:
+                break
+            payload.setdefault(field, []).append(item)
+            used += cost
+        return json.dumps(payload, ensure_ascii=False, separators=(",", ":"))
+
+    def _compact_text(self, text: str, budget: int) -> str:
+        lines, seen = [], set()
+        for line in text.splitlines():
+            line = re.sub(r"[ \t]+", " ", line).strip()
+            if line and line not in seen:
+                seen.add(line)
+                lines.append(line)
+        return _truncate("\n".join(lines), budget * CHARS_PER_TOKEN)
+
+    def compact(self, source: str, text: str) -> str:
+        """
+        Compact one answer of ``source`` to its token budget.
+
+        Args:
+            source: Name of the sub-agent (gitlab, github, s3)
+            text: The sub-agent's answer
+
+        Returns:
+            The compacted answer, or ``text`` when it is already smaller
+        """
+        budget = self.budgets.get(source, 0)
+        if not budget:
+            return text
+        compacted = self._compact_json(text, budget)
+        if compacted is None:
+            compacted = self._compact_text(text, budget)
+        if len(compacted) >= len(text):
+            compacted = text
+        with self._lock:
+            self.compacted += 1
+            self.tokens_before += count_tokens(text)
+            self.tokens_after += count_tokens(compacted)
+        return compacted
+
+    def stats(self) -> Dict[str, Any]:
+        """Return the budgets and the estimated tokens before and after compaction"""
+        with self._lock:
+            return {
+                "budgets": dict(self.budgets),
+                "compacted": self.compacted,
+                "tokens_before": self.tokens_before,
+                "tokens_after": self.tokens_after,
+                "tokens_saved": self.tokens_before - self.tokens_after,
+            }
@@ -1,41 +1,55 @@
 import os
-from datetime import datetime, timezone
 from mcp.client.streamable_http import streamablehttp_client
-from strands import Agent
 from strands.tools.mcp.mcp_client import MCPClient
+from ..core.config import (
+    GITHUB_MCP_POOL_SIZE,
+    GITHUB_TOOL_PROFILE,
+    GITHUB_TOOLS,
+    MCP_ACQUIRE_TIMEOUT,
+    MCP_HEALTH_INTERVAL,
+    get_model,
+)
+from .mcp_pool import MCPSessionPool, PoolExhaustedError
 from .prompts import GITHUB_AGENT_SYSTEM_PROMPT
+from .tool_catalog import ToolCatalog, allowed_tools
+
+
+def create_github_mcp_client():
+    """Create a (not yet started) MCP client for the GitHub Copilot MCP server"""
+    github_token = os.getenv("GITHUB_TOKEN")
+    if not github_token:
+        raise ValueError("GITHUB_TOKEN environment variable is required")
+
+    headers = {
+        "Authorization": f"Bearer {github_token}",
+        "Content-Type": "application/json"
+    }
+
+    return MCPClient(
+        lambda: streamablehttp_client(
+            "https://api.githubcopilot.com/mcp/",
+            headers=headers
+        )
+    )
+
+
+# Sessions are opened on first use and kept for the following queries
+github_mcp_pool = MCPSessionPool(
+    create_github_mcp_client,
+    size=GITHUB_MCP_POOL_SIZE,
+    health_interval=MCP_HEALTH_INTERVAL,
+    acquire_timeout=MCP_ACQUIRE_TIMEOUT,
+    name="github",
+    catalog=ToolCatalog(allowed_tools(GITHUB_TOOL_PROFILE, GITHUB_TOOLS), name="github"),
+)
 
 
 def query_github_agent(user_message):
     """Create an agent with GitHub MCP tools and process user message"""
     try:
-        github_token = os.getenv("GITHUB_TOKEN")
-        if not github_token:
-            raise ValueError("GITHUB_TOKEN environment variable is required")
-
-        headers = {
-            "Authorization": f"Bearer {github_token}",
-            "Content-Type": "application/json"
-        }
-
-        github_mcp_client = MCPClient(
-            lambda: streamablehttp_client(
-                "https://api.githubcopilot.com/mcp/",
-                headers=headers
-            )
-        )
-
-        with github_mcp_client:
-            github_tools = github_mcp_client.list_tools_sync()
-            github_agent = Agent(
-                tools=github_tools,
-                system_prompt=GITHUB_AGENT_SYSTEM_PROMPT,
-                trace_attributes={
-                    "session.id": "github-agent-{}".format(datetime.now(timezone.utc).date()),
-                    "langfuse.tags": ["github-agent"]
-                }
-            )
-            return github_agent(user_message)
+        return github_mcp_pool.run_agent(get_model("github"), GITHUB_AGENT_SYSTEM_PROMPT, user_message)
+    except PoolExhaustedError:
+        # Raised as is so the circuit breaker does not count it as a failure
+        raise
     except Exception as e:
         return f"Error running GitHub agent: {str(e)}"
-
@@ -1,54 +1,122 @@
+import json
 import os
-from datetime import datetime, timezone
 from mcp.client.streamable_http import streamablehttp_client
-from strands import Agent
+from strands import tool
 from strands.tools.mcp.mcp_client import MCPClient
 from mcp import stdio_client, StdioServerParameters
-import dotenv
-from .prompts import GITLAB_AGENT_SYSTEM_PROMPT
+from ..core.config import (
+    EMBEDDING_MODEL_ID,
+    EMBEDDING_REGION,
+    GITLAB_API_URL,
+    GITLAB_CATALOG,
+    GITLAB_CATALOG_PATH,
+    GITLAB_CATALOG_README_CHARS,
+    GITLAB_CATALOG_SYNC_INTERVAL,
+    GITLAB_MCP_MAX_REQUESTS,
+    GITLAB_MCP_POOL_SIZE,
+    GITLAB_TOOL_PROFILE,
+    GITLAB_TOOLS,
+    MCP_ACQUIRE_TIMEOUT,
+    MCP_HEALTH_INTERVAL,
+    get_model,
+)
+from .gitlab_catalog import create_gitlab_indexer
+from .mcp_pool import MCPSessionPool, PoolExhaustedError
+from .prompts import GITLAB_AGENT_SYSTEM_PROMPT, GITLAB_CATALOG_PROMPT
+from .tool_catalog import ToolCatalog, allowed_tools
 
-dotenv.load_dotenv()
+
+def create_gitlab_mcp_client():
+    """Create a (not yet started) MCP client running the GitLab MCP server in docker"""
+    gitlab_token = os.getenv("GITLAB_PERSONAL_ACCESS_TOKEN")
+    if not gitlab_token:
+        raise ValueError("GITLAB_PERSONAL_ACCESS_TOKEN environment variable is required")
+
+    return MCPClient(lambda: stdio_client(
+        StdioServerParameters(
+            command="docker", 
+            args=[
+                "run",
+                "-i",
+                "--rm",
+                "-e",
+                "GITLAB_API_URL",
+                "-e",
+                "GITLAB_PERSONAL_ACCESS_TOKEN",
+                "mcp/gitlab"
+            ]
+            ,env={
+                "GITLAB_API_URL": GITLAB_API_URL,
+                "GITLAB_PERSONAL_ACCESS_TOKEN": gitlab_token
+            }
+        )
+    ))
+
+
+# Long-lived GitLab MCP server processes, one query at a time each; crashed
+# processes are restarted by the supervisor and each is recycled after
+# GITLAB_MCP_MAX_REQUESTS queries
+gitlab_mcp_pool = MCPSessionPool(
+    create_gitlab_mcp_client,
+    size=GITLAB_MCP_POOL_SIZE,
+    health_interval=MCP_HEALTH_INTERVAL,
+    acquire_timeout=MCP_ACQUIRE_TIMEOUT,
+    name="gitlab",
+    catalog=ToolCatalog(allowed_tools(GITLAB_TOOL_PROFILE, GITLAB_TOOLS), name="gitlab"),
+    max_uses=GITLAB_MCP_MAX_REQUESTS,
+    supervise_interval=MCP_HEALTH_INTERVAL,
+)
+
+
+def get_gitlab_indexer():
+    """Return the GitLab catalog indexer, None when the catalog is disabled"""
+    return create_gitlab_indexer(
+        GITLAB_CATALOG,
+        GITLAB_API_URL,
+        os.getenv("GITLAB_PERSONAL_ACCESS_TOKEN", ""),
+        GITLAB_CATALOG_PATH,
+        interval=GITLAB_CATALOG_SYNC_INTERVAL,
+        readme_chars=GITLAB_CATALOG_README_CHARS,
+        model_id=EMBEDDING_MODEL_ID,
+        region_name=EMBEDDING_REGION,
+    )
+
+
+def start_gitlab_catalog():
+    """Sync the GitLab catalog and start its background indexer, for readiness checks"""
+    indexer = get_gitlab_indexer()
+    return False if indexer is None else indexer.start()
+
+
+@tool
+def search_gitlab_catalog(query: str, limit: int = 10) -> str:
+    """
+    Search the local catalog of GitLab projects by name, description, topics,
+    languages and README. Answers in milliseconds; use the GitLab tools for
+    details it does not hold.
+
+    Args:
+        query: Description of the projects sought (technologies, domain, keywords)
+        limit: Maximum number of projects returned
+
+    Returns:
+        JSON list of matching projects, best first
+    """
+    catalog = get_gitlab_indexer().catalog
+    if not len(catalog):
+        return "The GitLab catalog is empty: search with the GitLab tools instead."
+    return json.dumps(catalog.search(query, limit=limit), ensure_ascii=False)
 
 
 def query_gitlab_agent(user_message):
     """Create an agent with Gitlab MCP tools and process user message"""
     try:
-        gitlab_token = os.getenv("GITLAB_PERSONAL_ACCESS_TOKEN")
-        if not gitlab_token:
-            raise ValueError("GITLAB_PERSONAL_ACCESS_TOKEN environment variable is required")
-            
-        gitlab_mcp_client = MCPClient(lambda: stdio_client(
-            StdioServerParameters(
-                command="docker", 
-                args=[
-                    "run",
-                    "-i",
-                    "--rm",
-                    "-e",
-                    "GITLAB_API_URL",
-                    "-e",
-                    "GITLAB_PERSONAL_ACCESS_TOKEN",
-                    "mcp/gitlab"
-                ]
-                ,env={
-                    "GITLAB_API_URL": "https://gitlab.revolve.team/api/v4",
-                    "GITLAB_PERSONAL_ACCESS_TOKEN": os.getenv("GITLAB_PERSONAL_ACCESS_TOKEN")
-                }
-            )
-        ))
-
-        
-        with gitlab_mcp_client:
-            gitlab_tools = gitlab_mcp_client.list_tools_sync()
-            gitlab_agent = Agent(
-                tools=gitlab_tools,
-                system_prompt=GITLAB_AGENT_SYSTEM_PROMPT,
-                trace_attributes={
-                    "session.id": "gitlab-agent-{}".format(datetime.now(timezone.utc).date()),
-                    "langfuse.tags": ["gitlab-agent"]
-                }
-            )
-            return gitlab_agent(user_message)
+        tools, system_prompt = [], GITLAB_AGENT_SYSTEM_PROMPT
+        if get_gitlab_indexer() is not None:
+            tools, system_prompt = [search_gitlab_catalog], system_prompt + GITLAB_CATALOG_PROMPT
+        return gitlab_mcp_pool.run_agent(get_model("gitlab"), system_prompt, user_message, extra_tools=tools)
+    except PoolExhaustedError:
+        # Raised as is so the circuit breaker does not count it as a failure
+        raise
     except Exception as e:
         return f"Error running GitLab agent: {str(e)}"
-
@@ -0,0 +1,375 @@
+"""
+Local catalog of GitLab projects, searched without calling the GitLab API.
+
+A background indexer copies project metadata (name, description, topics,
+languages, README and last activity) from the GitLab REST API into SQLite.
+Each sync only asks for projects active since the previous one
+(``last_activity_after``), so after the first full pass a sync costs a few
+requests. Projects are searched two ways, merged by reciprocal rank fusion:
+BM25 over an FTS5 index of their text, and cosine similarity of embeddings.
+The GitLab agent queries the catalog in milliseconds and keeps its MCP tools
+for details the catalog does not hold.
+"""
+
+import json
+import sqlite3
+import threading
+import time
+from typing import Any, Callable, Dict, List, Optional, Sequence
+from urllib.parse import quote
+
+from ..core.embeddings import hash_embedding, tokenize
+
+# Rank offset of reciprocal rank fusion, damping the weight of the top ranks
+RRF_K = 60
+# Candidates taken from each ranking before fusion
+CANDIDATES = 50
+
+
+def _project_text(project: Dict[str, Any]) -> str:
+    return "\n".join(
+        [
+            project["name"],
+            project["path"],
+            project["description"],
+            " ".join(project["topics"]),
+            " ".join(project["languages"]),
+            project["readme"],
+        ]
+    )
+
+
+class GitLabCatalog:
+    """
+    Projects stored in SQLite with a full-text index and embeddings.
+
+    Args:
+        path: SQLite file (``:memory:`` for a private in-memory catalog)
+        embed: Callable turning a text into a unit-length vector
+    """
+
+    def __init__(self, path: str, embed: Callable[[str], Sequence[float]] = hash_embedding):
+        self.path = path
+        self.embed = embed
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(path, check_same_thread=False, timeout=5)
+        if path != ":memory:":
+            self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute(
+            "CREATE TABLE IF NOT EXISTS projects ("
+            " id INTEGER PRIMARY KEY, name TEXT, path TEXT, description TEXT, topics TEXT,"
+            " languages TEXT, readme TEXT, web_url TEXT, last_activity_at TEXT, embedding TEXT)"
+        )
+        self._conn.execute(
+            "CREATE VIRTUAL TABLE IF NOT EXISTS projects_fts"
+            " USING fts5(name, path, description, topics, languages, readme)"
+        )
+        self._conn.execute("CREATE TABLE IF NOT EXISTS sync_state (key TEXT PRIMARY KEY, value TEXT)")
+        self._conn.commit()
+        # Embedding matrix, rebuilt after the projects change
+        self._vectors = None
+        self.searches = 0
+
+    def upsert(self, project: Dict[str, Any]):
+        """
+        Store a project, replacing an earlier copy.
+
+        Args:
+            project: id, name, path, description, topics, languages, readme,
+                web_url and last_activity_at of the project
+        """
+        embedding = list(self.embed(_project_text(project)))
+        with self._lock:
+            self._conn.execute(
+                "INSERT OR REPLACE INTO projects"
+                " (id, name, path, description, topics, languages, readme, web_url, last_activity_at, embedding)"
+                " VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?)",
+                (
+                    project["id"], project["name"], project["path"], project["description"],
+                    json.dumps(project["topics"]), json.dumps(project["languages"]), project["readme"],
+                    project["web_url"], project["last_activity_at"], json.dumps(embedding),
+                ),
+            )
+            self._conn.execute("DELETE FROM projects_fts WHERE rowid = ?", (project["id"],))
+            self._conn.execute(
+                "INSERT INTO projects_fts (rowid, name, path, description, topics, languages, readme)"
+                " VALUES (?, ?, ?, ?, ?, ?, ?)",
+                (
+                    project["id"], project["name"], project["path"], project["description"],
+                    " ".join(project["topics"]), " ".join(project["languages"]), project["readme"],
+                ),
+            )
+            self._conn.commit()
+            self._vectors = None
+
+    def get_state(self, key: str) -> Optional[str]:
+        with self._lock:
+            row = self._conn.execute("SELECT value FROM sync_state WHERE key = ?", (key,)).fetchone()
+        return row[0] if row else None
+
+    def set_state(self, key: str, value: str):
+        with self._lock:
+            self._conn.execute("INSERT OR REPLACE INTO sync_state (key, value) VALUES (?, ?)", (key, value))
+            self._conn.commit()
+
+    def __len__(self) -> int:
+        with self._lock:
+            return self._conn.execute("SELECT COUNT(*) FROM projects").fetchone()[0]
+
+    def _bm25_ranking(self, query: str) -> List[int]:
+        words = tokenize(query)
+        if not words:
+            return []
+        match = " OR ".join('"{}"'.format(word.replace('"', "")) for word in words)
+        with self._lock:
+            rows = self._conn.execute(
+                "SELECT rowid FROM projects_fts WHERE projects_fts MATCH ? ORDER BY bm25(projects_fts) LIMIT ?",
+                (match, CANDIDATES),
+            ).fetchall()
+        return [row[0] for row in rows]
+
+    def _vector_ranking(self, query: str) -> List[int]:
+        # numpy is only loaded once the catalog is searched
+        import numpy as np
+
+        with self._lock:
+            if self._vectors is None:
+                rows = self._conn.execute("SELECT id, embedding FROM projects").fetchall()
+                ids = [row[0] for row in rows]
+                matrix = np.array([json.loads(row[1]) for row in rows], dtype=np.float32)
+                self._vectors = (ids, matrix)
+            ids, matrix = self._vectors
+        if not ids:
+            return []
+        scores = matrix @ np.asarray(self.embed(query), dtype=np.float32)
+        return [ids[i] for i in np.argsort(-scores)[:CANDIDATES] if scores[i] > 0]
+
+    def search(self, query: str, limit: int = 10) -> List[Dict[str, Any]]:
+        """
+        Find the projects best matching a query.
+
+        Args:
+            query: Free-text description of the project sought
+            limit: Maximum number of projects returned
+
+        Returns:
+            The projects, best first, with their fused ``score``
+        """
+        scores: Dict[int, float] = {}
+        for ranking in (self._bm25_ranking(query), self._vector_ranking(query)):
+            for rank, project_id in enumerate(ranking):
+                scores[project_id] = scores.get(project_id, 0.0) + 1 / (RRF_K + rank + 1)
+        best = sorted(scores, key=scores.get, reverse=True)[:limit]
+        with self._lock:
+            self.searches += 1
+            rows = {
+                row[0]: row
+                for row in self._conn.execute(
+                    "SELECT id, name, path, description, topics, languages, readme, web_url, last_activity_at"
+                    f" FROM projects WHERE id IN ({','.join('?' * len(best))})",
+                    best,
+                ).fetchall()
+            } if best else {}
+        return [
+            {
+                "nom": rows[i][1],
+                "path": rows[i][2],
+                "url": rows[i][7],
+                "description": rows[i][3],
+                "topics": json.loads(rows[i][4]),
+                "technologies": json.loads(rows[i][5]),
+                "readme_extrait": rows[i][6][:500],
+                "derniere_activite": rows[i][8],
+                "score": round(scores[i], 4),
+            }
+            for i in best if i in rows
+        ]
+
+    def stats(self) -> Dict[str, Any]:
+        """Return the number of projects, searches and the sync cursor"""
+        return {
+            "projects": len(self),
+            "searches": self.searches,
+            "last_activity_after": self.get_state("last_activity_after"),
+            "last_sync_at": self.get_state("last_sync_at"),
+        }
+
+
+class GitLabIndexer:
+    """
+    Keep a catalog in sync with the GitLab API.
+
+    Args:
+        catalog: The catalog to fill
+        client: HTTP client whose base URL is the GitLab API
+            (e.g. ``https://gitlab.example.com/api/v4``) and carrying the token
+        interval: Seconds between two syncs
+        readme_chars: Characters of README kept per project
+    """
+
+    def __init__(self, catalog: GitLabCatalog, client, interval: float = 900, readme_chars: int = 4000):
+        self.catalog = catalog
+        self.client = client
+        self.interval = interval
+        self.readme_chars = readme_chars
+        self._lock = threading.Lock()
+        self._thread: Optional[threading.Thread] = None
+        self.synced = 0
+        self.errors = 0
+
+    def _get(self, path: str, **params):
+        response = self.client.get(path, params=params)
+        response.raise_for_status()
+        return response
+
+    def _readme(self, project: Dict[str, Any]) -> str:
+        branch = project.get("default_branch")
+        readme_url = project.get("readme_url") or ""
+        marker = f"/blob/{branch}/"
+        if not branch or marker not in readme_url:
+            return ""
+        file_path = quote(readme_url.split(marker, 1)[1], safe="")
+        try:
+            text = self._get(f"/projects/{project['id']}/repository/files/{file_path}/raw", ref=branch).text
+        except Exception as e:
+            print(f"Error reading README of {project.get('path_with_namespace')}: {e}")
+            return ""
+        return text[: self.readme_chars]
+
+    def _project(self, project: Dict[str, Any]) -> Dict[str, Any]:
+        try:
+            languages = list(self._get(f"/projects/{project['id']}/languages").json())
+        except Exception as e:
+            print(f"Error reading languages of {project.get('path_with_namespace')}: {e}")
+            languages = []
+        return {
+            "id": project["id"],
+            "name": project.get("name") or "",
+            "path": project.get("path_with_namespace") or "",
+            "description": project.get("description") or "",
+            "topics": project.get("topics") or project.get("tag_list") or [],
+            "languages": languages,
+            "readme": self._readme(project),
+            "web_url": project.get("web_url") or "",
+            "last_activity_at": project.get("last_activity_at") or "",
+        }
+
+    def sync_once(self) -> int:
+        """
+        Copy the projects active since the last sync into the catalog.
+
+        Returns:
+            The number of projects stored
+        """
+        cursor = self.catalog.get_state("last_activity_after")
+        params = {"order_by": "last_activity_at", "sort": "asc", "per_page": 100}
+        if cursor:
+            params["last_activity_after"] = cursor
+        page, count = "1", 0
+        while page:
+            response = self._get("/projects", page=page, **params)
+            for project in response.json():
+                self.catalog.upsert(self._project(project))
+                count += 1
+                # Ascending order: the cursor only moves forward, and an
+                # interrupted sync resumes after the last stored project
+                if project.get("last_activity_at"):
+                    self.catalog.set_state("last_activity_after", project["last_activity_at"])
+            page = response.headers.get("x-next-page")
+        self.catalog.set_state("last_sync_at", str(time.time()))
+        with self._lock:
+            self.synced += count
+        print(f"GitLab catalog synced {count} projects ({len(self.catalog)} in total)")
+        return count
+
+    def _run(self):
+        while True:
+            time.sleep(self.interval)
+            try:
+                self.sync_once()
+            except Exception as e:
+                with self._lock:
+                    self.errors += 1
+                print(f"GitLab catalog sync failed: {e}")
+
+    def start(self) -> int:
+        """
+        Run a first sync, then keep syncing in the background.
+
+        A failed first sync raises and leaves the indexer stopped, so a
+        readiness check can retry it.
+
+        Returns:
+            The number of projects in the catalog
+        """
+        with self._lock:
+            if self._thread is not None:
+                return len(self.catalog)
+        self.sync_once()
+        with self._lock:
+            if self._thread is None:
+                self._thread = threading.Thread(target=self._run, daemon=True, name="gitlab-catalog-sync")
+                self._thread.start()
+        return len(self.catalog)
+
+    def stats(self) -> Dict[str, Any]:
+        """Return the catalog stats with the projects synced and failed syncs"""
+        with self._lock:
+            synced, errors, running = self.synced, self.errors, self._thread is not None
+        return dict(self.catalog.stats(), synced=synced, sync_errors=errors, running=running)
+
+
+_indexer_lock = threading.Lock()
+_indexer: Optional[GitLabIndexer] = None
+
+
+def create_gitlab_indexer(
+    embedder: str,
+    api_url: str,
+    token: str,
+    path: str,
+    interval: float = 900,
+    readme_chars: int = 4000,
+    model_id: str = "amazon.titan-embed-text-v2:0",
+    region_name: str = "us-east-1",
+) -> Optional[GitLabIndexer]:
+    """
+    Build the process-wide catalog indexer, once.
+
+    Args:
+        embedder: ``local`` (hashed bag of words), ``titan`` (Bedrock
+            embeddings) or ``off``
+        api_url: GitLab API URL
+        token: GitLab personal access token
+        path: SQLite file of the catalog
+        interval: Seconds between two syncs
+        readme_chars: Characters of README kept per project
+        model_id: Titan embedding model
+        region_name: Region of the Titan model
+
+    Returns:
+        The indexer, or None when the catalog is disabled
+    """
+    global _indexer
+    if embedder == "off":
+        return None
+    with _indexer_lock:
+        if _indexer is None:
+            import httpx
+
+            if embedder == "titan":
+                from ..core.semantic_cache import TitanEmbedder
+
+                embed = TitanEmbedder(model_id, region_name)
+            elif embedder == "local":
+                embed = hash_embedding
+            else:
+                raise ValueError(f"Unknown GitLab catalog embedder: {embedder}")
+            client = httpx.Client(base_url=api_url.rstrip("/"), headers={"PRIVATE-TOKEN": token}, timeout=30)
+            _indexer = GitLabIndexer(GitLabCatalog(path, embed), client, interval, readme_chars)
+    return _indexer
+
+
+def gitlab_catalog_stats() -> Optional[Dict[str, Any]]:
+    """Return the indexer stats, None until the catalog is created"""
+    return _indexer.stats() if _indexer is not None else None
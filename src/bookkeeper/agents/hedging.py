@@ -0,0 +1,144 @@
+"""
+Hedged sub-agent calls.
+
+A call still running after the chosen percentile of the source's recent
+latencies is duplicated; the first attempt to finish wins and the other is
+cancelled (or, once started, left to finish in the background). Hedges are
+paid from a budget earned by regular calls, so hedging adds at most
+``budget`` extra calls per call and never more than doubles the load.
+"""
+
+import threading
+import time
+from collections import deque
+from concurrent.futures import FIRST_COMPLETED, Future, ThreadPoolExecutor, wait
+from typing import Any, Callable, Deque, Dict, Optional
+
+
+class Hedger:
+    """
+    Duplicate slow sub-agent calls once they pass a latency percentile.
+
+    Args:
+        percentile: Latency percentile (0-100) after which a call is hedged
+        budget: Hedges allowed per regular call, capped at 1
+        min_samples: Latencies to observe for a source before hedging it
+        window: Number of recent latencies kept per source
+        max_workers: Threads running attempts
+    """
+
+    def __init__(
+        self,
+        percentile: float = 95,
+        budget: float = 0.1,
+        min_samples: int = 20,
+        window: int = 200,
+        max_workers: int = 32,
+    ):
+        self.percentile = percentile
+        self.budget = min(budget, 1.0)
+        self.min_samples = min_samples
+        self._latencies: Dict[str, Deque[float]] = {}
+        self._pool = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="hedge")
+        self._lock = threading.Lock()
+        # Earned by regular calls, spent by hedges; capped so a quiet period
+        # cannot be followed by a burst of hedges
+        self._tokens = 0.0
+        self._window = window
+        self.calls = 0
+        self.hedged = 0
+        self.hedge_wins = 0
+        self.budget_denied = 0
+
+    def delay(self, source: str) -> Optional[float]:
+        """Seconds after which a call to ``source`` is hedged, None until enough samples"""
+        with self._lock:
+            latencies = sorted(self._latencies.get(source, ()))
+        if len(latencies) < self.min_samples:
+            return None
+        index = min(int(len(latencies) * self.percentile / 100), len(latencies) - 1)
+        return latencies[index]
+
+    def _record(self, source: str, latency: float):
+        with self._lock:
+            self._latencies.setdefault(source, deque(maxlen=self._window)).append(latency)
+
+    def _take_token(self) -> bool:
+        with self._lock:
+            if self._tokens >= 1:
+                self._tokens -= 1
+                self.hedged += 1
+                return True
+            self.budget_denied += 1
+            return False
+
+    def _attempt(self, source: str, query_fn: Callable[[str], str], query: str) -> Future:
+        def timed():
+            started = time.monotonic()
+            result = query_fn(query)
+            self._record(source, time.monotonic() - started)
+            return result
+
+        return self._pool.submit(timed)
+
+    def run(self, source: str, query_fn: Callable[[str], str], query: str) -> str:
+        """
+        Run ``query_fn(query)``, hedging it if it is slower than usual.
+
+        Args:
+            source: Name of the sub-agent (gitlab, github, s3)
+            query_fn: Function running the sub-agent
+            query: The question sent to the sub-agent
+
+        Returns:
+            The answer of the first attempt to succeed
+
+        Raises:
+            Exception: The first attempt's error when every attempt failed
+        """
+        with self._lock:
+            self.calls += 1
+            self._tokens = min(self._tokens + self.budget, 10.0)
+
+        delay = self.delay(source)
+        if delay is None:
+            return self._attempt(source, query_fn, query).result()
+
+        primary = self._attempt(source, query_fn, query)
+        done, _ = wait([primary], timeout=delay)
+        if done or not self._take_token():
+            return primary.result()
+
+        print(f"Hedging {source} call after {delay:.1f}s")
+        hedge = self._attempt(source, query_fn, query)
+        pending = {primary, hedge}
+        while pending:
+            done, pending = wait(pending, return_when=FIRST_COMPLETED)
+            for future in done:
+                if future.exception() is None:
+                    for other in pending:
+                        other.cancel()
+                    if future is hedge:
+                        with self._lock:
+                            self.hedge_wins += 1
+                    return future.result()
+        # Both attempts failed: report the original one
+        return primary.result()
+
+    def stats(self) -> Dict[str, Any]:
+        """Return hedging counts and the current hedge delay of each source"""
+        with self._lock:
+            sources = list(self._latencies)
+            stats = {
+                "percentile": self.percentile,
+                "budget": self.budget,
+                "calls": self.calls,
+                "hedged": self.hedged,
+                "hedge_wins": self.hedge_wins,
+                "budget_denied": self.budget_denied,
+            }
+        stats["delay_seconds"] = {
+            source: round(delay, 3) if (delay := self.delay(source)) is not None else None
+            for source in sources
+        }
+        return stats
@@ -0,0 +1,282 @@
+"""
+Pool of long-lived MCP client sessions.
+
+Opening an MCP session costs a connection (a TLS handshake, or a server
+process for stdio servers), the MCP initialize exchange and a tool listing.
+A pool opens sessions on demand, up to its size, and keeps them for later
+queries. Each session serves one query at a time. Idle sessions are health
+checked (by listing their tools) before reuse once ``health_interval`` has
+passed, or right away after a query failed on them; a session failing its
+check is closed and replaced by a new connection. Listings go through the
+server's tool catalog, which prunes them to its allow-list.
+
+For servers run as local processes (stdio), a session is also recycled
+after ``max_uses`` queries to bound leaks in the server, and a supervisor
+thread checks idle sessions every ``supervise_interval`` seconds, restarting
+crashed ones before a query lands on them.
+"""
+
+import threading
+import time
+from contextlib import contextmanager
+from datetime import datetime, timezone
+from typing import Any, Callable, Dict, Iterator, List, Optional, Sequence
+
+from ..core.usage import run_tracked
+from .tool_catalog import ToolCatalog
+
+
+class PoolExhaustedError(TimeoutError):
+    """Every session of a pool stayed busy: the server itself may be fine"""
+
+
+class PooledSession:
+    """A started MCP client and the tools it listed"""
+
+    def __init__(self, client, tools: List[Any]):
+        self.client = client
+        self.tools = tools
+        self.last_checked = time.monotonic()
+        self.uses = 0
+
+
+class MCPSessionPool:
+    """
+    Share started MCP clients across queries.
+
+    Args:
+        factory: Callable returning a new (not yet started) MCPClient
+        size: Maximum number of open sessions, i.e. of concurrent queries
+        health_interval: Seconds an idle session is trusted without a check
+        acquire_timeout: Seconds to wait for a free session
+        name: Pool name used in logs and metrics
+        catalog: Tool catalog selecting the tools given to agents (None: all)
+        max_uses: Queries after which a session is closed and replaced (0: no limit)
+        supervise_interval: Seconds between supervisor checks of idle
+            sessions (0: no supervisor)
+    """
+
+    def __init__(
+        self,
+        factory: Callable[[], Any],
+        size: int = 4,
+        health_interval: float = 60,
+        acquire_timeout: float = 30,
+        name: str = "mcp",
+        catalog: Optional[ToolCatalog] = None,
+        max_uses: int = 0,
+        supervise_interval: float = 0,
+    ):
+        self.factory = factory
+        self.size = size
+        self.health_interval = health_interval
+        self.acquire_timeout = acquire_timeout
+        self.name = name
+        self.catalog = catalog
+        self._slots = threading.BoundedSemaphore(size)
+        self._idle: List[PooledSession] = []
+        self._lock = threading.Lock()
+        self._in_use = 0
+        self.connects = 0
+        self.reconnects = 0
+        self.health_failures = 0
+        self.timeouts = 0
+        self.max_uses = max_uses
+        self.recycled = 0
+        self.restarts = 0
+        self._closed = threading.Event()
+        if supervise_interval > 0:
+            threading.Thread(
+                target=self._supervise, args=(supervise_interval,), daemon=True, name=f"{name}-mcp-supervisor"
+            ).start()
+        _pools[name] = self
+
+    def _list_tools(self, client) -> List[Any]:
+        tools = client.list_tools_sync()
+        return self.catalog.select(tools) if self.catalog else tools
+
+    def _connect(self) -> PooledSession:
+        client = self.factory()
+        client.start()
+        try:
+            tools = self._list_tools(client)
+        except Exception:
+            self._close(client)
+            raise
+        with self._lock:
+            self.connects += 1
+        return PooledSession(client, tools)
+
+    def _close(self, client):
+        try:
+            client.stop(None, None, None)
+        except Exception as e:
+            print(f"Error closing {self.name} MCP session: {e}")
+
+    def _healthy(self, session: PooledSession) -> bool:
+        if time.monotonic() - session.last_checked < self.health_interval:
+            return True
+        try:
+            session.tools = self._list_tools(session.client)
+        except Exception as e:
+            print(f"{self.name} MCP session failed its health check: {e}")
+            with self._lock:
+                self.health_failures += 1
+            return False
+        session.last_checked = time.monotonic()
+        return True
+
+    def _take(self) -> PooledSession:
+        while True:
+            with self._lock:
+                session = self._idle.pop() if self._idle else None
+            if session is None:
+                return self._connect()
+            if self._healthy(session):
+                return session
+            self._close(session.client)
+            with self._lock:
+                self.reconnects += 1
+
+    @contextmanager
+    def session(self) -> Iterator[PooledSession]:
+        """
+        Borrow a session for one query.
+
+        Raises:
+            PoolExhaustedError: When every session stays busy for ``acquire_timeout``
+        """
+        if not self._slots.acquire(timeout=self.acquire_timeout):
+            with self._lock:
+                self.timeouts += 1
+            raise PoolExhaustedError(f"No {self.name} MCP session free after {self.acquire_timeout}s")
+        try:
+            session = self._take()
+            with self._lock:
+                self._in_use += 1
+            try:
+                session.uses += 1
+                yield session
+            except Exception:
+                # The failure may come from the session: check it before reuse
+                session.last_checked = float("-inf")
+                raise
+            finally:
+                recycle = bool(self.max_uses and session.uses >= self.max_uses)
+                with self._lock:
+                    self._in_use -= 1
+                    if recycle:
+                        self.recycled += 1
+                    else:
+                        self._idle.append(session)
+                if recycle:
+                    self._close(session.client)
+        finally:
+            self._slots.release()
+
+    def check(self) -> int:
+        """Borrow a session and count its tools, for readiness checks and circuit probes"""
+        with self.session() as session:
+            return len(session.tools)
+
+    def run_agent(self, model, system_prompt: str, user_message: str, extra_tools: Sequence[Any] = ()):
+        """
+        Answer one query with an agent given the tools of a borrowed session.
+
+        The agent is named after the pool in usage reports and traces.
+
+        Args:
+            model: Model of the agent, shared so it caches the system prompt
+                and the tool list
+            system_prompt: System prompt of the agent
+            user_message: The query
+            extra_tools: Local tools listed before the server's
+
+        Returns:
+            The agent result
+        """
+        from strands import Agent
+
+        with self.session() as session:
+            agent = Agent(
+                model=model,
+                tools=list(extra_tools) + session.tools,
+                system_prompt=system_prompt,
+                trace_attributes={
+                    "session.id": "{}-agent-{}".format(self.name, datetime.now(timezone.utc).date()),
+                    "langfuse.tags": [f"{self.name}-agent"]
+                }
+            )
+            return run_tracked(self.name, agent, user_message)
+
+    def check_idle(self):
+        """Health check the idle sessions now, restarting those that fail"""
+        checked = []
+        # Each session checked holds a slot, so borrowers never open extra ones
+        while self._slots.acquire(blocking=False):
+            with self._lock:
+                session = self._idle.pop() if self._idle else None
+            if session is None:
+                self._slots.release()
+                break
+            session.last_checked = float("-inf")
+            if not self._healthy(session):
+                self._close(session.client)
+                try:
+                    session = self._connect()
+                except Exception as e:
+                    print(f"Error restarting {self.name} MCP session: {e}")
+                    session = None
+                with self._lock:
+                    self.restarts += 1
+            checked.append(session)
+        with self._lock:
+            self._idle.extend(s for s in checked if s is not None)
+        for _ in checked:
+            self._slots.release()
+
+    def _supervise(self, interval: float):
+        while not self._closed.wait(interval):
+            try:
+                self.check_idle()
+            except Exception as e:
+                print(f"Error supervising {self.name} MCP sessions: {e}")
+
+    def close(self):
+        """Stop the supervisor and close the idle sessions"""
+        self._closed.set()
+        with self._lock:
+            idle, self._idle = self._idle, []
+        for session in idle:
+            self._close(session.client)
+
+    def stats(self) -> Dict[str, Any]:
+        """Return the pool size, open and busy sessions and connection counters"""
+        with self._lock:
+            return {
+                "size": self.size,
+                "open": len(self._idle) + self._in_use,
+                "in_use": self._in_use,
+                "connects": self.connects,
+                "reconnects": self.reconnects,
+                "health_failures": self.health_failures,
+                "timeouts": self.timeouts,
+                "recycled": self.recycled,
+                "restarts": self.restarts,
+                "catalog": self.catalog.stats() if self.catalog else None,
+            }
+
+
+# Pools created by the agents, by name
+_pools: Dict[str, MCPSessionPool] = {}
+
+
+def pool_stats() -> Dict[str, Any]:
+    """Return the stats of every pool created so far"""
+    return {name: pool.stats() for name, pool in _pools.items()}
+
+
+def close_pools():
+    """Close the idle sessions of every pool, at shutdown"""
+    for pool in list(_pools.values()):
+        pool.close()
@@ -1,27 +1,139 @@
+import asyncio
+import json
+import threading
+import time
+from concurrent.futures import Future, ThreadPoolExecutor, TimeoutError as FutureTimeoutError
 from datetime import datetime, timezone
 from strands import Agent, tool
+from strands.agent.conversation_manager import SlidingWindowConversationManager
 from strands.tools.executors import ConcurrentToolExecutor
-from strands.models import BedrockModel
-from .prompts import ORCHESTRATOR_SYSTEM_PROMPT
+from strands.models import BedrockModel, Model
+from ..core.config import AGENT_MODEL_IDS, MODEL_REGION, prompt_cache_config
+from ..core.usage import run_tracked, usage
+from .prompts import ORCHESTRATOR_SYSTEM_PROMPT, SYNTHESIS_SYSTEM_PROMPT
 from .github import query_github_agent
 from .gitlab import query_gitlab_agent
 from .s3 import query_s3_agent
-from typing import List, Optional
+from .compaction import ResultCompactor, count_tokens
+from .circuit import CircuitBreaker
+from .hedging import Hedger
+from .results import INVOKE_ERROR_PREFIX, merge_results
+from .router import QueryRouter
+from .source_cache import SourceResultCache
+from .subqueries import SubQueryMemo
+from typing import Callable, Dict, List, Optional
+
+# Sub-agents queried by the orchestrator, by source name
+SOURCE_AGENTS = {
+    "gitlab": query_gitlab_agent,
+    "github": query_github_agent,
+    "s3": query_s3_agent,
+}
+SOURCE_LABELS = {"gitlab": "GitLab", "github": "GitHub", "s3": "S3 (documentation)"}
+
+# Sub-agent calls with a deadline run here, so a call missing its slice can be
+# abandoned without blocking the caller (the thread finishes in the background)
+_source_pool = ThreadPoolExecutor(max_workers=32, thread_name_prefix="sub-agent")
+
+# "llm" lets the orchestrator model pick the sub-agents through tool calls;
+# "direct" queries all of them at once and only uses the model to synthesize
+FANOUT_MODES = ("llm", "direct")
+
+
+def build_synthesis_prompt(user_query: str, results: Dict[str, str], top_k: int = 0) -> str:
+    """
+    Lay out the user query and the sub-agent answers for the synthesis call.
+
+    Args:
+        user_query: The user's question or request
+        results: Raw answer of each source
+        top_k: When set, send the merged top-k projects and documents instead
+            of the raw JSON answers; answers that cannot be parsed stay raw
+
+    Returns:
+        The synthesis prompt
+    """
+    sections = [f"Requête de l'utilisateur :\n{user_query}"]
+    if top_k:
+        merged = merge_results(results, top_k)
+        if merged.projets_similaires:
+            projects = [p.model_dump(exclude_defaults=True) for p in merged.projets_similaires]
+            sections.append(
+                "Projets similaires (dédupliqués, classés par similarite_score) :\n"
+                + json.dumps(projects, ensure_ascii=False, separators=(",", ":"))
+            )
+        if merged.documents_pertinents:
+            documents = [d.model_dump(exclude_defaults=True) for d in merged.documents_pertinents]
+            sections.append(
+                "Documents pertinents (dédupliqués, classés par pertinence_score) :\n"
+                + json.dumps(documents, ensure_ascii=False, separators=(",", ":"))
+            )
+        results = merged.unparsed
+    for source, result in results.items():
+        sections.append(f"Résultats de l'agent {SOURCE_LABELS.get(source, source)} :\n{result}")
+    return "\n\n".join(sections)
 
 
 class BookkeeperOrchestrator:
     def __init__(
         self,
-        bedrock_model_id: str = "us.anthropic.claude-sonnet-4-20250514-v1:0",
-        region_name: str = "us-east-1",
+        bedrock_model_id: Optional[str] = None,
+        region_name: Optional[str] = None,
         system_prompt: Optional[str] = None,
         tools: Optional[List[callable]] = None,
+        model: Optional[Model] = None,
+        session_id: Optional[str] = None,
+        max_history: int = 40,
+        on_source_result: Optional[Callable[[str, str, str], None]] = None,
+        subquery_memo: Optional[SubQueryMemo] = None,
+        fan_out: str = "llm",
+        router: Optional[QueryRouter] = None,
+        synthesis_share: float = 0.3,
+        hedger: Optional[Hedger] = None,
+        source_cache: Optional[SourceResultCache] = None,
+        synthesis_top_k: int = 10,
+        compactor: Optional[ResultCompactor] = None,
+        synthesis_model: Optional[Model] = None,
+        breaker: Optional[CircuitBreaker] = None,
     ):
-        self.model_id = bedrock_model_id
-        self.model = BedrockModel(
-            model_id=self.model_id,
-            region_name=region_name
+        if fan_out not in FANOUT_MODES:
+            raise ValueError(f"Unknown fan-out mode: {fan_out}")
+        # A shared model avoids building a new Bedrock client per orchestrator
+        self.model = model if model else BedrockModel(
+            model_id=bedrock_model_id or AGENT_MODEL_IDS["orchestrator"],
+            region_name=region_name or MODEL_REGION,
+            **prompt_cache_config(),
         )
+        # Reported as the model actually answering, injected or built here
+        self.model_id = self.model.get_config().get("model_id")
+        # Direct-mode synthesis may run on its own model (default: the orchestrator's)
+        self.synthesis_model = synthesis_model if synthesis_model else self.model
+        self.session_id = session_id
+        self.on_source_result = on_source_result
+        self.subquery_memo = subquery_memo
+        self.fan_out = fan_out
+        self.router = router
+        # Sources the router kept for the current query (None: all of them)
+        self._routed_sources: Optional[List[str]] = None
+        # Share of a request deadline kept for the final answer after the sub-agents
+        self.synthesis_share = synthesis_share
+        self._source_deadline: Optional[float] = None
+        # End of the current query's deadline, bounding the final agent turn
+        self._deadline_at: Optional[float] = None
+        # Sources that missed their slice of the current query's deadline
+        self.missing_sources: List[str] = []
+        self.hedger = hedger
+        self.breaker = breaker
+        self.source_cache = source_cache
+        # Projects and documents kept for direct-mode synthesis (0: raw answers)
+        self.synthesis_top_k = synthesis_top_k
+        self.compactor = compactor
+        # Estimated tokens removed from the current query's sub-agent answers
+        self.tokens_saved = 0
+        # Final turn abandoned at the deadline and still running on this
+        # orchestrator's agents; sessions wait for it before reuse
+        self.abandoned_turn: Optional[Future] = None
+        self._lock = threading.Lock()
         
         self.system_prompt = system_prompt if system_prompt else ORCHESTRATOR_SYSTEM_PROMPT
         
@@ -38,8 +150,7 @@ class BookkeeperOrchestrator:
                 Response from GitLab operations
             """
             try:
-                result = query_gitlab_agent(query)
-                return str(result)
+                return self._run_source("gitlab", query_gitlab_agent, query)
             except Exception as e:
                 return f"Error in GitLab assistant: {str(e)}"
 
@@ -55,8 +166,7 @@ class BookkeeperOrchestrator:
                 Response from GitHub operations
             """
             try:
-                result = query_github_agent(query)
-                return str(result)
+                return self._run_source("github", query_github_agent, query)
             except Exception as e:
                 return f"Error in GitHub assistant: {str(e)}"
 
@@ -72,8 +182,7 @@ class BookkeeperOrchestrator:
                 Relevant documentation content
             """
             try:
-                result = query_s3_agent(query)
-                return str(result)
+                return self._run_source("s3", query_s3_agent, query)
             except Exception as e:
                 return f"Error in documentation assistant: {str(e)}"
         
@@ -88,42 +197,210 @@ class BookkeeperOrchestrator:
             system_prompt=self.system_prompt,
             tool_executor=ConcurrentToolExecutor(),
             tools=self.tools,
+            conversation_manager=SlidingWindowConversationManager(window_size=max_history),
             trace_attributes={
-                "session.id": "orchestrator-{}".format(datetime.now(timezone.utc).date()),
+                "session.id": "orchestrator-{}".format(session_id or datetime.now(timezone.utc).date()),
                 "langfuse.tags": ["orchestrator"]
             }
         )
+
+        # Tool-less agent used by the direct fan-out mode
+        self.synthesis_agent = Agent(
+            model=self.synthesis_model,
+            system_prompt=SYNTHESIS_SYSTEM_PROMPT,
+            conversation_manager=SlidingWindowConversationManager(window_size=max_history),
+            trace_attributes={
+                "session.id": "orchestrator-{}".format(session_id or datetime.now(timezone.utc).date()),
+                "langfuse.tags": ["orchestrator", "synthesis"]
+            }
+        )
     
-    def invoke(self, user_query: str) -> str:
+    def _start(self, user_query: str, deadline: Optional[float]) -> List[str]:
+        """
+        Reset the per-query state and pick the sources to query.
+
+        Args:
+            user_query: The user's question or request
+            deadline: Seconds the whole query may take, or None for no limit
+
+        Returns:
+            The sources chosen by the router, all of them without a router
+        """
+        self.missing_sources = []
+        self.tokens_saved = 0
+        now = time.monotonic()
+        self._source_deadline = now + deadline * (1 - self.synthesis_share) if deadline else None
+        self._deadline_at = now + deadline if deadline else None
+        self._routed_sources = self.router.route(user_query).sources if self.router else None
+        return self._routed_sources or list(SOURCE_AGENTS)
+
+    def _run_source(self, source: str, query_fn: Callable, query: str) -> str:
+        """Run a sub-agent query within the query's deadline"""
+        if self._routed_sources is not None and source not in self._routed_sources:
+            return f"{SOURCE_LABELS[source]} skipped: the query router judged this source irrelevant to the request."
+        if self._source_deadline is None:
+            return self._query_source(source, query_fn, query)
+
+        future = _source_pool.submit(self._query_source, source, query_fn, query)
+        try:
+            return future.result(timeout=max(self._source_deadline - time.monotonic(), 0))
+        except FutureTimeoutError:
+            future.cancel()
+            self._mark_missing(source)
+            print(f"{SOURCE_LABELS[source]} missed the deadline for query: {query}")
+            return f"{SOURCE_LABELS[source]} did not answer in time: its results are missing from this answer."
+
+    def _mark_missing(self, source: str):
+        """Record a source left out of the current answer (called from worker threads)"""
+        with self._lock:
+            if source not in self.missing_sources:
+                self.missing_sources.append(source)
+
+    def _query_source(self, source: str, query_fn: Callable, query: str) -> str:
+        """Run a sub-agent query unless cached or its circuit is open, reporting its result"""
+        def call(q: str) -> str:
+            if self.hedger:
+                return self.hedger.run(source, lambda hq: str(query_fn(hq)), q)
+            return str(query_fn(q))
+
+        def guarded_call(q: str) -> str:
+            return self.breaker.call(source, call, q) if self.breaker else call(q)
+
+        result = self.source_cache.get(source, query) if self.source_cache else None
+        if result is None and self.breaker and not self.breaker.allow(source):
+            self._mark_missing(source)
+            return f"{SOURCE_LABELS[source]} unavailable: the source is failing, its results are missing from this answer."
+        if result is None:
+            try:
+                result = self.subquery_memo.run(source, query, guarded_call) if self.subquery_memo else guarded_call(query)
+            finally:
+                if self.breaker:
+                    self.breaker.release(source)
+            if self.source_cache:
+                self.source_cache.set(source, query, result)
+        if self.on_source_result:
+            self.on_source_result(source, query, result)
+        return self._compact(source, result)
+
+    def _remaining(self) -> Optional[float]:
+        """Seconds left before the query's deadline, None without one"""
+        return max(self._deadline_at - time.monotonic(), 0) if self._deadline_at is not None else None
+
+    def _run_agent(self, name: str, agent: Agent, prompt: str) -> str:
+        """
+        Run the final agent turn within what is left of the deadline.
+
+        Raises:
+            TimeoutError: When the turn misses the deadline; the call keeps
+                running in the background (see ``abandoned_turn``) and is
+                then removed from the agent's conversation
+        """
+        if self._deadline_at is None:
+            return str(run_tracked(name, agent, prompt))
+        history = list(agent.messages)
+        future = _source_pool.submit(run_tracked, name, agent, prompt)
+        try:
+            return str(future.result(timeout=self._remaining()))
+        except FutureTimeoutError:
+            if not future.cancel():
+                def restore_history(_):
+                    # The caller got an error: keep the late answer out of the history
+                    agent.messages[:] = history
+
+                future.add_done_callback(restore_history)
+                self.abandoned_turn = future
+            raise TimeoutError(f"the {name} turn missed the request deadline")
+
+    def _compact(self, source: str, result: str) -> str:
+        """Fit a sub-agent answer to the source's token budget, counting the savings"""
+        if not self.compactor:
+            return result
+        compacted = self.compactor.compact(source, result)
+        with self._lock:
+            self.tokens_saved += count_tokens(result) - count_tokens(compacted)
+        return compacted
+
+    def _log_savings(self):
+        if self.compactor:
+            print(f"Compaction saved ~{self.tokens_saved} tokens of sub-agent answers")
+
+    async def _fan_out(self, user_query: str, sources: List[str]) -> Dict[str, str]:
+        """Query the given sub-agents concurrently with the user's query"""
+        async def ask(source: str) -> str:
+            try:
+                return await asyncio.to_thread(self._run_source, source, SOURCE_AGENTS[source], user_query)
+            except Exception as e:
+                return f"Error in {SOURCE_LABELS[source]} assistant: {str(e)}"
+
+        results = await asyncio.gather(*(ask(source) for source in sources))
+        return dict(zip(sources, results))
+
+    def invoke(self, user_query: str, mode: Optional[str] = None, deadline: Optional[float] = None) -> str:
         """
         Process a user query and return the response.
         
+        Sub-agents share the part of ``deadline`` not kept for synthesis;
+        those missing it are listed in ``missing_sources`` and the answer is
+        built from the others. The final agent turn gets the rest of the
+        deadline and fails with an error message when it misses it.
+
         Args:
             user_query: The user's question or request
+            mode: Fan-out mode overriding the orchestrator's default
+            deadline: Seconds the query may take, or None for no limit
             
         Returns:
             The agent's response as a string
         """
         try:
-            response = str(self.agent(user_query))
+            sources = self._start(user_query, deadline)
+            if (mode or self.fan_out) == "direct":
+                results = asyncio.run(self._fan_out(user_query, sources))
+                prompt = build_synthesis_prompt(user_query, results, self.synthesis_top_k)
+                response = self._run_agent("synthesis", self.synthesis_agent, prompt)
+            else:
+                response = self._run_agent("orchestrator", self.agent, user_query)
         except Exception as e:
-            return f"Error invoking agent: {e}"
+            return f"{INVOKE_ERROR_PREFIX}: {e}"
+        self._log_savings()
         return response
     
-    async def stream(self, user_query: str):
+    async def stream(self, user_query: str, mode: Optional[str] = None, deadline: Optional[float] = None):
         """
         Process a user query and stream the response.
         
         Args:
             user_query: The user's question or request
+            mode: Fan-out mode overriding the orchestrator's default
+            deadline: Seconds the query may take, or None for no limit
             
         Yields:
             Response chunks as they are generated
         """
         try:
-            async for event in self.agent.stream_async(user_query):
-                if "data" in event:
-                    yield event["data"]
+            sources = self._start(user_query, deadline)
+            if (mode or self.fan_out) == "direct":
+                results = await self._fan_out(user_query, sources)
+                name, agent = "synthesis", self.synthesis_agent
+                prompt = build_synthesis_prompt(user_query, results, self.synthesis_top_k)
+            else:
+                name, agent, prompt = "orchestrator", self.agent, user_query
+            before = dict(agent.event_loop_metrics.accumulated_usage)
+            events = agent.stream_async(prompt).__aiter__()
+            try:
+                while True:
+                    try:
+                        event = await asyncio.wait_for(events.__anext__(), self._remaining())
+                    except StopAsyncIteration:
+                        break
+                    except asyncio.TimeoutError:
+                        raise TimeoutError(f"the {name} turn missed the request deadline")
+                    if "data" in event:
+                        yield event["data"]
+            finally:
+                await events.aclose()
+                usage.record(name, before, agent.event_loop_metrics.accumulated_usage)
+            self._log_savings()
         except Exception as e:
             yield f"We are unable to process your request at the moment. Error: {e}"
 
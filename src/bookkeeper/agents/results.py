@@ -0,0 +1,169 @@
+"""
+Typed sub-agent results and their local merge.
+
+The GitLab and GitHub agents answer with ``projets_similaires`` and the S3
+agent with ``documents_pertinents`` (see ``prompts.py``). Parsing those
+payloads lets the orchestrator de-duplicate and rank them itself, and send
+only a compact top-k to the synthesis model.
+"""
+
+import json
+import re
+from typing import Dict, List, Optional
+
+from pydantic import BaseModel, Field, ValidationError, field_validator
+
+from ..core.cache import normalize_prompt
+
+# Prefixes of the messages returned instead of an answer: by a sub-agent
+# ("Error running GitHub agent: ..."), by an orchestrator tool wrapping it
+# ("Error in GitHub assistant: ...") and by the orchestrator itself
+SUB_AGENT_ERROR_PREFIX = "Error running "
+TOOL_ERROR_PREFIX = "Error in "
+INVOKE_ERROR_PREFIX = "Error invoking agent"
+
+
+def is_error_answer(text: str) -> bool:
+    """Whether an agent returned one of its error messages instead of an answer"""
+    return text.startswith((SUB_AGENT_ERROR_PREFIX, TOOL_ERROR_PREFIX, INVOKE_ERROR_PREFIX))
+
+
+def _score(value) -> float:
+    """Read a 0-100 score written as a number, "85" or "85%"; unreadable scores are 0"""
+    if isinstance(value, (int, float)):
+        return float(value)
+    match = re.search(r"\d+(?:[.,]\d+)?", str(value or ""))
+    return float(match.group().replace(",", ".")) if match else 0.0
+
+
+class SimilarProject(BaseModel):
+    """A project returned by the GitLab or GitHub agent"""
+
+    nom: str = ""
+    url: str = ""
+    similarite_score: float = 0
+    technologies: List[str] = Field(default_factory=list)
+    contributeurs: List[str] = Field(default_factory=list)
+    resume: str = ""
+    derniere_activite: str = ""
+    sources: List[str] = Field(default_factory=list)
+
+    _parse_score = field_validator("similarite_score", mode="before")(_score)
+
+    def key(self) -> str:
+        return normalize_prompt(self.url.rstrip("/") or self.nom)
+
+
+class RelevantDocument(BaseModel):
+    """A document returned by the S3 agent"""
+
+    nom_fichier: str = ""
+    url_s3: str = ""
+    pertinence_score: float = 0
+    extrait_pertinent: str = ""
+    type_document: str = ""
+    date_document: str = ""
+
+    _parse_score = field_validator("pertinence_score", mode="before")(_score)
+
+    def key(self) -> str:
+        return normalize_prompt(self.url_s3 or self.nom_fichier)
+
+
+class SourceResult(BaseModel):
+    """Payload of one sub-agent answer"""
+
+    projets_similaires: List[SimilarProject] = Field(default_factory=list)
+    documents_pertinents: List[RelevantDocument] = Field(default_factory=list)
+
+
+class MergedResults(BaseModel):
+    """Ranked projects and documents from every source, plus unparsed answers"""
+
+    projets_similaires: List[SimilarProject] = Field(default_factory=list)
+    documents_pertinents: List[RelevantDocument] = Field(default_factory=list)
+    unparsed: Dict[str, str] = Field(default_factory=dict)
+
+
+def _json_objects(text: str):
+    """Yield the JSON objects found in text: fenced blocks first, then any bare object"""
+    for block in re.findall(r"```(?:json)?\s*(.*?)```", text, re.DOTALL):
+        try:
+            yield json.loads(block)
+        except ValueError:
+            pass
+    decoder = json.JSONDecoder()
+    for match in re.finditer(r"\{", text):
+        try:
+            value, _ = decoder.raw_decode(text, match.start())
+        except ValueError:
+            continue
+        yield value
+
+
+def parse_source_result(text: str) -> Optional[SourceResult]:
+    """
+    Extract the JSON payload of a sub-agent answer.
+
+    Args:
+        text: The agent's answer, JSON possibly surrounded by prose or fences
+
+    Returns:
+        The parsed payload, or None when the answer holds no usable JSON
+    """
+    for value in _json_objects(text):
+        if not isinstance(value, dict) or not ({"projets_similaires", "documents_pertinents"} & value.keys()):
+            continue
+        try:
+            return SourceResult.model_validate(value)
+        except ValidationError:
+            continue
+    return None
+
+
+def merge_results(results: Dict[str, str], top_k: int = 10) -> MergedResults:
+    """
+    De-duplicate and rank the items of several sub-agent answers.
+
+    Projects found by several sources (same URL, or same name without URL)
+    are merged: best score, union of technologies and contributors.
+
+    Args:
+        results: Raw answer of each source
+        top_k: Number of projects and of documents kept
+
+    Returns:
+        The top-k projects and documents, and the answers that could not be parsed
+    """
+    projects: Dict[str, SimilarProject] = {}
+    documents: Dict[str, RelevantDocument] = {}
+    unparsed: Dict[str, str] = {}
+
+    for source, text in results.items():
+        parsed = parse_source_result(text)
+        if parsed is None:
+            unparsed[source] = text
+            continue
+        for project in parsed.projets_similaires:
+            project.sources = [source]
+            known = projects.get(project.key())
+            if known is None:
+                projects[project.key()] = project
+                continue
+            known.similarite_score = max(known.similarite_score, project.similarite_score)
+            known.technologies = list(dict.fromkeys(known.technologies + project.technologies))
+            known.contributeurs = list(dict.fromkeys(known.contributeurs + project.contributeurs))
+            known.resume = known.resume or project.resume
+            known.derniere_activite = max(known.derniere_activite, project.derniere_activite)
+            if source not in known.sources:
+                known.sources.append(source)
+        for document in parsed.documents_pertinents:
+            known = documents.get(document.key())
+            if known is None or document.pertinence_score > known.pertinence_score:
+                documents[document.key()] = document
+
+    return MergedResults(
+        projets_similaires=sorted(projects.values(), key=lambda p: p.similarite_score, reverse=True)[:top_k],
+        documents_pertinents=sorted(documents.values(), key=lambda d: d.pertinence_score, reverse=True)[:top_k],
+        unparsed=unparsed,
+    )
@@ -0,0 +1,243 @@
+"""
+Local query router deciding which sub-agents a query needs.
+
+Explicit source names are tried first ("github", "merge request",
+"post-mortem"...); topical words such as "pipeline" or "pdf" only add a
+source next to a named one and never restrict the fan-out on their own. When
+no source is named, an optional nearest-centroid model compares the query to
+labelled example queries. A decision below the
+confidence threshold falls back to querying every source, so the router can
+only save calls, never lose a source it was unsure about.
+"""
+
+import json
+import math
+import re
+import threading
+from dataclasses import dataclass, field
+from typing import Any, Callable, Dict, List, Optional, Sequence
+
+from ..core.cache import normalize_prompt
+from ..core.embeddings import cosine, hash_embedding, normalize
+
+SOURCES = ("gitlab", "github", "s3")
+
+# Names of a source; matched on the normalized query, they restrict the fan-out
+SOURCE_NAMES = {
+    "gitlab": ["gitlab", "merge request", "merge requests"],
+    "github": ["github", "pull request", "pull requests"],
+    "s3": ["post-mortem", "post mortem", "postmortem"],
+}
+
+# Words hinting at a source; they add it next to a named source but never
+# exclude the others ("a PDF parser" is a code search, not a document one)
+KEYWORDS = {
+    "gitlab": [
+        "projet interne", "projets internes", "internal project", "internal projects",
+        "pipeline", "pipelines",
+    ],
+    "github": [
+        "open source", "open-source", "repo public", "public repo", "public repository",
+        "stars", "forks",
+    ],
+    "s3": [
+        "document", "documents", "documentation", "doc", "docs", "pdf", "rapport", "rapports",
+        "report", "reports", "spécification", "spécifications", "specification",
+        "specifications", "spec", "retour d'expérience", "retex", "proposition commerciale",
+        "slides", "compte rendu",
+    ],
+}
+
+# Reference queries for the nearest-centroid model
+EXAMPLES = {
+    "gitlab": [
+        "trouve les projets internes qui utilisent kafka",
+        "quels projets de l'entreprise ont une api fastapi et postgresql",
+        "liste les dépôts avec une pipeline de déploiement kubernetes",
+        "which internal repositories implement single sign-on",
+        "find company projects similar to a react dashboard",
+    ],
+    "github": [
+        "quels dépôts publics de l'organisation utilisent terraform",
+        "trouve les issues ouvertes sur nos librairies open source",
+        "which public repositories have the most stars",
+        "find repositories with a python package for data pipelines",
+    ],
+    "s3": [
+        "trouve le post-mortem de l'incident de production",
+        "quelles sont les spécifications du projet de migration",
+        "résume le rapport de fin de projet",
+        "find the architecture document for the billing platform",
+        "what lessons were learned on the data lake project",
+        "retrouve la proposition envoyée au client",
+    ],
+}
+
+
+@dataclass
+class RoutingDecision:
+    """Sources chosen for a query and how confident the router was"""
+
+    sources: List[str]
+    confidence: float
+    method: str
+    fallback: bool = False
+    scores: Dict[str, float] = field(default_factory=dict)
+
+
+def _pattern(words: Sequence[str]) -> "re.Pattern[str]":
+    return re.compile(r"(?<!\w)(" + "|".join(re.escape(word) for word in words) + r")(?!\w)")
+
+
+class CentroidModel:
+    """Nearest-centroid classifier over embeddings of example queries"""
+
+    def __init__(self, examples: Dict[str, Sequence[str]], embed: Callable[[str], List[float]] = hash_embedding):
+        self.embed = embed
+        self.centroids = {}
+        for source, queries in examples.items():
+            vectors = [embed(query) for query in queries]
+            if vectors:
+                self.centroids[source] = normalize([sum(values) / len(vectors) for values in zip(*vectors)])
+
+    def scores(self, query: str) -> Dict[str, float]:
+        """Return the cosine similarity of the query to each source centroid"""
+        vector = self.embed(query)
+        return {source: cosine(vector, centroid) for source, centroid in self.centroids.items()}
+
+
+class QueryRouter:
+    """
+    Decide which sub-agents to run for a query.
+
+    Args:
+        threshold: Minimum confidence to restrict the sources; below it every
+            source is queried
+        model: Optional nearest-centroid model used when no source is named
+        margin: Sources scoring within ``margin`` of the best centroid are
+            routed too
+        temperature: Softmax temperature turning centroid similarities into
+            a confidence
+    """
+
+    def __init__(
+        self,
+        threshold: float = 0.6,
+        model: Optional[CentroidModel] = None,
+        margin: float = 0.05,
+        temperature: float = 0.1,
+    ):
+        self.threshold = threshold
+        self.model = model
+        self.margin = margin
+        self.temperature = temperature
+        self._names = {source: _pattern(words) for source, words in SOURCE_NAMES.items()}
+        self._topics = {source: _pattern(words) for source, words in KEYWORDS.items()}
+        self._lock = threading.Lock()
+        self._decisions = 0
+        self._fallbacks = 0
+        self._by_method: Dict[str, int] = {}
+        self._skipped = {source: 0 for source in SOURCES}
+
+    def _keywords(self, query: str) -> Optional[RoutingDecision]:
+        text = normalize_prompt(query)
+        names = {source: len(pattern.findall(text)) for source, pattern in self._names.items()}
+        if not sum(names.values()):
+            return None
+        topics = {source: len(pattern.findall(text)) for source, pattern in self._topics.items()}
+        hits = {source: names[source] + topics[source] for source in SOURCES}
+        # One hit gives 0.5, two 0.75, three 0.875... so a lone source name
+        # stays below the default threshold
+        return RoutingDecision(
+            sources=[source for source in SOURCES if hits[source]],
+            confidence=1 - 0.5 ** sum(hits.values()),
+            method="keywords",
+            scores={source: float(count) for source, count in hits.items()},
+        )
+
+    def _centroids(self, query: str) -> Optional[RoutingDecision]:
+        if self.model is None:
+            return None
+        scores = self.model.scores(query)
+        if not scores:
+            return None
+        best = max(scores.values())
+        # Probability of the best source under a softmax of the similarities
+        weights = [math.exp((score - best) / self.temperature) for score in scores.values()]
+        return RoutingDecision(
+            sources=[source for source in SOURCES if source in scores and scores[source] >= best - self.margin],
+            confidence=1 / sum(weights),
+            method="centroid",
+            scores={source: round(score, 3) for source, score in scores.items()},
+        )
+
+    def route(self, query: str) -> RoutingDecision:
+        """
+        Choose the sources for a query, falling back to all of them.
+
+        Args:
+            query: The user's query
+
+        Returns:
+            The routing decision, also logged and counted in ``stats()``
+        """
+        decision = self._keywords(query) or self._centroids(query)
+        if decision is None or decision.confidence < self.threshold:
+            decision = RoutingDecision(
+                sources=list(SOURCES),
+                confidence=decision.confidence if decision else 0.0,
+                method=decision.method if decision else "none",
+                fallback=True,
+                scores=decision.scores if decision else {},
+            )
+
+        with self._lock:
+            self._decisions += 1
+            self._fallbacks += decision.fallback
+            self._by_method[decision.method] = self._by_method.get(decision.method, 0) + 1
+            for source in SOURCES:
+                if source not in decision.sources:
+                    self._skipped[source] += 1
+        print(
+            f"Routing: sources={','.join(decision.sources)} method={decision.method} "
+            f"confidence={decision.confidence:.2f} fallback={decision.fallback}"
+        )
+        return decision
+
+    def stats(self) -> Dict[str, Any]:
+        """Return decision counts and how often each source was skipped"""
+        with self._lock:
+            return {
+                "threshold": self.threshold,
+                "decisions": self._decisions,
+                "fallbacks": self._fallbacks,
+                "by_method": dict(self._by_method),
+                "skipped": dict(self._skipped),
+            }
+
+
+def create_router(mode: str, threshold: float, examples_path: str = "") -> Optional[QueryRouter]:
+    """
+    Build the router selected by configuration.
+
+    Args:
+        mode: "off", "keywords" or "centroid" (keywords, then the example model)
+        threshold: Minimum confidence to skip sources
+        examples_path: Optional JSON file of {source: [example queries]}
+            replacing the built-in examples
+
+    Returns:
+        The router, or None when routing is disabled
+    """
+    if mode == "off":
+        return None
+    if mode == "keywords":
+        return QueryRouter(threshold)
+    if mode == "centroid":
+        examples = EXAMPLES
+        if examples_path:
+            with open(examples_path, encoding="utf-8") as f:
+                examples = json.load(f)
+        return QueryRouter(threshold, model=CentroidModel(examples))
+    raise ValueError(f"Unknown router mode: {mode}")
+
@@ -1,25 +1,31 @@
+from functools import lru_cache
 from strands import Agent, tool
 import boto3
 from strands_tools import retrieve
 from datetime import datetime, timezone
-import os
-import dotenv
-from ..core.config import bedrock_model
+from ..core.config import get_model
+from ..core.usage import run_tracked
 from .prompts import S3_AGENT_SYSTEM_PROMPT
 
-dotenv.load_dotenv()
+KB_REGION = 'us-east-1'  # Use the same region as bedrock_model
+
+
+@lru_cache(maxsize=1)
+def get_knowledge_base_id() -> str:
+	"""Get KB ID from parameter store, once per process"""
+	ssm = boto3.client('ssm', region_name=KB_REGION)
+	account_id = boto3.client('sts').get_caller_identity()['Account']
+
+	kb_id = ssm.get_parameter(Name=f"/{account_id}-{KB_REGION}/kb/knowledge-base-id")['Parameter']['Value']
+	print(f"Successfully retrieved KB ID: {kb_id}")
+	return kb_id
 
 
 @tool
 def get_s3_files(issue_description: str) -> str:
 	try:
-		# Get KB ID from parameter store
-		region = 'us-east-1'  # Use the same region as bedrock_model
-		ssm = boto3.client('ssm', region_name=region)
-		account_id = boto3.client('sts').get_caller_identity()['Account']
-
-		kb_id = ssm.get_parameter(Name=f"/{account_id}-{region}/kb/knowledge-base-id")['Parameter']['Value']
-		print(f"Successfully retrieved KB ID: {kb_id}")
+		region = KB_REGION
+		kb_id = get_knowledge_base_id()
 
 		# Use strands retrieve tool
 		tool_use = {
@@ -47,7 +53,7 @@ def get_s3_files(issue_description: str) -> str:
 def query_s3_agent(user_message):
 	try:
 		s3_agent = Agent(
-			model=bedrock_model,
+			model=get_model("s3"),
 			system_prompt=S3_AGENT_SYSTEM_PROMPT,
 			tools=[get_s3_files],
 			trace_attributes={
@@ -56,7 +62,7 @@ def query_s3_agent(user_message):
 			}
 		)
 
-		return s3_agent(user_message)
+		return run_tracked("s3", s3_agent, user_message)
 	except Exception as e:
 		return f"Error running S3 agent: {str(e)}"
 
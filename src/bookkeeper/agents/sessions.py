@@ -0,0 +1,115 @@
+import threading
+import time
+from collections import OrderedDict
+from contextlib import contextmanager
+from typing import TYPE_CHECKING, Any, Callable, Dict, Optional
+
+if TYPE_CHECKING:
+    from .orchestrator import BookkeeperOrchestrator
+
+
+class SessionBusyError(Exception):
+    """Raised when a session is already serving another request"""
+
+
+class _Session:
+    def __init__(self, orchestrator: "BookkeeperOrchestrator"):
+        self.orchestrator = orchestrator
+        self.lock = threading.Lock()
+        self.last_used = time.monotonic()
+
+
+class SessionPool:
+    """
+    Session-scoped orchestrators with LRU and idle-TTL eviction.
+
+    Requests carrying a session id reuse that session's orchestrator, so the
+    conversation continues; requests without one get a fresh orchestrator and
+    never share history with anybody. Each session serves one request at a
+    time, and its history is capped by the orchestrator's sliding window. A
+    session whose last turn was abandoned at its deadline stays checked out
+    until that turn finishes.
+    """
+
+    def __init__(
+        self,
+        factory: Callable[[Optional[str]], "BookkeeperOrchestrator"],
+        max_sessions: int = 256,
+        ttl: float = 1800,
+    ):
+        self.factory = factory
+        self.max_sessions = max_sessions
+        self.ttl = ttl
+        self._sessions: "OrderedDict[str, _Session]" = OrderedDict()
+        self._lock = threading.Lock()
+        self._created = 0
+        self._evicted = 0
+
+    def _get(self, session_id: str) -> _Session:
+        now = time.monotonic()
+        with self._lock:
+            self._evict_expired(now)
+            session = self._sessions.get(session_id)
+            if session is None:
+                session = _Session(self.factory(session_id))
+                self._sessions[session_id] = session
+                self._created += 1
+                while len(self._sessions) > self.max_sessions:
+                    self._sessions.popitem(last=False)
+                    self._evicted += 1
+            else:
+                self._sessions.move_to_end(session_id)
+            session.last_used = now
+            return session
+
+    def _evict_expired(self, now: float):
+        while self._sessions:
+            session_id, session = next(iter(self._sessions.items()))
+            if now - session.last_used < self.ttl:
+                break
+            del self._sessions[session_id]
+            self._evicted += 1
+
+    @contextmanager
+    def acquire(self, session_id: Optional[str] = None, blocking: bool = True):
+        """
+        Check out the orchestrator for a session.
+
+        Args:
+            session_id: Conversation id, or None for a one-off orchestrator
+            blocking: Wait for a busy session instead of raising
+
+        Yields:
+            The orchestrator to use for this request
+
+        Raises:
+            SessionBusyError: If ``blocking`` is False and the session is in use
+        """
+        if not session_id:
+            yield self.factory(None)
+            return
+
+        session = self._get(session_id)
+        if not session.lock.acquire(blocking=blocking):
+            raise SessionBusyError(f"Session {session_id} is already processing a request")
+        try:
+            yield session.orchestrator
+        finally:
+            session.last_used = time.monotonic()
+            abandoned = getattr(session.orchestrator, "abandoned_turn", None)
+            if abandoned is not None:
+                session.orchestrator.abandoned_turn = None
+                # Callbacks run in order: the history is restored before release
+                abandoned.add_done_callback(lambda _: session.lock.release())
+            else:
+                session.lock.release()
+
+    def stats(self) -> Dict[str, Any]:
+        """Return the number of live, created and evicted sessions"""
+        with self._lock:
+            return {
+                "active": len(self._sessions),
+                "max_sessions": self.max_sessions,
+                "created": self._created,
+                "evicted": self._evicted,
+            }
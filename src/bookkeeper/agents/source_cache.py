@@ -0,0 +1,109 @@
+"""
+Cache of sub-agent results keyed by (source, normalized query).
+
+Each source has its own TTL and size bound: documentation in the knowledge
+base changes rarely while repositories change often. Knowledge base
+ingestion calls ``invalidate_source_results("s3")`` so fresh documents are
+not hidden behind cached answers.
+"""
+
+import threading
+import weakref
+from typing import Any, Dict, Optional
+
+from ..core.cache import CacheBackend, cache_key, create_cache
+from .results import is_error_answer
+
+
+class SourceResultCache:
+    """
+    Per-source caches of sub-agent answers.
+
+    Args:
+        caches: Cache backend of each source; sources without one are not cached
+    """
+
+    def __init__(self, caches: Dict[str, CacheBackend]):
+        self.caches = caches
+        self._lock = threading.Lock()
+        self.invalidations = 0
+        _instances.add(self)
+
+    def get(self, source: str, query: str) -> Optional[str]:
+        """Return the cached answer of ``source`` to ``query``, or None"""
+        cache = self.caches.get(source)
+        if cache is None:
+            return None
+        cached = cache.get(cache_key(source, query))
+        return cached[0] if cached else None
+
+    def set(self, source: str, query: str, result: str):
+        """Cache an answer unless the sub-agent returned an error"""
+        cache = self.caches.get(source)
+        if cache is not None and not is_error_answer(result):
+            cache.set(cache_key(source, query), result)
+
+    def invalidate(self, source: Optional[str] = None):
+        """Drop the cached answers of ``source``, or of every source when None"""
+        for name, cache in self.caches.items():
+            if source is None or name == source:
+                cache.clear()
+        with self._lock:
+            self.invalidations += 1
+
+    def stats(self) -> Dict[str, Any]:
+        """Return the statistics of each source's cache"""
+        return {
+            "invalidations": self.invalidations,
+            "sources": {source: dict(cache.stats(), ttl=cache.ttl) for source, cache in self.caches.items()},
+        }
+
+
+# Live caches of this process, cleared by the invalidation hook
+_instances: "weakref.WeakSet[SourceResultCache]" = weakref.WeakSet()
+
+
+def create_source_cache(
+    backend: str,
+    ttls: Dict[str, float],
+    max_entries: int = 512,
+    path: Optional[str] = None,
+) -> Optional[SourceResultCache]:
+    """
+    Build the sub-agent result cache.
+
+    Args:
+        backend: ``memory``, ``sqlite`` (shared by workers) or ``none``
+        ttls: TTL in seconds of each source; 0 disables caching for a source
+        max_entries: Maximum number of entries kept per source
+        path: SQLite file, required for the ``sqlite`` backend
+
+    Returns:
+        The cache, or None when disabled
+    """
+    if backend == "none":
+        return None
+    caches = {
+        source: create_cache(backend, max_entries=max_entries, ttl=ttl, path=path, table=f"source_{source}")
+        for source, ttl in ttls.items()
+        if ttl > 0
+    }
+    return SourceResultCache(caches)
+
+
+def invalidate_source_results(source: Optional[str] = None):
+    """
+    Invalidation hook: forget cached answers of ``source`` (all when None).
+
+    Clears the caches of the current process and, with the ``sqlite``
+    backend, the file shared with the API workers, so a separate ingestion
+    process invalidates the running service too.
+    """
+    from ..core.config import SOURCE_CACHE_BACKEND, SOURCE_CACHE_PATH, SOURCE_CACHE_TTLS
+
+    for cache in list(_instances):
+        cache.invalidate(source)
+    if SOURCE_CACHE_BACKEND == "sqlite":
+        shared = create_source_cache("sqlite", SOURCE_CACHE_TTLS, path=SOURCE_CACHE_PATH)
+        shared.invalidate(source)
+    print(f"Invalidated cached sub-agent results for {source or 'every source'}")
@@ -0,0 +1,57 @@
+import threading
+from concurrent.futures import Future
+from typing import Any, Callable, Dict, Tuple
+from ..core.cache import normalize_prompt
+
+
+class SubQueryMemo:
+    """
+    Share sub-agent results between orchestrators working on the same batch.
+
+    The first orchestrator asking a source a given (normalized) question runs
+    the sub-agent; any other orchestrator asking the same question, even while
+    that run is still in progress, waits for it and reuses its answer.
+    """
+
+    def __init__(self):
+        self._results: Dict[Tuple[str, str], Future] = {}
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    def run(self, source: str, query: str, query_fn: Callable[[str], str]) -> str:
+        """
+        Answer ``query`` from ``source``, running ``query_fn`` at most once.
+
+        Args:
+            source: Name of the sub-agent (gitlab, github, s3)
+            query: The question sent to the sub-agent
+            query_fn: Function running the sub-agent
+
+        Returns:
+            The sub-agent's answer
+        """
+        key = (source, normalize_prompt(query))
+        with self._lock:
+            future = self._results.get(key)
+            owner = future is None
+            if owner:
+                future = self._results[key] = Future()
+                self.misses += 1
+            else:
+                self.hits += 1
+
+        if owner:
+            try:
+                future.set_result(query_fn(query))
+            except BaseException as e:
+                # Let a later caller retry instead of sharing the failure
+                with self._lock:
+                    del self._results[key]
+                future.set_exception(e)
+        return future.result()
+
+    def stats(self) -> Dict[str, Any]:
+        """Return how many sub-agent calls were run and how many were shared"""
+        with self._lock:
+            return {"subqueries_run": self.misses, "subqueries_shared": self.hits}
@@ -0,0 +1,108 @@
+"""
+Tool catalog of an MCP server, pruned to an allow-list.
+
+Every tool handed to an agent adds its schema to each model call. The
+catalog keeps, per server, the names of the tools matching the allow-list
+(exact names or ``fnmatch`` patterns such as ``search_*``) and the version
+of the listing they were chosen from: a hash of the tool names and input
+schemas. Sessions listing the same version reuse the selection; a new
+version (tools added, removed or changed by a server upgrade) refreshes it.
+Kept tools are sorted by name so their specs, and the prompt-cache
+checkpoint after them, are identical from one session to the next.
+"""
+
+import hashlib
+import json
+import threading
+from fnmatch import fnmatchcase
+from typing import Any, Dict, Iterable, List, Optional
+
+# Tools given to the GitHub and GitLab agents per profile (None: every tool of
+# the server). The similarity search only reads: write tools would just bloat
+# the prompt.
+TOOL_PROFILES: Dict[str, Optional[List[str]]] = {
+    "read-only-search": ["search_*", "get_*", "list_*"],
+    "all": None,
+}
+
+
+def catalog_version(tools: Iterable[Any]) -> str:
+    """Hash the names and input schemas of a tool listing"""
+    specs = sorted(
+        (tool.tool_name, tool.tool_spec.get("inputSchema")) for tool in tools
+    )
+    return hashlib.sha256(json.dumps(specs, sort_keys=True, default=str).encode()).hexdigest()[:12]
+
+
+class ToolCatalog:
+    """
+    Select the allowed tools of one MCP server.
+
+    Args:
+        allowed: Tool names or patterns kept, None keeps every tool
+        name: Server name used in logs and metrics
+    """
+
+    def __init__(self, allowed: Optional[Iterable[str]] = None, name: str = "mcp"):
+        self.allowed = list(allowed) if allowed is not None else None
+        self.name = name
+        self._lock = threading.Lock()
+        self.version: Optional[str] = None
+        self._kept: List[str] = []
+        self.listed = 0
+        self.refreshes = 0
+
+    def _matches(self, tool_name: str) -> bool:
+        return self.allowed is None or any(fnmatchcase(tool_name, pattern) for pattern in self.allowed)
+
+    def select(self, tools: List[Any]) -> List[Any]:
+        """
+        Keep the allowed tools of a session's listing.
+
+        Args:
+            tools: Tools listed by one session of the server
+
+        Returns:
+            The allowed tools, sorted by name
+        """
+        version = catalog_version(tools)
+        with self._lock:
+            if version != self.version:
+                self.version = version
+                self.listed = len(tools)
+                self._kept = sorted(tool.tool_name for tool in tools if self._matches(tool.tool_name))
+                self.refreshes += 1
+                print(f"{self.name} tool catalog version {version}: {len(self._kept)} of {len(tools)} tools kept")
+            kept = set(self._kept)
+        return sorted((tool for tool in tools if tool.tool_name in kept), key=lambda tool: tool.tool_name)
+
+    def stats(self) -> Dict[str, Any]:
+        """Return the catalog version, listed and kept tools"""
+        with self._lock:
+            return {
+                "version": self.version,
+                "listed": self.listed,
+                "kept": list(self._kept),
+                "refreshes": self.refreshes,
+            }
+
+
+def allowed_tools(profile: str, tools: str = "") -> Optional[List[str]]:
+    """
+    Resolve the allow-list of a server from its configuration.
+
+    Args:
+        profile: Selected profile, a key of ``TOOL_PROFILES``
+        tools: Comma-separated names or patterns, overriding the profile
+
+    Returns:
+        The allowed names or patterns, None for every tool
+
+    Raises:
+        ValueError: For an unknown profile
+    """
+    if tools.strip():
+        return [name.strip() for name in tools.split(",") if name.strip()]
+    if profile not in TOOL_PROFILES:
+        raise ValueError(f"Unknown tool profile: {profile}. Use one of {', '.join(TOOL_PROFILES)}")
+    return TOOL_PROFILES[profile]
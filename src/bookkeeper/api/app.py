@@ -1,6 +1,7 @@
-from fastapi import FastAPI
+import asyncio
+from fastapi import FastAPI, Request
 from fastapi.middleware.cors import CORSMiddleware
-from .models import InvocationResponse
+from .models import InvocationResponse, JobResponse
 from . import routes
 
 app = FastAPI(title="Strands Agent Server", version="1.0.0")
@@ -16,8 +17,33 @@ app.add_middleware(
 
 
 @app.post("/invocations", response_model=InvocationResponse)
-async def invoke_agent_endpoint(request: routes.InvocationRequest):
-    return await routes.invoke_agent(request)
+async def invoke_agent_endpoint(request: routes.InvocationRequest, http_request: Request):
+    return await routes.invoke_agent(request, http_request)
+
+
+@app.post("/invocations/stream")
+async def stream_agent_endpoint(request: routes.InvocationRequest, http_request: Request):
+    return await routes.stream_agent(request, http_request)
+
+
+@app.post("/invocations/batch")
+async def invoke_batch_endpoint(request: routes.BatchInvocationRequest, http_request: Request):
+    return await routes.invoke_batch(request, http_request)
+
+
+@app.post("/jobs", status_code=202)
+async def submit_job_endpoint(request: routes.InvocationRequest, http_request: Request):
+    return await routes.submit_job(request, http_request)
+
+
+@app.get("/jobs/{job_id}", response_model=JobResponse)
+async def get_job_endpoint(job_id: str):
+    return await routes.get_job(job_id)
+
+
+@app.get("/jobs/{job_id}/events")
+async def job_events_endpoint(job_id: str, http_request: Request):
+    return await routes.job_events(job_id, http_request)
 
 
 @app.get("/ping")
@@ -25,6 +51,28 @@ async def ping_endpoint():
     return await routes.ping()
 
 
+@app.get("/ready")
+async def ready_endpoint():
+    return await routes.ready()
+
+
+@app.get("/metrics")
+async def metrics_endpoint():
+    return await routes.metrics()
+
+
+@app.on_event("startup")
+async def startup_event():
+    # Warm up in the background so /ping answers while clients are being built
+    routes.warm_up_task = asyncio.get_running_loop().run_in_executor(None, routes.warm_up)
+
+
+@app.on_event("shutdown")
+async def shutdown_event():
+    routes.executor.shutdown()
+    routes.close_pools()
+
+
 if __name__ == "__main__":
     import uvicorn
     uvicorn.run("bookkeeper.api.app:app", host="0.0.0.0", port=8080)
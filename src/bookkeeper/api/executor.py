@@ -0,0 +1,141 @@
+import asyncio
+import threading
+import time
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Callable, Dict
+
+
+class QueueFullError(Exception):
+    """Raised when an invocation cannot be admitted because the queue is full"""
+
+    def __init__(self, retry_after: int):
+        super().__init__("Invocation queue is full")
+        self.retry_after = retry_after
+
+
+class InvocationExecutor:
+    """
+    Run blocking orchestrator calls on a bounded thread pool.
+
+    At most ``max_workers`` invocations run at once and at most ``max_queue``
+    more wait for a worker. Anything beyond that is rejected immediately with
+    ``QueueFullError`` so the caller can answer with a retryable status instead
+    of piling up requests behind the event loop.
+    """
+
+    def __init__(self, max_workers: int = 4, max_queue: int = 16, retry_after: int = 5):
+        self.max_workers = max_workers
+        self.max_queue = max_queue
+        self.retry_after = retry_after
+        self._pool = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="invocation")
+        self._lock = threading.Lock()
+        self._queued = 0
+        self._in_flight = 0
+        self._completed = 0
+        self._rejected = 0
+        self._waits = deque(maxlen=256)
+
+    async def run(self, fn: Callable[..., Any], *args: Any) -> Any:
+        """
+        Run ``fn(*args)`` on a worker thread without blocking the event loop.
+
+        Args:
+            fn: The blocking callable to run
+            *args: Positional arguments for ``fn``
+
+        Returns:
+            Whatever ``fn`` returns
+
+        Raises:
+            QueueFullError: If all workers are busy and the queue is full
+        """
+        return await self.submit(fn, *args)
+
+    def submit(self, fn: Callable[..., Any], *args: Any) -> "asyncio.Future":
+        """
+        Admit ``fn(*args)`` immediately and return a future for its result.
+
+        Unlike ``run``, admission happens before the caller awaits anything, so
+        a full queue is reported synchronously. Must be called from the loop.
+
+        Raises:
+            QueueFullError: If all workers are busy and the queue is full
+        """
+        with self._lock:
+            if self._queued + self._in_flight >= self.max_workers + self.max_queue:
+                self._rejected += 1
+                raise QueueFullError(self.retry_after)
+            self._queued += 1
+        enqueued_at = time.monotonic()
+
+        def task():
+            with self._lock:
+                self._queued -= 1
+                self._in_flight += 1
+                self._waits.append(time.monotonic() - enqueued_at)
+            try:
+                return fn(*args)
+            finally:
+                with self._lock:
+                    self._in_flight -= 1
+                    self._completed += 1
+
+        future = self._pool.submit(task)
+        # A request abandoned while still queued never reaches task()
+        future.add_done_callback(lambda f: f.cancelled() and self._dequeue())
+        return asyncio.wrap_future(future)
+
+    def reserve(self):
+        """
+        Take a slot for work running outside the pool, such as a streamed
+        agent run on the event loop, so it counts against the same capacity.
+        Release it with ``release()``.
+
+        Raises:
+            QueueFullError: If all workers are busy and the queue is full
+        """
+        with self._lock:
+            if self._queued + self._in_flight >= self.max_workers + self.max_queue:
+                self._rejected += 1
+                raise QueueFullError(self.retry_after)
+            self._in_flight += 1
+
+    def release(self):
+        """Give back a slot taken by ``reserve()``"""
+        with self._lock:
+            self._in_flight -= 1
+            self._completed += 1
+
+    def _dequeue(self):
+        with self._lock:
+            self._queued -= 1
+
+    def utilization(self) -> float:
+        """Fraction of worker and queue slots currently taken"""
+        with self._lock:
+            return (self._queued + self._in_flight) / (self.max_workers + self.max_queue)
+
+    def stats(self) -> Dict[str, Any]:
+        """Return queue depth, in-flight count and recent admission wait times"""
+        with self._lock:
+            waits = sorted(self._waits)
+            stats = {
+                "max_workers": self.max_workers,
+                "max_queue": self.max_queue,
+                "queue_depth": self._queued,
+                "in_flight": self._in_flight,
+                "completed": self._completed,
+                "rejected": self._rejected,
+            }
+        if waits:
+            stats["wait_ms"] = {
+                "avg": round(1000 * sum(waits) / len(waits), 1),
+                "p95": round(1000 * waits[int(0.95 * (len(waits) - 1))], 1),
+                "max": round(1000 * waits[-1], 1),
+            }
+        return stats
+
+    def shutdown(self):
+        """Stop accepting work and wait for running invocations"""
+        self._pool.shutdown(wait=True, cancel_futures=True)
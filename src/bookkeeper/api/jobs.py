@@ -0,0 +1,188 @@
+"""
+Job state for asynchronous invocations.
+
+A job is a plain dict (see ``new_job``) kept in a JobStore. The in-memory
+store serves a single worker; the SQLite store lets any worker on the host
+answer status polls for a job started by another one.
+"""
+
+import json
+import sqlite3
+import threading
+import time
+import uuid
+from abc import ABC, abstractmethod
+from typing import Any, Dict, List, Optional
+
+TERMINAL_STATUSES = ("succeeded", "failed")
+
+
+def new_job(prompt: str, ttl: float) -> Dict[str, Any]:
+    """Build the initial record of a queued job"""
+    now = time.time()
+    return {
+        "job_id": uuid.uuid4().hex,
+        "status": "queued",
+        "prompt": prompt,
+        "partial": [],
+        "output": None,
+        "error": None,
+        "created_at": now,
+        "updated_at": now,
+        "expires_at": now + ttl,
+    }
+
+
+class JobStore(ABC):
+    """Interface shared by the job stores"""
+
+    def __init__(self, ttl: float = 86400):
+        self.ttl = ttl
+
+    @abstractmethod
+    def create(self, prompt: str) -> Dict[str, Any]:
+        """Create and persist a queued job"""
+
+    @abstractmethod
+    def get(self, job_id: str) -> Optional[Dict[str, Any]]:
+        """Return a job, or None when unknown or expired"""
+
+    @abstractmethod
+    def update(self, job_id: str, **fields: Any):
+        """Set top-level fields of a job (status, output, error)"""
+
+    @abstractmethod
+    def add_partial(self, job_id: str, entry: Dict[str, Any]):
+        """Append a per-agent result to a job"""
+
+    @abstractmethod
+    def stats(self) -> Dict[str, Any]:
+        """Count the live jobs per status"""
+
+
+class InMemoryJobStore(JobStore):
+    """Per-process job store"""
+
+    def __init__(self, ttl: float = 86400):
+        super().__init__(ttl)
+        self._jobs: Dict[str, Dict[str, Any]] = {}
+        self._lock = threading.Lock()
+
+    def _purge(self, now: float):
+        for job_id in [job_id for job_id, job in self._jobs.items() if job["expires_at"] <= now]:
+            del self._jobs[job_id]
+
+    def create(self, prompt: str) -> Dict[str, Any]:
+        job = new_job(prompt, self.ttl)
+        with self._lock:
+            self._purge(job["created_at"])
+            self._jobs[job["job_id"]] = job
+        return dict(job)
+
+    def get(self, job_id: str) -> Optional[Dict[str, Any]]:
+        with self._lock:
+            job = self._jobs.get(job_id)
+            if job is None or job["expires_at"] <= time.time():
+                return None
+            return dict(job, partial=list(job["partial"]))
+
+    def update(self, job_id: str, **fields: Any):
+        with self._lock:
+            job = self._jobs.get(job_id)
+            if job is not None:
+                job.update(fields, updated_at=time.time())
+
+    def add_partial(self, job_id: str, entry: Dict[str, Any]):
+        with self._lock:
+            job = self._jobs.get(job_id)
+            if job is not None:
+                job["partial"].append(entry)
+                job["updated_at"] = time.time()
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            statuses: List[str] = [job["status"] for job in self._jobs.values()]
+        return {status: statuses.count(status) for status in ("queued", "running", *TERMINAL_STATUSES)}
+
+
+class SQLiteJobStore(JobStore):
+    """Job store kept in a SQLite file, shareable across worker processes"""
+
+    def __init__(self, path: str, ttl: float = 86400):
+        super().__init__(ttl)
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(path, check_same_thread=False, timeout=5)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute(
+            "CREATE TABLE IF NOT EXISTS jobs ("
+            " job_id TEXT PRIMARY KEY, status TEXT NOT NULL, data TEXT NOT NULL, expires_at REAL NOT NULL)"
+        )
+        self._conn.commit()
+
+    def _save(self, job: Dict[str, Any]):
+        self._conn.execute(
+            "INSERT OR REPLACE INTO jobs (job_id, status, data, expires_at) VALUES (?, ?, ?, ?)",
+            (job["job_id"], job["status"], json.dumps(job), job["expires_at"]),
+        )
+        self._conn.commit()
+
+    def _load(self, job_id: str) -> Optional[Dict[str, Any]]:
+        row = self._conn.execute(
+            "SELECT data FROM jobs WHERE job_id = ? AND expires_at > ?", (job_id, time.time())
+        ).fetchone()
+        return json.loads(row[0]) if row else None
+
+    def create(self, prompt: str) -> Dict[str, Any]:
+        job = new_job(prompt, self.ttl)
+        with self._lock:
+            self._conn.execute("DELETE FROM jobs WHERE expires_at <= ?", (job["created_at"],))
+            self._save(job)
+        return job
+
+    def get(self, job_id: str) -> Optional[Dict[str, Any]]:
+        with self._lock:
+            return self._load(job_id)
+
+    def update(self, job_id: str, **fields: Any):
+        with self._lock:
+            job = self._load(job_id)
+            if job is not None:
+                job.update(fields, updated_at=time.time())
+                self._save(job)
+
+    def add_partial(self, job_id: str, entry: Dict[str, Any]):
+        with self._lock:
+            job = self._load(job_id)
+            if job is not None:
+                job["partial"].append(entry)
+                job["updated_at"] = time.time()
+                self._save(job)
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            rows = self._conn.execute(
+                "SELECT status, COUNT(*) FROM jobs WHERE expires_at > ? GROUP BY status", (time.time(),)
+            ).fetchall()
+        counts = dict(rows)
+        return {status: counts.get(status, 0) for status in ("queued", "running", *TERMINAL_STATUSES)}
+
+
+def create_job_store(backend: str, ttl: float = 86400, path: Optional[str] = None) -> JobStore:
+    """
+    Build a job store by name.
+
+    Args:
+        backend: ``memory`` or ``sqlite``
+        ttl: Seconds a job is kept after creation
+        path: SQLite file, required for the ``sqlite`` backend
+
+    Returns:
+        A JobStore
+    """
+    if backend == "memory":
+        return InMemoryJobStore(ttl=ttl)
+    if backend == "sqlite":
+        if not path:
+            raise ValueError("A path is required for the sqlite job store")
+        return SQLiteJobStore(path, ttl=ttl)
+    raise ValueError(f"Unknown job store backend: {backend}")
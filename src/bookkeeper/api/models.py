@@ -1,11 +1,28 @@
 from pydantic import BaseModel
-from typing import Dict, Any
+from typing import Dict, Any, List, Optional
 
 
 class InvocationRequest(BaseModel):
     input: Dict[str, Any]
+    session_id: Optional[str] = None
 
 
 class InvocationResponse(BaseModel):
     output: Dict[str, Any]
 
+
+class JobResponse(BaseModel):
+    job_id: str
+    status: str
+    partial: List[Dict[str, Any]] = []
+    output: Optional[Dict[str, Any]] = None
+    error: Optional[str] = None
+    created_at: float
+    updated_at: float
+
+
+class BatchInvocationRequest(BaseModel):
+    prompts: List[str]
+    max_parallel: Optional[int] = None
+    mode: Optional[str] = None
+    deadline: Optional[float] = None
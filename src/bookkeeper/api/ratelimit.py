@@ -0,0 +1,112 @@
+import threading
+import time
+from collections import OrderedDict
+from typing import Any, Dict, Tuple
+
+# Rough characters-per-token ratio used to estimate prompt size before calling a model
+CHARS_PER_TOKEN = 4
+
+
+def estimate_tokens(prompt: str, output_tokens: int) -> int:
+    """Estimate the tokens a prompt will cost, including the expected answer"""
+    return len(prompt) // CHARS_PER_TOKEN + output_tokens
+
+
+class TokenBucket:
+    """Classic token bucket refilled continuously at ``rate`` tokens per second"""
+
+    def __init__(self, rate: float, capacity: float):
+        self.rate = rate
+        self.capacity = capacity
+        self.tokens = capacity
+        self.updated_at = time.monotonic()
+
+    def _refill(self, now: float):
+        # ``now`` may predate the bucket when it was read before the bucket was created
+        self.tokens = min(self.capacity, self.tokens + max(now - self.updated_at, 0) * self.rate)
+        self.updated_at = max(now, self.updated_at)
+
+    def wait_time(self, amount: float, now: float) -> float:
+        """Seconds until ``amount`` tokens are available (0 when they already are)"""
+        self._refill(now)
+        if self.tokens >= amount:
+            return 0.0
+        return (min(amount, self.capacity) - self.tokens) / self.rate
+
+    def consume(self, amount: float):
+        self.tokens -= amount
+
+
+class RateLimiter:
+    """
+    Per-client request and token budgets.
+
+    Every client (API key or IP) gets two buckets: one counting requests and
+    one counting estimated model tokens, both expressed per minute. A request
+    is admitted only if both buckets can pay for it. A limit of 0 disables
+    that bucket.
+    """
+
+    def __init__(self, requests_per_minute: int, tokens_per_minute: int, max_clients: int = 10000):
+        self.requests_per_minute = requests_per_minute
+        self.tokens_per_minute = tokens_per_minute
+        self.max_clients = max_clients
+        self._clients: "OrderedDict[str, Tuple[TokenBucket, TokenBucket]]" = OrderedDict()
+        self._lock = threading.Lock()
+        self.throttled = 0
+
+    @property
+    def enabled(self) -> bool:
+        return self.requests_per_minute > 0 or self.tokens_per_minute > 0
+
+    def _buckets(self, client_id: str) -> Tuple[TokenBucket, TokenBucket]:
+        buckets = self._clients.get(client_id)
+        if buckets is None:
+            buckets = (
+                TokenBucket(self.requests_per_minute / 60, self.requests_per_minute),
+                TokenBucket(self.tokens_per_minute / 60, self.tokens_per_minute),
+            )
+            self._clients[client_id] = buckets
+            while len(self._clients) > self.max_clients:
+                self._clients.popitem(last=False)
+        else:
+            self._clients.move_to_end(client_id)
+        return buckets
+
+    def check(self, client_id: str, tokens: int = 0) -> float:
+        """
+        Try to admit one request costing ``tokens`` estimated tokens.
+
+        Args:
+            client_id: API key or IP of the caller
+            tokens: Estimated tokens of the request
+
+        Returns:
+            0 when admitted, otherwise the seconds to wait before retrying
+        """
+        if not self.enabled:
+            return 0.0
+        now = time.monotonic()
+        with self._lock:
+            requests, token_bucket = self._buckets(client_id)
+            wait = 0.0
+            if self.requests_per_minute > 0:
+                wait = max(wait, requests.wait_time(1, now))
+            if self.tokens_per_minute > 0:
+                wait = max(wait, token_bucket.wait_time(tokens, now))
+            if wait > 0:
+                self.throttled += 1
+                return wait
+            requests.consume(1)
+            token_bucket.consume(min(tokens, token_bucket.capacity))
+            return 0.0
+
+    def stats(self) -> Dict[str, Any]:
+        """Return the limits, the number of tracked clients and throttled requests"""
+        with self._lock:
+            return {
+                "requests_per_minute": self.requests_per_minute,
+                "tokens_per_minute": self.tokens_per_minute,
+                "clients": len(self._clients),
+                "throttled": self.throttled,
+            }
@@ -1,13 +1,364 @@
-from fastapi import HTTPException
+import asyncio
+import hmac
+import json
+import math
+import time
+from contextlib import ExitStack
+from typing import Any, Dict, List, Optional, Tuple
+from fastapi import HTTPException, Request
+from fastapi.responses import JSONResponse, StreamingResponse
 from datetime import datetime, timezone
-from .models import InvocationRequest, InvocationResponse
-from ..agents.orchestrator import BookkeeperOrchestrator
+from .models import BatchInvocationRequest, InvocationRequest, InvocationResponse, JobResponse
+from .executor import InvocationExecutor, QueueFullError
+from .jobs import TERMINAL_STATUSES, create_job_store
+from .ratelimit import RateLimiter, estimate_tokens
+from ..agents.circuit import CircuitBreaker
+from ..agents.compaction import ResultCompactor
+from ..agents.gitlab_catalog import gitlab_catalog_stats
+from ..agents.hedging import Hedger
+from ..agents.mcp_pool import close_pools, pool_stats
+from ..agents.results import is_error_answer
+from ..agents.router import create_router
+from ..agents.source_cache import create_source_cache
+from ..agents.sessions import SessionPool, SessionBusyError
+from ..agents.subqueries import SubQueryMemo
+from ..core.cache import cache_key, create_cache
+from ..core.readiness import Readiness
+from ..core.singleflight import SingleFlight
+from ..core.usage import usage
+from ..core.config import (
+    get_bedrock_model,
+    API_KEYS,
+    BATCH_CLIENTS,
+    get_model,
+    model_stats,
+    setup_telemetry,
+    BREAKER_ERROR_RATE,
+    BREAKER_LATENCY,
+    BREAKER_MIN_CALLS,
+    BREAKER_OPEN_SECONDS,
+    BREAKER_WINDOW,
+    CACHE_BACKEND,
+    CACHE_TTL,
+    CACHE_MAX_ENTRIES,
+    CACHE_PATH,
+    COMPACTION_BUDGETS,
+    COMPACTION_FIELD_CHARS,
+    DEADLINE_SYNTHESIS_SHARE,
+    BATCH_MAX_ITEMS,
+    BATCH_MAX_PARALLEL,
+    BATCH_SHED_THRESHOLD,
+    ESTIMATED_OUTPUT_TOKENS,
+    FANOUT_MODE,
+    HEDGE_BUDGET,
+    HEDGE_MIN_SAMPLES,
+    HEDGE_PERCENTILE,
+    INVOCATION_MAX_WORKERS,
+    INVOCATION_MAX_QUEUE,
+    INVOCATION_RETRY_AFTER,
+    INVOCATION_TIMEOUT,
+    INVOCATION_DEADLINE,
+    JOB_STORE_BACKEND,
+    JOB_TTL,
+    JOB_STORE_PATH,
+    RATE_LIMIT_RPM,
+    RATE_LIMIT_TPM,
+    READY_REQUIRES,
+    READY_TTL,
+    ROUTER_EXAMPLES,
+    ROUTER_MODE,
+    ROUTER_THRESHOLD,
+    SESSION_MAX_SESSIONS,
+    SESSION_TTL,
+    SEMANTIC_CACHE,
+    SEMANTIC_CACHE_MAX_ENTRIES,
+    SEMANTIC_CACHE_THRESHOLD,
+    EMBEDDING_MODEL_ID,
+    EMBEDDING_REGION,
+    SESSION_MAX_HISTORY,
+    SOURCE_CACHE_BACKEND,
+    SOURCE_CACHE_MAX_ENTRIES,
+    SOURCE_CACHE_PATH,
+    SOURCE_CACHE_TTLS,
+    SYNTHESIS_TOP_K,
+    TRUSTED_PROXY_HOPS,
+)
 
-# Initialize orchestrator instance
-orchestrator = BookkeeperOrchestrator()
 
+def new_orchestrator(**kwargs):
+    """
+    Build an orchestrator sharing the process-wide Bedrock model.
 
-async def invoke_agent(request: InvocationRequest):
+    The agents are imported here rather than at module level so the app can
+    answer /ping before strands and MCP are loaded.
+    """
+    from ..agents.orchestrator import BookkeeperOrchestrator
+
+    setup_telemetry()
+    return BookkeeperOrchestrator(
+        model=get_model("orchestrator"),
+        synthesis_model=get_model("synthesis"),
+        fan_out=FANOUT_MODE,
+        router=router,
+        synthesis_share=DEADLINE_SYNTHESIS_SHARE,
+        hedger=hedger,
+        breaker=breaker,
+        source_cache=source_cache,
+        synthesis_top_k=SYNTHESIS_TOP_K,
+        compactor=compactor,
+        **kwargs,
+    )
+
+
+def fan_out_mode(value: Optional[str]) -> Optional[str]:
+    """Validate a requested fan-out mode ("llm" or "direct"); None keeps the default"""
+    if value not in (None, "llm", "direct"):
+        raise HTTPException(status_code=400, detail=f"Unknown mode '{value}'. Use 'llm' or 'direct'.")
+    return value
+
+
+def _seconds(name: str, value, default: float) -> Optional[float]:
+    """Validate a duration sent by the client, falling back to ``default`` (None: no limit)"""
+    if value is None or value == "":
+        value = default
+    try:
+        seconds = float(value)
+    except (TypeError, ValueError):
+        seconds = float("nan")
+    if not math.isfinite(seconds) or seconds < 0:
+        raise HTTPException(status_code=400, detail=f"Invalid {name} '{value}'. Use a number of seconds.")
+    return seconds or None
+
+
+def request_deadline(value) -> Optional[float]:
+    """Seconds a request may take: its own ``deadline``, else the default (None: no limit)"""
+    return _seconds("deadline", value, INVOCATION_DEADLINE)
+
+
+def absolute_deadline(deadline: Optional[float]) -> Optional[float]:
+    """The ``time.monotonic()`` instant a deadline expires, taken at admission so queueing counts"""
+    return time.monotonic() + deadline if deadline else None
+
+
+def time_left(deadline_at: Optional[float]) -> Optional[float]:
+    """
+    Seconds left before an absolute deadline, None without one.
+
+    Raises:
+        TimeoutError: When the deadline passed before the work started (e.g. while queued)
+    """
+    if deadline_at is None:
+        return None
+    left = deadline_at - time.monotonic()
+    if left <= 0:
+        raise TimeoutError("the request deadline passed while queued")
+    return left
+
+
+def wait_timeout(value, deadline: Optional[float]) -> Optional[float]:
+    """Seconds a caller waits for its answer: its ``timeout``, capped by the deadline"""
+    limits = [limit for limit in (_seconds("timeout", value, INVOCATION_TIMEOUT), deadline) if limit]
+    return min(limits) if limits else None
+
+
+def _check_kb_id():
+    from ..agents.s3 import get_knowledge_base_id
+
+    return get_knowledge_base_id()
+
+
+def _check_github_mcp():
+    from ..agents.github import github_mcp_pool
+
+    return github_mcp_pool.check()
+
+
+def _check_gitlab_mcp():
+    from ..agents.gitlab import gitlab_mcp_pool
+
+    return gitlab_mcp_pool.check()
+
+
+def _start_gitlab_catalog():
+    from ..agents.gitlab import start_gitlab_catalog
+
+    return start_gitlab_catalog()
+
+
+# Warm-up state of each dependency, reported by /ready
+readiness = Readiness()
+readiness.register("bedrock_model", get_bedrock_model, required="bedrock_model" in READY_REQUIRES)
+readiness.register("telemetry", lambda: setup_telemetry() is not None, required="telemetry" in READY_REQUIRES)
+readiness.register("kb_id", _check_kb_id, required="kb_id" in READY_REQUIRES)
+readiness.register("github_mcp", _check_github_mcp, required="github_mcp" in READY_REQUIRES)
+readiness.register("gitlab_mcp", _check_gitlab_mcp, required="gitlab_mcp" in READY_REQUIRES)
+readiness.register("gitlab_catalog", _start_gitlab_catalog, required="gitlab_catalog" in READY_REQUIRES)
+
+
+def warm_up():
+    """Load the agents and warm every dependency ahead of the first request"""
+    try:
+        from ..agents import orchestrator  # noqa: F401
+    except Exception as e:
+        print(f"Warm-up failed: {str(e)}")
+    readiness.warm_up()
+
+
+# Shared by every orchestrator so routing decisions are counted in one place
+router = create_router(ROUTER_MODE, ROUTER_THRESHOLD, ROUTER_EXAMPLES)
+
+# Shared so latency percentiles and the hedge budget cover every request
+hedger = (
+    Hedger(percentile=HEDGE_PERCENTILE, budget=HEDGE_BUDGET, min_samples=HEDGE_MIN_SAMPLES)
+    if HEDGE_PERCENTILE > 0 else None
+)
+
+# Shared so every request sees a failing source's circuit; the MCP readiness
+# checks double as recovery probes
+breaker = (
+    CircuitBreaker(
+        error_rate=BREAKER_ERROR_RATE,
+        latency_threshold=BREAKER_LATENCY,
+        window=BREAKER_WINDOW,
+        min_calls=BREAKER_MIN_CALLS,
+        open_seconds=BREAKER_OPEN_SECONDS,
+        probes={"github": _check_github_mcp, "gitlab": _check_gitlab_mcp},
+    )
+    if BREAKER_ERROR_RATE > 0 else None
+)
+
+# Sub-agent answers shared by every orchestrator, across sessions and users
+source_cache = create_source_cache(
+    SOURCE_CACHE_BACKEND, SOURCE_CACHE_TTLS, max_entries=SOURCE_CACHE_MAX_ENTRIES, path=SOURCE_CACHE_PATH
+)
+
+# Token budgets applied to sub-agent answers, with the tokens saved so far
+compactor = ResultCompactor(COMPACTION_BUDGETS, field_chars=COMPACTION_FIELD_CHARS)
+
+# One orchestrator per conversation; all of them share the Bedrock model client
+sessions = SessionPool(
+    factory=lambda session_id: new_orchestrator(
+        session_id=session_id,
+        max_history=SESSION_MAX_HISTORY,
+    ),
+    max_sessions=SESSION_MAX_SESSIONS,
+    ttl=SESSION_TTL,
+)
+
+# Blocking orchestrator calls run here, off the event loop
+executor = InvocationExecutor(
+    max_workers=INVOCATION_MAX_WORKERS,
+    max_queue=INVOCATION_MAX_QUEUE,
+    retry_after=INVOCATION_RETRY_AFTER,
+)
+
+# Per-client request/token budgets and the number of requests shed under load
+limiter = RateLimiter(requests_per_minute=RATE_LIMIT_RPM, tokens_per_minute=RATE_LIMIT_TPM)
+shed = 0
+
+# Answers to sessionless prompts, keyed on the normalized prompt
+response_cache = create_cache(CACHE_BACKEND, max_entries=CACHE_MAX_ENTRIES, ttl=CACHE_TTL, path=CACHE_PATH)
+
+
+def _create_semantic_cache():
+    # numpy is only loaded when the semantic cache is enabled
+    if SEMANTIC_CACHE == "off":
+        return None
+    if SEMANTIC_CACHE != "titan":
+        # The hashed "local" embedder matches different questions: tests only
+        raise ValueError(f"Unknown semantic cache embedder: {SEMANTIC_CACHE}. Use off or titan")
+    from ..core.semantic_cache import create_semantic_cache
+
+    return create_semantic_cache(
+        SEMANTIC_CACHE,
+        threshold=SEMANTIC_CACHE_THRESHOLD,
+        max_entries=SEMANTIC_CACHE_MAX_ENTRIES,
+        ttl=CACHE_TTL,
+        model_id=EMBEDDING_MODEL_ID,
+        region_name=EMBEDDING_REGION,
+    )
+
+
+# Answers to earlier prompts phrased differently, matched on their embeddings
+semantic_cache = _create_semantic_cache()
+
+# Identical sessionless prompts in flight share one orchestrator run
+inflight = SingleFlight()
+
+# Asynchronous jobs and the tasks driving the ones started by this worker
+jobs = create_job_store(JOB_STORE_BACKEND, ttl=JOB_TTL, path=JOB_STORE_PATH)
+job_tasks = set()
+
+# Number of SSE responses currently open
+active_streams = 0
+
+
+def api_client(http_request: Request) -> Optional[str]:
+    """Name of the configured API key sent by the caller, None for a missing or unknown key"""
+    api_key = http_request.headers.get("x-api-key") or http_request.headers.get("authorization", "")
+    api_key = api_key.removeprefix("Bearer ").strip()
+    if not api_key:
+        return None
+    for known_key, name in API_KEYS.items():
+        if hmac.compare_digest(api_key.encode(), known_key.encode()):
+            return name
+    return None
+
+
+def client_ip(http_request: Request) -> str:
+    """
+    Address of the caller as seen by the outermost trusted proxy.
+
+    Each proxy appends its peer to X-Forwarded-For, so only the last
+    ``TRUSTED_PROXY_HOPS`` entries were written by trusted hops; anything left
+    of them is set by the caller and ignored.
+    """
+    peer = http_request.client.host if http_request.client else "unknown"
+    if TRUSTED_PROXY_HOPS <= 0:
+        return peer
+    hops = [hop.strip() for hop in http_request.headers.get("x-forwarded-for", "").split(",") if hop.strip()]
+    return hops[-TRUSTED_PROXY_HOPS] if len(hops) >= TRUSTED_PROXY_HOPS else peer
+
+
+def client_id(http_request: Request) -> str:
+    """Identify the caller by a configured API key, otherwise by IP"""
+    name = api_client(http_request)
+    return f"key:{name}" if name else f"ip:{client_ip(http_request)}"
+
+
+def admit(http_request: Request, prompt: str, priority: str = "interactive"):
+    """
+    Admission control run before any agent work starts.
+
+    Batch-priority requests (the batch endpoint, and every request of the
+    API keys listed in ``BATCH_CLIENTS``) are shed while the executor is busy,
+    so interactive traffic keeps the capacity; then the caller's request and
+    token budgets are charged.
+
+    Raises:
+        HTTPException: 429 with Retry-After when shed or over budget
+    """
+    global shed
+    if api_client(http_request) in BATCH_CLIENTS:
+        priority = "batch"
+    if priority == "batch" and executor.utilization() >= BATCH_SHED_THRESHOLD:
+        shed += 1
+        raise HTTPException(
+            status_code=429,
+            detail="Server is under load; batch traffic is being shed. Please retry later.",
+            headers={"Retry-After": str(executor.retry_after)},
+        )
+
+    wait = limiter.check(client_id(http_request), estimate_tokens(prompt, ESTIMATED_OUTPUT_TOKENS))
+    if wait:
+        raise HTTPException(
+            status_code=429,
+            detail="Rate limit exceeded. Please retry later.",
+            headers={"Retry-After": str(math.ceil(wait))},
+        )
+
+
+async def invoke_agent(request: InvocationRequest, http_request: Request):
     """Route user prompts to the orchestrator agent"""
     try:
         user_message = request.input.get("prompt", "")
@@ -16,22 +367,424 @@ async def invoke_agent(request: InvocationRequest):
                 status_code=400,
                 detail="No prompt found in input. Please provide a 'prompt' key in the input."
             )
+        admit(http_request, user_message)
+        mode = fan_out_mode(request.input.get("mode"))
+        deadline = request_deadline(request.input.get("deadline"))
+
+        # Each caller may set its own wait limit, even when attached to a shared run;
+        # the deadline is the hard ceiling
+        timeout = wait_timeout(request.input.get("timeout"), deadline)
+        deadline_at = absolute_deadline(deadline)
+        missing = []
+        if request.session_id:
+            # Follow-ups depend on the conversation: no caching or coalescing
+            cached = None
+            result, missing = await asyncio.wait_for(
+                executor.run(_invoke, user_message, request.session_id, mode, deadline_at), timeout
+            )
+        else:
+            key = cache_key(user_message)
+            cached = await _cached_answer(key, user_message)
+            if cached:
+                result, cache_info = cached
+            else:
+                # Only identical requests share a run: same prompt, mode and deadline
+                flight = cache_key(user_message, mode or "", str(deadline))
+                result, missing = await inflight.do(
+                    flight, lambda: _invoke_and_cache(key, user_message, mode, deadline_at), timeout
+                )
 
-        # Use orchestrator to route to appropriate agent
-        result = orchestrator.invoke(user_message)
         response = {
             "message": result,
             "timestamp": datetime.now(timezone.utc).isoformat(),
             "model": "strands-orchestrator",
         }
+        if (response_cache is not None or semantic_cache is not None) and not request.session_id:
+            response["cache"] = cache_info if cached else {"hit": False}
+        if missing:
+            response["missing_sources"] = missing
 
         return InvocationResponse(output=response)
 
+    except HTTPException:
+        raise
+    except asyncio.TimeoutError:
+        raise HTTPException(status_code=504, detail="Agent processing timed out.")
+    except QueueFullError as e:
+        raise HTTPException(
+            status_code=503,
+            detail="Server is busy. Please retry later.",
+            headers={"Retry-After": str(e.retry_after)},
+        )
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Agent processing failed: {str(e)}")
 
 
+def _invoke(
+    user_message: str,
+    session_id: Optional[str] = None,
+    mode: Optional[str] = None,
+    deadline_at: Optional[float] = None,
+) -> Tuple[str, List[str]]:
+    """Run a query on the session's orchestrator, also returning the sources that missed the deadline (worker thread)"""
+    with sessions.acquire(session_id) as orchestrator:
+        result = _run_orchestrator(orchestrator, user_message, mode, deadline_at)
+        return result, list(orchestrator.missing_sources)
+
+
+def _run_orchestrator(orchestrator, user_message: str, mode: Optional[str], deadline_at: Optional[float]) -> str:
+    """Invoke an orchestrator with what is left of the request's deadline (worker thread)"""
+    return orchestrator.invoke(user_message, mode, time_left(deadline_at))
+
+
+async def _invoke_and_cache(
+    key: str, user_message: str, mode: Optional[str] = None, deadline_at: Optional[float] = None
+) -> Tuple[str, List[str]]:
+    """Run a sessionless query and cache a successful, complete answer"""
+    # Use orchestrator to route to appropriate agent
+    result, missing = await executor.run(_invoke, user_message, None, mode, deadline_at)
+    if not is_error_answer(result) and not missing:
+        await _cache_answer(key, user_message, result)
+    return result, missing
+
+
+async def _cached_answer(key: str, user_message: str) -> Optional[Tuple[str, Dict[str, Any]]]:
+    """Look a prompt up in the exact cache, then among similar earlier prompts"""
+    cached = response_cache.get(key) if response_cache is not None else None
+    if cached:
+        return cached[0], {"hit": True, "age_seconds": round(cached[1], 1)}
+    if semantic_cache is not None:
+        try:
+            # Embedding may call Bedrock: keep it off the event loop
+            similar = await asyncio.to_thread(semantic_cache.get, user_message)
+        except Exception as e:
+            print(f"Semantic cache lookup failed: {str(e)}")
+            similar = None
+        if similar:
+            result, similarity, age = similar
+            return result, {"hit": True, "age_seconds": round(age, 1), "similarity": round(similarity, 3)}
+    return None
+
+
+async def _cache_answer(key: str, user_message: str, result: str):
+    """Store an answer in the exact and semantic caches"""
+    if response_cache is not None:
+        response_cache.set(key, result)
+    if semantic_cache is not None:
+        try:
+            await asyncio.to_thread(semantic_cache.set, user_message, result)
+        except Exception as e:
+            print(f"Semantic cache update failed: {str(e)}")
+
+
+async def stream_agent(request: InvocationRequest, http_request: Request):
+    """Stream orchestrator output to the client as Server-Sent Events"""
+    user_message = request.input.get("prompt", "")
+    if not user_message:
+        raise HTTPException(
+            status_code=400,
+            detail="No prompt found in input. Please provide a 'prompt' key in the input."
+        )
+    admit(http_request, user_message)
+    mode = fan_out_mode(request.input.get("mode"))
+    deadline = request_deadline(request.input.get("deadline"))
+    if executor.utilization() >= 1:
+        raise HTTPException(
+            status_code=503,
+            detail="Server is busy. Please retry later.",
+            headers={"Retry-After": str(executor.retry_after)},
+        )
+
+    return StreamingResponse(
+        _sse_events(user_message, request.session_id, mode, deadline, http_request),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},
+    )
+
+
+async def _sse_events(
+    user_message: str,
+    session_id: Optional[str],
+    mode: Optional[str],
+    deadline: Optional[float],
+    http_request: Request,
+):
+    """
+    Format orchestrator chunks as SSE frames.
+
+    The run holds an executor slot, like a blocking invocation, so streams
+    share its capacity and backpressure. The client connection is watched
+    while waiting for each chunk: closing the orchestrator stream as soon as
+    the client goes away stops the underlying agent loop, so abandoned
+    requests stop spending model tokens.
+    """
+    global active_streams
+    try:
+        executor.reserve()
+    except QueueFullError:
+        yield f"event: error\ndata: {json.dumps({'error': 'Server is busy. Please retry later.'})}\n\n"
+        return
+    active_streams += 1
+    disconnected = asyncio.ensure_future(_wait_for_disconnect(http_request))
+    try:
+        with ExitStack() as stack:
+            # Building an orchestrator creates agents and clients: keep it off the loop
+            orchestrator = await asyncio.to_thread(
+                stack.enter_context, sessions.acquire(session_id, blocking=False)
+            )
+            stream = orchestrator.stream(user_message, mode, deadline)
+            chunk = None
+            try:
+                while True:
+                    chunk = asyncio.ensure_future(stream.__anext__())
+                    await asyncio.wait({chunk, disconnected}, return_when=asyncio.FIRST_COMPLETED)
+                    if not chunk.done():
+                        return
+                    try:
+                        data = chunk.result()
+                    except StopAsyncIteration:
+                        break
+                    yield f"data: {json.dumps({'data': data})}\n\n"
+                yield f"event: done\ndata: {json.dumps({'missing_sources': orchestrator.missing_sources})}\n\n"
+            finally:
+                if chunk is not None and not chunk.done():
+                    chunk.cancel()
+                    await asyncio.gather(chunk, return_exceptions=True)
+                await stream.aclose()
+    except SessionBusyError as e:
+        yield f"event: error\ndata: {json.dumps({'error': str(e)})}\n\n"
+    finally:
+        disconnected.cancel()
+        active_streams -= 1
+        executor.release()
+
+
+async def _wait_for_disconnect(http_request: Request, interval: float = 0.5):
+    """Return once the client has closed its connection"""
+    while not await http_request.is_disconnected():
+        await asyncio.sleep(interval)
+
+
+async def invoke_batch(request: BatchInvocationRequest, http_request: Request):
+    """Answer many prompts with bounded parallelism, streaming NDJSON per item"""
+    if not request.prompts or not all(request.prompts):
+        raise HTTPException(status_code=400, detail="Please provide a non-empty list of non-empty prompts.")
+    if len(request.prompts) > BATCH_MAX_ITEMS:
+        raise HTTPException(status_code=400, detail=f"A batch accepts at most {BATCH_MAX_ITEMS} prompts.")
+
+    # The first prompt is charged up front; the others wait for budget as they run
+    admit(http_request, request.prompts[0], priority="batch")
+
+    mode = fan_out_mode(request.mode)
+    deadline = request_deadline(request.deadline)
+    parallelism = min(request.max_parallel or BATCH_MAX_PARALLEL, BATCH_MAX_PARALLEL)
+    return StreamingResponse(
+        _batch_results(request.prompts, max(parallelism, 1), client_id(http_request), mode, deadline),
+        media_type="application/x-ndjson",
+    )
+
+
+async def _batch_results(
+    prompts, parallelism: int, client: str, mode: Optional[str] = None, deadline: Optional[float] = None
+):
+    """
+    Yield one JSON line per prompt as soon as it completes, then a summary.
+
+    All orchestrators of the batch share a SubQueryMemo, so identical
+    questions to the GitLab/GitHub/S3 sub-agents are answered once.
+    """
+    memo = SubQueryMemo()
+    semaphore = asyncio.Semaphore(parallelism)
+
+    async def run_item(index: int, prompt: str):
+        async with semaphore:
+            try:
+                if index > 0:
+                    await _wait_for_budget(client, prompt)
+                result, cached, missing = await _run_batch_item(prompt, memo, mode, deadline)
+                output = {
+                    "message": result,
+                    "timestamp": datetime.now(timezone.utc).isoformat(),
+                    "model": "strands-orchestrator",
+                    "cache": {"hit": cached},
+                }
+                if missing:
+                    output["missing_sources"] = missing
+                return {"index": index, "output": output}
+            except Exception as e:
+                return {"index": index, "error": f"Agent processing failed: {str(e)}"}
+
+    tasks = [asyncio.ensure_future(run_item(index, prompt)) for index, prompt in enumerate(prompts)]
+    try:
+        for next_done in asyncio.as_completed(tasks):
+            yield json.dumps(await next_done) + "\n"
+        yield json.dumps({"summary": {"items": len(prompts), **memo.stats()}}) + "\n"
+    finally:
+        for task in tasks:
+            task.cancel()
+
+
+async def _wait_for_budget(client: str, prompt: str):
+    """Throttle a batch item to the caller's rate limits instead of failing it"""
+    while True:
+        wait = limiter.check(client, estimate_tokens(prompt, ESTIMATED_OUTPUT_TOKENS))
+        if not wait:
+            return
+        await asyncio.sleep(wait)
+
+
+async def _run_batch_item(
+    user_message: str, memo: SubQueryMemo, mode: Optional[str] = None, deadline: Optional[float] = None
+):
+    """Answer one batch prompt, waiting for executor room instead of failing"""
+    key = cache_key(user_message)
+    cached = await _cached_answer(key, user_message)
+    if cached:
+        return cached[0], True, []
+
+    orchestrator = new_orchestrator(subquery_memo=memo)
+    deadline_at = absolute_deadline(deadline)
+    while True:
+        # Batch traffic yields to interactive requests while the executor is busy
+        if executor.utilization() >= BATCH_SHED_THRESHOLD:
+            await asyncio.sleep(executor.retry_after)
+            continue
+        try:
+            result = await executor.run(_run_orchestrator, orchestrator, user_message, mode, deadline_at)
+            break
+        except QueueFullError as e:
+            await asyncio.sleep(e.retry_after)
+    missing = list(orchestrator.missing_sources)
+    if not is_error_answer(result) and not missing:
+        await _cache_answer(key, user_message, result)
+    return result, False, missing
+
+
+async def submit_job(request: InvocationRequest, http_request: Request):
+    """Start a sessionless invocation in the background and return its job id"""
+    user_message = request.input.get("prompt", "")
+    if not user_message:
+        raise HTTPException(
+            status_code=400,
+            detail="No prompt found in input. Please provide a 'prompt' key in the input."
+        )
+    admit(http_request, user_message)
+    mode = fan_out_mode(request.input.get("mode"))
+    deadline = request_deadline(request.input.get("deadline"))
+
+    job = jobs.create(user_message)
+    try:
+        future = executor.submit(_run_job, job["job_id"], user_message, mode, absolute_deadline(deadline))
+    except QueueFullError as e:
+        jobs.update(job["job_id"], status="failed", error="Server is busy")
+        raise HTTPException(
+            status_code=503,
+            detail="Server is busy. Please retry later.",
+            headers={"Retry-After": str(e.retry_after)},
+        )
+    # Keep a reference so the future is not collected before it completes
+    job_tasks.add(future)
+    future.add_done_callback(job_tasks.discard)
+    return {"job_id": job["job_id"], "status": job["status"]}
+
+
+def _run_job(job_id: str, user_message: str, mode: Optional[str] = None, deadline_at: Optional[float] = None):
+    """Run a job on a fresh orchestrator, recording per-agent results (worker thread)"""
+    jobs.update(job_id, status="running")
+
+    def on_source_result(source: str, query: str, result: str):
+        jobs.add_partial(job_id, {
+            "source": source,
+            "query": query,
+            "result": result,
+            "timestamp": datetime.now(timezone.utc).isoformat(),
+        })
+
+    try:
+        orchestrator = new_orchestrator(on_source_result=on_source_result)
+        result = _run_orchestrator(orchestrator, user_message, mode, deadline_at)
+        if is_error_answer(result):
+            jobs.update(job_id, status="failed", error=result)
+            return
+        output = {
+            "message": result,
+            "timestamp": datetime.now(timezone.utc).isoformat(),
+            "model": "strands-orchestrator",
+        }
+        if orchestrator.missing_sources:
+            output["missing_sources"] = orchestrator.missing_sources
+        jobs.update(job_id, status="succeeded", output=output)
+    except Exception as e:
+        jobs.update(job_id, status="failed", error=str(e))
+
+
+async def get_job(job_id: str):
+    """Return the status, partial results and final output of a job"""
+    job = jobs.get(job_id)
+    if job is None:
+        raise HTTPException(status_code=404, detail=f"Job {job_id} not found or expired")
+    return JobResponse(**job)
+
+
+async def job_events(job_id: str, http_request: Request):
+    """Stream job updates as Server-Sent Events until the job finishes"""
+    if jobs.get(job_id) is None:
+        raise HTTPException(status_code=404, detail=f"Job {job_id} not found or expired")
+
+    async def events():
+        last_update = None
+        while not await http_request.is_disconnected():
+            job = jobs.get(job_id)
+            if job is None:
+                yield f"event: error\ndata: {json.dumps({'error': 'Job expired'})}\n\n"
+                return
+            if job["updated_at"] != last_update:
+                last_update = job["updated_at"]
+                yield f"data: {JobResponse(**job).model_dump_json()}\n\n"
+            if job["status"] in TERMINAL_STATUSES:
+                yield "event: done\ndata: {}\n\n"
+                return
+            await asyncio.sleep(1)
+
+    return StreamingResponse(
+        events(),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},
+    )
+
+
 async def ping():
     """Health check endpoint"""
     return {"status": "healthy"}
 
+
+async def ready():
+    """Readiness probe: 200 once every required dependency is warm, 503 before"""
+    # Probes keep failed dependencies (e.g. an image still pulling) being retried,
+    # and ready ones re-checked once their last check is older than READY_TTL
+    readiness.recheck(ready_ttl=READY_TTL)
+    report = readiness.report()
+    return JSONResponse(status_code=200 if report["ready"] else 503, content=report)
+
+
+async def metrics():
+    """Runtime metrics used to size containers"""
+    return {
+        "executor": executor.stats(),
+        "active_streams": active_streams,
+        "sessions": sessions.stats(),
+        "response_cache": response_cache.stats() if response_cache is not None else None,
+        "semantic_cache": semantic_cache.stats() if semantic_cache is not None else None,
+        "coalescing": inflight.stats(),
+        "jobs": jobs.stats(),
+        "rate_limits": {**limiter.stats(), "shed": shed},
+        "routing": router.stats() if router is not None else None,
+        "hedging": hedger.stats() if hedger is not None else None,
+        "circuit_breakers": breaker.stats() if breaker is not None else None,
+        "mcp_pools": pool_stats(),
+        "gitlab_catalog": gitlab_catalog_stats(),
+        "source_cache": source_cache.stats() if source_cache is not None else None,
+        "compaction": compactor.stats(),
+        "model_usage": usage.stats(),
+        "models": model_stats(),
+    }
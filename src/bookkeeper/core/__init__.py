@@ -1,6 +1,23 @@
 """Core configuration and utilities"""
 
-from .config import bedrock_model, litellm_bedrock_model, strands_telemetry
+from . import config
+from .config import get_bedrock_model, get_litellm_bedrock_model, get_model, setup_telemetry
 
-__all__ = ["bedrock_model", "litellm_bedrock_model", "strands_telemetry"]
+__all__ = [
+    "bedrock_model",
+    "litellm_bedrock_model",
+    "strands_telemetry",
+    "get_bedrock_model",
+    "get_litellm_bedrock_model",
+    "get_model",
+    "setup_telemetry",
+]
 
+# Former module-level instances, now built on first access
+_LAZY = ("bedrock_model", "litellm_bedrock_model", "strands_telemetry")
+
+
+def __getattr__(name):
+    if name in _LAZY:
+        return getattr(config, name)
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
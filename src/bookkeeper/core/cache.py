@@ -0,0 +1,228 @@
+"""
+Response caches with TTL expiry and size-bounded LRU eviction.
+
+Backends share a small get/set interface so the in-process cache can be
+swapped for the SQLite one, which several uvicorn workers on the same host
+can share through a single file.
+"""
+
+import hashlib
+import json
+import re
+import sqlite3
+import threading
+import time
+import unicodedata
+from abc import ABC, abstractmethod
+from collections import OrderedDict
+from typing import Any, Dict, Optional, Tuple
+
+
+def normalize_prompt(prompt: str) -> str:
+    """
+    Normalize a prompt so trivially different spellings share a cache entry.
+
+    Args:
+        prompt: The raw user prompt
+
+    Returns:
+        The prompt case-folded, with whitespace collapsed and trailing
+        punctuation removed
+    """
+    text = unicodedata.normalize("NFKC", prompt).casefold()
+    text = re.sub(r"\s+", " ", text).strip()
+    return text.rstrip(" ?!.")
+
+
+def cache_key(*parts: str) -> str:
+    """Build a fixed-length cache key from normalized parts"""
+    joined = "\x1f".join(normalize_prompt(part) for part in parts)
+    return hashlib.sha256(joined.encode("utf-8")).hexdigest()
+
+
+class CacheBackend(ABC):
+    """Interface shared by the cache backends"""
+
+    def __init__(self, max_entries: int = 1024, ttl: float = 3600):
+        self.max_entries = max_entries
+        self.ttl = ttl
+        self.hits = 0
+        self.misses = 0
+
+    @abstractmethod
+    def get(self, key: str) -> Optional[Tuple[Any, float]]:
+        """
+        Look up a key.
+
+        Returns:
+            ``(value, age_seconds)`` or None when missing or expired
+        """
+
+    @abstractmethod
+    def set(self, key: str, value: Any, ttl: Optional[float] = None):
+        """Store a JSON-serializable value, optionally overriding the TTL"""
+
+    @abstractmethod
+    def delete(self, key: str):
+        """Remove a key if present"""
+
+    @abstractmethod
+    def clear(self):
+        """Remove every entry"""
+
+    @abstractmethod
+    def __len__(self) -> int:
+        """Number of live entries"""
+
+    def _record(self, hit: bool):
+        if hit:
+            self.hits += 1
+        else:
+            self.misses += 1
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "backend": type(self).__name__,
+            "entries": len(self),
+            "max_entries": self.max_entries,
+            "hits": self.hits,
+            "misses": self.misses,
+        }
+
+
+class InMemoryCache(CacheBackend):
+    """Per-process LRU cache"""
+
+    def __init__(self, max_entries: int = 1024, ttl: float = 3600):
+        super().__init__(max_entries, ttl)
+        self._entries: "OrderedDict[str, Tuple[Any, float, float]]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key: str) -> Optional[Tuple[Any, float]]:
+        now = time.time()
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None and entry[2] <= now:
+                del self._entries[key]
+                entry = None
+            self._record(entry is not None)
+            if entry is None:
+                return None
+            self._entries.move_to_end(key)
+            value, stored_at, _ = entry
+            return value, now - stored_at
+
+    def set(self, key: str, value: Any, ttl: Optional[float] = None):
+        now = time.time()
+        with self._lock:
+            self._entries[key] = (value, now, now + (self.ttl if ttl is None else ttl))
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+    def delete(self, key: str):
+        with self._lock:
+            self._entries.pop(key, None)
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+
+class SQLiteCache(CacheBackend):
+    """LRU cache stored in a SQLite file, shareable across worker processes"""
+
+    def __init__(self, path: str, max_entries: int = 1024, ttl: float = 3600, table: str = "cache"):
+        super().__init__(max_entries, ttl)
+        if not table.isidentifier():
+            raise ValueError(f"Invalid cache table name: {table}")
+        self.path = path
+        self.table = table
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(path, check_same_thread=False, timeout=5)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute(
+            f"CREATE TABLE IF NOT EXISTS {table} ("
+            " key TEXT PRIMARY KEY, value TEXT NOT NULL,"
+            " stored_at REAL NOT NULL, expires_at REAL NOT NULL, accessed_at REAL NOT NULL)"
+        )
+        self._conn.execute(f"CREATE INDEX IF NOT EXISTS {table}_accessed ON {table} (accessed_at)")
+        self._conn.commit()
+
+    def get(self, key: str) -> Optional[Tuple[Any, float]]:
+        now = time.time()
+        with self._lock:
+            row = self._conn.execute(
+                f"SELECT value, stored_at FROM {self.table} WHERE key = ? AND expires_at > ?", (key, now)
+            ).fetchone()
+            self._record(row is not None)
+            if row is None:
+                return None
+            self._conn.execute(f"UPDATE {self.table} SET accessed_at = ? WHERE key = ?", (now, key))
+            self._conn.commit()
+        return json.loads(row[0]), now - row[1]
+
+    def set(self, key: str, value: Any, ttl: Optional[float] = None):
+        now = time.time()
+        expires_at = now + (self.ttl if ttl is None else ttl)
+        with self._lock:
+            self._conn.execute(
+                f"INSERT OR REPLACE INTO {self.table} (key, value, stored_at, expires_at, accessed_at)"
+                " VALUES (?, ?, ?, ?, ?)",
+                (key, json.dumps(value), now, expires_at, now),
+            )
+            self._conn.execute(f"DELETE FROM {self.table} WHERE expires_at <= ?", (now,))
+            self._conn.execute(
+                f"DELETE FROM {self.table} WHERE key IN ("
+                f" SELECT key FROM {self.table} ORDER BY accessed_at DESC LIMIT -1 OFFSET ?)",
+                (self.max_entries,),
+            )
+            self._conn.commit()
+
+    def delete(self, key: str):
+        with self._lock:
+            self._conn.execute(f"DELETE FROM {self.table} WHERE key = ?", (key,))
+            self._conn.commit()
+
+    def clear(self):
+        with self._lock:
+            self._conn.execute(f"DELETE FROM {self.table}")
+            self._conn.commit()
+
+    def __len__(self) -> int:
+        with self._lock:
+            return self._conn.execute(f"SELECT COUNT(*) FROM {self.table}").fetchone()[0]
+
+
+def create_cache(
+    backend: str,
+    max_entries: int = 1024,
+    ttl: float = 3600,
+    path: Optional[str] = None,
+    table: str = "cache",
+):
+    """
+    Build a cache backend by name.
+
+    Args:
+        backend: ``memory``, ``sqlite`` or ``none``
+        max_entries: Maximum number of entries kept
+        ttl: Default entry lifetime in seconds
+        path: SQLite file, required for the ``sqlite`` backend
+        table: SQLite table, letting several caches share one file
+
+    Returns:
+        A CacheBackend, or None when caching is disabled
+    """
+    if backend == "none":
+        return None
+    if backend == "memory":
+        return InMemoryCache(max_entries=max_entries, ttl=ttl)
+    if backend == "sqlite":
+        if not path:
+            raise ValueError("A path is required for the sqlite cache backend")
+        return SQLiteCache(path, max_entries=max_entries, ttl=ttl, table=table)
+    raise ValueError(f"Unknown cache backend: {backend}")
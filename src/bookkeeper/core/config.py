@@ -1,36 +1,318 @@
+"""
+Model, telemetry and service configuration.
+
+Settings are plain module constants read from the environment. Model
+clients and the telemetry exporter are expensive to build, so they are lazy
+singletons created on first use (the API builds them at startup), keeping
+imports fast.
+"""
+
 import os
 import base64
+import threading
 import dotenv
-from strands.telemetry import StrandsTelemetry
-from strands.models.litellm import LiteLLMModel
-from strands.models import BedrockModel
-import boto3
 
 dotenv.load_dotenv()
 
-# Langfuse Setup
-LANGFUSE_AUTH = base64.b64encode(
-    f"{os.environ.get('LANGFUSE_PUBLIC_KEY')}:{os.environ.get('LANGFUSE_SECRET_KEY')}".encode()
-).decode()
-
-os.environ["OTEL_EXPORTER_OTLP_ENDPOINT"] = os.environ.get("LANGFUSE_HOST") + "/api/public/otel"
-os.environ["OTEL_EXPORTER_OTLP_HEADERS"] = f"Authorization=Basic {LANGFUSE_AUTH}"
-
-# Telemetry
-strands_telemetry = StrandsTelemetry().setup_otlp_exporter()
-
-# Models
-litellm_bedrock_model = LiteLLMModel(
-    client_args={
-        "api_key": "sk-IBxM7eyXftfGqZyuMREEaw",
-        "api_base": "https://d3mgibprdimq9c.cloudfront.net/",
-        "use_litellm_proxy": True
-    },
-    model_id="eu.anthropic.claude-3-5-sonnet-20240620-v1:0"
-)
+_lock = threading.RLock()
+_instances = {}
+
+
+def _singleton(name, factory):
+    """Build an object once per process, even with concurrent first callers"""
+    instance = _instances.get(name)
+    if instance is None:
+        with _lock:
+            instance = _instances.get(name)
+            if instance is None:
+                instance = _instances[name] = factory()
+    return instance
+
+
+def _build_telemetry():
+    from strands.telemetry import StrandsTelemetry
+
+    # Langfuse Setup
+    LANGFUSE_AUTH = base64.b64encode(
+        f"{os.environ.get('LANGFUSE_PUBLIC_KEY')}:{os.environ.get('LANGFUSE_SECRET_KEY')}".encode()
+    ).decode()
+
+    os.environ["OTEL_EXPORTER_OTLP_ENDPOINT"] = os.environ.get("LANGFUSE_HOST") + "/api/public/otel"
+    os.environ["OTEL_EXPORTER_OTLP_HEADERS"] = f"Authorization=Basic {LANGFUSE_AUTH}"
+
+    return StrandsTelemetry().setup_otlp_exporter()
+
+
+def setup_telemetry():
+    """Install the Langfuse OTLP exporter (once); a no-op when LANGFUSE_HOST is unset"""
+    if not os.environ.get("LANGFUSE_HOST"):
+        return None
+    return _singleton("strands_telemetry", _build_telemetry)
+
+
+def _build_litellm_bedrock_model():
+    from strands.models.litellm import LiteLLMModel
+
+    return LiteLLMModel(
+        client_args={
+            "api_key": LITELLM_API_KEY,
+            "api_base": LITELLM_API_BASE,
+            "use_litellm_proxy": True
+        },
+        model_id=LITELLM_MODEL_ID
+    )
+
+
+def get_litellm_bedrock_model():
+    """Return the shared LiteLLM proxy model"""
+    return _singleton("litellm_bedrock_model", _build_litellm_bedrock_model)
+
+
+def prompt_cache_config():
+    """BedrockModel arguments adding prompt-cache checkpoints after the system prompt, tools and messages"""
+    if PROMPT_CACHE in ("", "off"):
+        return {}
+    from strands.models import CacheConfig
+
+    ttl = None if PROMPT_CACHE == "default" else PROMPT_CACHE
+    return {"cache_config": CacheConfig(strategy="auto", ttl=ttl, system_prompt_ttl=True, tools_ttl=True)}
+
+
+def _build_bedrock_model(model_id):
+    from strands.models import BedrockModel
+
+    return BedrockModel(
+        model_id=model_id,
+        region_name=MODEL_REGION,
+        **prompt_cache_config(),
+    )
+
+
+def _build_agent_model(agent):
+    model_id = AGENT_MODEL_IDS[agent]
+    # Agents on the same model id share one client
+    primary = _singleton(f"bedrock_model:{model_id}", lambda: _build_bedrock_model(model_id))
+    if MODEL_FALLBACK != "litellm":
+        return primary
+
+    from .fallback import FallbackModel
+
+    return FallbackModel(
+        primary,
+        get_litellm_bedrock_model(),
+        latency_slo=MODEL_LATENCY_SLO,
+        cooldown=MODEL_FALLBACK_COOLDOWN,
+        name=agent,
+    )
+
+
+def get_model(agent):
+    """
+    Return the shared model of an agent.
+
+    Args:
+        agent: orchestrator, synthesis, gitlab, github or s3
+
+    Returns:
+        The agent's Bedrock model, wrapped in a FallbackModel when a
+        fallback is configured
+    """
+    return _singleton(f"agent_model:{agent}", lambda: _build_agent_model(agent))
 
-bedrock_model = BedrockModel(
-    model_id="us.anthropic.claude-sonnet-4-20250514-v1:0",
-    region_name='us-east-1'
+
+def get_bedrock_model():
+    """Return the shared orchestrator model"""
+    return get_model("orchestrator")
+
+
+def model_stats():
+    """Return the model id of each agent built so far, with its fallback counters"""
+    stats = {}
+    for agent in AGENT_MODEL_IDS:
+        model = _instances.get(f"agent_model:{agent}")
+        if model is not None:
+            stats[agent] = {"model_id": AGENT_MODEL_IDS[agent]}
+            if hasattr(model, "stats"):
+                stats[agent]["fallback"] = model.stats()
+    return stats
+
+
+def __getattr__(name):
+    # Backwards compatible access to the former module-level instances
+    if name == "bedrock_model":
+        return get_bedrock_model()
+    if name == "litellm_bedrock_model":
+        return get_litellm_bedrock_model()
+    if name == "strands_telemetry":
+        return setup_telemetry()
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+
+
+# Invocation executor
+INVOCATION_MAX_WORKERS = int(os.getenv("BOOKKEEPER_MAX_WORKERS", "4"))
+INVOCATION_MAX_QUEUE = int(os.getenv("BOOKKEEPER_MAX_QUEUE", "16"))
+INVOCATION_RETRY_AFTER = int(os.getenv("BOOKKEEPER_RETRY_AFTER", "5"))
+
+# Orchestrator sessions
+SESSION_MAX_SESSIONS = int(os.getenv("BOOKKEEPER_MAX_SESSIONS", "256"))
+SESSION_TTL = int(os.getenv("BOOKKEEPER_SESSION_TTL", "1800"))
+SESSION_MAX_HISTORY = int(os.getenv("BOOKKEEPER_MAX_HISTORY", "20"))
+
+# Response cache
+CACHE_BACKEND = os.getenv("BOOKKEEPER_CACHE_BACKEND", "memory")
+CACHE_TTL = int(os.getenv("BOOKKEEPER_CACHE_TTL", "3600"))
+CACHE_MAX_ENTRIES = int(os.getenv("BOOKKEEPER_CACHE_MAX_ENTRIES", "1024"))
+CACHE_PATH = os.getenv("BOOKKEEPER_CACHE_PATH", "/tmp/bookkeeper-cache.sqlite")
+
+# Seconds a caller waits for an invocation before giving up (0 disables)
+INVOCATION_TIMEOUT = float(os.getenv("BOOKKEEPER_INVOCATION_TIMEOUT", "0"))
+
+# Asynchronous jobs
+JOB_STORE_BACKEND = os.getenv("BOOKKEEPER_JOB_STORE", "memory")
+JOB_TTL = int(os.getenv("BOOKKEEPER_JOB_TTL", "86400"))
+JOB_STORE_PATH = os.getenv("BOOKKEEPER_JOB_STORE_PATH", "/tmp/bookkeeper-jobs.sqlite")
+
+# Batch invocations
+BATCH_MAX_ITEMS = int(os.getenv("BOOKKEEPER_BATCH_MAX_ITEMS", "500"))
+BATCH_MAX_PARALLEL = int(os.getenv("BOOKKEEPER_BATCH_MAX_PARALLEL", "2"))
+
+# Per-client rate limits (0 disables) and load shedding
+RATE_LIMIT_RPM = int(os.getenv("BOOKKEEPER_RATE_LIMIT_RPM", "60"))
+RATE_LIMIT_TPM = int(os.getenv("BOOKKEEPER_RATE_LIMIT_TPM", "400000"))
+ESTIMATED_OUTPUT_TOKENS = int(os.getenv("BOOKKEEPER_ESTIMATED_OUTPUT_TOKENS", "4000"))
+# Executor utilization (0-1) above which batch-priority traffic is shed
+BATCH_SHED_THRESHOLD = float(os.getenv("BOOKKEEPER_BATCH_SHED_THRESHOLD", "0.5"))
+# Client identity for rate limits: API keys as comma-separated name=key pairs
+# (unknown keys are ignored), names of the keys whose traffic is always batch
+# priority, and the number of reverse proxies in front of the service whose
+# X-Forwarded-For entries are trusted (0: use the socket peer address)
+API_KEYS = {
+    key.strip(): name.strip()
+    for name, _, key in (pair.partition("=") for pair in os.getenv("BOOKKEEPER_API_KEYS", "").split(","))
+    if key.strip()
+}
+BATCH_CLIENTS = {name.strip() for name in os.getenv("BOOKKEEPER_BATCH_CLIENTS", "").split(",") if name.strip()}
+TRUSTED_PROXY_HOPS = int(os.getenv("BOOKKEEPER_TRUSTED_PROXY_HOPS", "0"))
+
+# Dependencies that must be warm before /ready reports the replica as ready
+READY_REQUIRES = [
+    name.strip()
+    for name in os.getenv("BOOKKEEPER_READY_REQUIRES", "bedrock_model,kb_id,github_mcp,gitlab_mcp").split(",")
+    if name.strip()
+]
+# Seconds a passed readiness check is trusted before /ready runs it again (0: never)
+READY_TTL = float(os.getenv("BOOKKEEPER_READY_TTL", "60"))
+
+# Default fan-out mode: "llm" (model picks the sub-agents) or "direct" (all at once)
+FANOUT_MODE = os.getenv("BOOKKEEPER_FANOUT_MODE", "llm")
+
+# Local query router skipping irrelevant sub-agents: off, keywords or centroid
+ROUTER_MODE = os.getenv("BOOKKEEPER_ROUTER", "off")
+ROUTER_THRESHOLD = float(os.getenv("BOOKKEEPER_ROUTER_THRESHOLD", "0.6"))
+ROUTER_EXAMPLES = os.getenv("BOOKKEEPER_ROUTER_EXAMPLES", "")
+
+# Default per-request deadline in seconds (0 = none); sub-agents missing their
+# slice are left out of the answer. The synthesis share is kept for the answer.
+INVOCATION_DEADLINE = float(os.getenv("BOOKKEEPER_DEADLINE", "0"))
+DEADLINE_SYNTHESIS_SHARE = float(os.getenv("BOOKKEEPER_DEADLINE_SYNTHESIS_SHARE", "0.3"))
+
+# Hedged sub-agent calls (percentile 0 disables): a call slower than this
+# percentile of its source's recent latencies is duplicated, within a budget
+# of extra calls per call (at most 1, so load never more than doubles)
+HEDGE_PERCENTILE = float(os.getenv("BOOKKEEPER_HEDGE_PERCENTILE", "0"))
+HEDGE_BUDGET = float(os.getenv("BOOKKEEPER_HEDGE_BUDGET", "0.1"))
+HEDGE_MIN_SAMPLES = int(os.getenv("BOOKKEEPER_HEDGE_MIN_SAMPLES", "20"))
+
+# Sub-agent result cache keyed by (source, normalized query), with per-source
+# TTLs in seconds (0 disables a source): documents change rarely, repos often
+SOURCE_CACHE_BACKEND = os.getenv("BOOKKEEPER_SOURCE_CACHE_BACKEND", "memory")
+SOURCE_CACHE_MAX_ENTRIES = int(os.getenv("BOOKKEEPER_SOURCE_CACHE_MAX_ENTRIES", "512"))
+SOURCE_CACHE_PATH = os.getenv("BOOKKEEPER_SOURCE_CACHE_PATH", "/tmp/bookkeeper-source-cache.sqlite")
+SOURCE_CACHE_TTLS = {
+    "gitlab": float(os.getenv("BOOKKEEPER_SOURCE_CACHE_TTL_GITLAB", "900")),
+    "github": float(os.getenv("BOOKKEEPER_SOURCE_CACHE_TTL_GITHUB", "900")),
+    "s3": float(os.getenv("BOOKKEEPER_SOURCE_CACHE_TTL_S3", "86400")),
+}
+
+# Semantic cache matching paraphrased prompts: off or titan
+SEMANTIC_CACHE = os.getenv("BOOKKEEPER_SEMANTIC_CACHE", "off")
+SEMANTIC_CACHE_THRESHOLD = float(os.getenv("BOOKKEEPER_SEMANTIC_CACHE_THRESHOLD", "0.9"))
+SEMANTIC_CACHE_MAX_ENTRIES = int(os.getenv("BOOKKEEPER_SEMANTIC_CACHE_MAX_ENTRIES", "2048"))
+EMBEDDING_MODEL_ID = os.getenv("BOOKKEEPER_EMBEDDING_MODEL", "amazon.titan-embed-text-v2:0")
+EMBEDDING_REGION = os.getenv("BOOKKEEPER_EMBEDDING_REGION", "us-east-1")
+
+# Projects and documents sent to the direct-mode synthesis after the local
+# merge and ranking of the sub-agent JSON (0 sends the raw answers)
+SYNTHESIS_TOP_K = int(os.getenv("BOOKKEEPER_SYNTHESIS_TOP_K", "10"))
+
+# Token budget of each sub-agent answer before it reaches the orchestrator
+# model (0 passes a source's answers unchanged), and characters kept per field
+COMPACTION_BUDGETS = {
+    "gitlab": int(os.getenv("BOOKKEEPER_COMPACTION_BUDGET_GITLAB", "2000")),
+    "github": int(os.getenv("BOOKKEEPER_COMPACTION_BUDGET_GITHUB", "2000")),
+    "s3": int(os.getenv("BOOKKEEPER_COMPACTION_BUDGET_S3", "3000")),
+}
+COMPACTION_FIELD_CHARS = int(os.getenv("BOOKKEEPER_COMPACTION_FIELD_CHARS", "300"))
+
+# Bedrock prompt caching of system prompts, tool specs and conversations:
+# "default" (Bedrock's TTL), a TTL such as "1h", or "off"
+PROMPT_CACHE = os.getenv("BOOKKEEPER_PROMPT_CACHE", "default")
+
+# Models: one Bedrock model id per agent. Sub-agents mostly call tools and
+# can run on a faster model than the orchestrator and the synthesis.
+MODEL_REGION = os.getenv("BOOKKEEPER_MODEL_REGION", "us-east-1")
+MODEL_ID = os.getenv("BOOKKEEPER_MODEL_ID", "us.anthropic.claude-sonnet-4-20250514-v1:0")
+SUBAGENT_MODEL_ID = os.getenv("BOOKKEEPER_SUBAGENT_MODEL_ID", MODEL_ID)
+AGENT_MODEL_IDS = {
+    "orchestrator": os.getenv("BOOKKEEPER_MODEL_ID_ORCHESTRATOR", MODEL_ID),
+    "synthesis": os.getenv("BOOKKEEPER_MODEL_ID_SYNTHESIS", MODEL_ID),
+    "gitlab": os.getenv("BOOKKEEPER_MODEL_ID_GITLAB", SUBAGENT_MODEL_ID),
+    "github": os.getenv("BOOKKEEPER_MODEL_ID_GITHUB", SUBAGENT_MODEL_ID),
+    "s3": os.getenv("BOOKKEEPER_MODEL_ID_S3", SUBAGENT_MODEL_ID),
+}
+
+# LiteLLM proxy, used as the fallback model
+LITELLM_API_KEY = os.getenv("LITELLM_API_KEY", "")
+LITELLM_API_BASE = os.getenv("LITELLM_API_BASE", "")
+LITELLM_MODEL_ID = os.getenv("LITELLM_MODEL_ID", "eu.anthropic.claude-3-5-sonnet-20240620-v1:0")
+
+# Fallback when a Bedrock model throttles or misses its latency SLO (seconds
+# to first token): "litellm" or "off" (the default without a LiteLLM proxy)
+MODEL_FALLBACK = os.getenv(
+    "BOOKKEEPER_MODEL_FALLBACK", "litellm" if LITELLM_API_KEY and LITELLM_API_BASE else "off"
 )
+MODEL_LATENCY_SLO = float(os.getenv("BOOKKEEPER_MODEL_LATENCY_SLO", "10"))
+MODEL_FALLBACK_COOLDOWN = float(os.getenv("BOOKKEEPER_MODEL_FALLBACK_COOLDOWN", "60"))
+
+# Circuit breakers: refuse calls to a sub-agent once this share of its recent
+# calls failed (0 disables), then probe its recovery after BREAKER_OPEN_SECONDS
+BREAKER_ERROR_RATE = float(os.getenv("BOOKKEEPER_BREAKER_ERROR_RATE", "0.5"))
+BREAKER_LATENCY = float(os.getenv("BOOKKEEPER_BREAKER_LATENCY", "0"))
+BREAKER_WINDOW = int(os.getenv("BOOKKEEPER_BREAKER_WINDOW", "20"))
+BREAKER_MIN_CALLS = int(os.getenv("BOOKKEEPER_BREAKER_MIN_CALLS", "5"))
+BREAKER_OPEN_SECONDS = float(os.getenv("BOOKKEEPER_BREAKER_OPEN_SECONDS", "30"))
+
+# MCP session pools: sessions kept open across queries (one query per session)
+GITHUB_MCP_POOL_SIZE = int(os.getenv("BOOKKEEPER_GITHUB_MCP_POOL_SIZE", "4"))
+MCP_HEALTH_INTERVAL = float(os.getenv("BOOKKEEPER_MCP_HEALTH_INTERVAL", "60"))
+MCP_ACQUIRE_TIMEOUT = float(os.getenv("BOOKKEEPER_MCP_ACQUIRE_TIMEOUT", "30"))
+
+# MCP tools given to the GitHub and GitLab agents: a profile ("read-only-search"
+# or "all"), or a comma-separated list of tool names/patterns overriding it
+GITHUB_TOOL_PROFILE = os.getenv("BOOKKEEPER_GITHUB_TOOL_PROFILE", "read-only-search")
+GITHUB_TOOLS = os.getenv("BOOKKEEPER_GITHUB_TOOLS", "")
+GITLAB_TOOL_PROFILE = os.getenv("BOOKKEEPER_GITLAB_TOOL_PROFILE", "read-only-search")
+GITLAB_TOOLS = os.getenv("BOOKKEEPER_GITLAB_TOOLS", "")
+
+# GitLab MCP server processes: API URL, processes kept running (concurrent
+# GitLab queries) and queries after which a process is replaced (0: never)
+GITLAB_API_URL = os.getenv("GITLAB_API_URL", "https://gitlab.revolve.team/api/v4")
+GITLAB_MCP_POOL_SIZE = int(os.getenv("BOOKKEEPER_GITLAB_MCP_POOL_SIZE", "2"))
+GITLAB_MCP_MAX_REQUESTS = int(os.getenv("BOOKKEEPER_GITLAB_MCP_MAX_REQUESTS", "100"))
 
+# Local GitLab project catalog searched by the GitLab agent before its MCP
+# tools: off, local (hashed words) or titan (Bedrock embeddings)
+GITLAB_CATALOG = os.getenv("BOOKKEEPER_GITLAB_CATALOG", "off")
+GITLAB_CATALOG_PATH = os.getenv("BOOKKEEPER_GITLAB_CATALOG_PATH", "/tmp/bookkeeper-gitlab-catalog.sqlite")
+GITLAB_CATALOG_SYNC_INTERVAL = float(os.getenv("BOOKKEEPER_GITLAB_CATALOG_SYNC_INTERVAL", "900"))
+GITLAB_CATALOG_README_CHARS = int(os.getenv("BOOKKEEPER_GITLAB_CATALOG_README_CHARS", "4000"))
@@ -0,0 +1,51 @@
+"""
+Lightweight text embeddings that need neither a model nor a network call.
+
+``hash_embedding`` maps words and word bigrams to a fixed-size vector with
+the hashing trick. It is a crude stand-in for a real embedding model, good
+enough to compare short queries to a handful of reference examples.
+"""
+
+import hashlib
+import math
+import re
+from typing import List, Sequence
+
+from .cache import normalize_prompt
+
+
+def tokenize(text: str) -> List[str]:
+    """Split normalized text into words"""
+    return re.findall(r"\w+", normalize_prompt(text))
+
+
+def hash_embedding(text: str, dim: int = 256) -> List[float]:
+    """
+    Embed text as an L2-normalized bag of hashed words and bigrams.
+
+    Args:
+        text: Text to embed
+        dim: Size of the vector
+
+    Returns:
+        The embedding (all zeros for text without words)
+    """
+    words = tokenize(text)
+    features = words + [f"{a} {b}" for a, b in zip(words, words[1:])]
+    vector = [0.0] * dim
+    for feature in features:
+        digest = hashlib.md5(feature.encode("utf-8")).digest()
+        index = int.from_bytes(digest[:4], "little") % dim
+        vector[index] += 1.0 if digest[4] & 1 else -1.0
+    return normalize(vector)
+
+
+def normalize(vector: Sequence[float]) -> List[float]:
+    """Scale a vector to unit length (zero vectors are returned unchanged)"""
+    norm = math.sqrt(sum(x * x for x in vector))
+    return [x / norm for x in vector] if norm else list(vector)
+
+
+def cosine(a: Sequence[float], b: Sequence[float]) -> float:
+    """Cosine similarity of two unit-length vectors"""
+    return sum(x * y for x, y in zip(a, b))
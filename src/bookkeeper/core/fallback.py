@@ -0,0 +1,117 @@
+"""
+Model wrapper falling back to an alternate model when the primary degrades.
+
+A call switches to the fallback when the primary throttles or does not
+produce its first event within the latency SLO. The primary is then skipped
+for a cooldown period, after which it is tried again. Once the primary has
+started answering, the call stays on it: a half-streamed answer cannot move
+to another model.
+"""
+
+import asyncio
+import threading
+import time
+from typing import Any, Dict
+
+from strands.models import Model
+from strands.types.exceptions import ModelThrottledException
+
+
+class FallbackModel(Model):
+    """
+    Route calls to ``primary``, or to ``fallback`` while the primary is degraded.
+
+    Args:
+        primary: The preferred model
+        fallback: The alternate model (e.g. the LiteLLM proxy)
+        latency_slo: Seconds to the primary's first event before falling back
+            (0 disables the SLO)
+        cooldown: Seconds the primary is skipped after a failure
+        name: Name used in logs and metrics
+    """
+
+    def __init__(self, primary: Model, fallback: Model, latency_slo: float = 10, cooldown: float = 60, name: str = ""):
+        self.primary = primary
+        self.fallback = fallback
+        self.latency_slo = latency_slo
+        self.cooldown = cooldown
+        self.name = name
+        self._lock = threading.Lock()
+        self._degraded_until = 0.0
+        self.primary_calls = 0
+        self.fallback_calls = 0
+        self.throttled = 0
+        self.slo_breaches = 0
+
+    def update_config(self, **model_config: Any) -> None:
+        self.primary.update_config(**model_config)
+
+    def get_config(self) -> Any:
+        return self.primary.get_config()
+
+    def _use_primary(self) -> bool:
+        with self._lock:
+            if time.monotonic() < self._degraded_until:
+                self.fallback_calls += 1
+                return False
+            self.primary_calls += 1
+            return True
+
+    def _degrade(self, reason: str):
+        with self._lock:
+            self._degraded_until = time.monotonic() + self.cooldown
+            self.fallback_calls += 1
+            if reason == "throttled":
+                self.throttled += 1
+            else:
+                self.slo_breaches += 1
+        print(f"Model {self.name or 'primary'} {reason}, falling back for {self.cooldown:.0f}s")
+
+    async def stream(self, messages, tool_specs=None, system_prompt=None, **kwargs):
+        if not self._use_primary():
+            async for event in self.fallback.stream(messages, tool_specs, system_prompt, **kwargs):
+                yield event
+            return
+
+        events = self.primary.stream(messages, tool_specs, system_prompt, **kwargs).__aiter__()
+        try:
+            first = await asyncio.wait_for(events.__anext__(), self.latency_slo or None)
+        except StopAsyncIteration:
+            return
+        except (ModelThrottledException, asyncio.TimeoutError) as e:
+            self._degrade("throttled" if isinstance(e, ModelThrottledException) else "exceeded its latency SLO")
+            try:
+                await events.aclose()
+            except Exception:
+                pass
+            async for event in self.fallback.stream(messages, tool_specs, system_prompt, **kwargs):
+                yield event
+            return
+
+        yield first
+        async for event in events:
+            yield event
+
+    async def structured_output(self, output_model, prompt, system_prompt=None, **kwargs):
+        model = self.primary if self._use_primary() else self.fallback
+        try:
+            async for event in model.structured_output(output_model, prompt, system_prompt, **kwargs):
+                yield event
+        except ModelThrottledException:
+            if model is self.fallback:
+                raise
+            self._degrade("throttled")
+            async for event in self.fallback.structured_output(output_model, prompt, system_prompt, **kwargs):
+                yield event
+
+    def stats(self) -> Dict[str, Any]:
+        """Return call counts and whether the primary is currently skipped"""
+        with self._lock:
+            return {
+                "primary_calls": self.primary_calls,
+                "fallback_calls": self.fallback_calls,
+                "throttled": self.throttled,
+                "slo_breaches": self.slo_breaches,
+                "degraded": time.monotonic() < self._degraded_until,
+            }
+
@@ -0,0 +1,126 @@
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Callable, Dict, Iterable, Optional
+
+
+class Readiness:
+    """
+    Warm-up state of the service's dependencies.
+
+    Each dependency registers a check: a callable that builds or contacts it
+    and raises on failure. A dependency is ``pending`` until its first check,
+    ``warming`` while a check runs, then ``ready`` or ``failed``; ones whose
+    check returns False are ``disabled`` (not configured). The service is ready
+    once every required dependency is ready, and stays so only while they pass
+    their periodic re-checks (see ``recheck()``).
+    """
+
+    def __init__(self):
+        self._checks: Dict[str, Callable[[], Any]] = {}
+        self._status: Dict[str, Dict[str, Any]] = {}
+        self._required = set()
+        self._rechecking = set()
+        self._lock = threading.Lock()
+
+    def register(self, name: str, check: Callable[[], Any], required: bool = True):
+        """
+        Register a dependency.
+
+        Args:
+            name: Dependency name reported by ``report()``
+            check: Callable warming up the dependency, raising on failure
+            required: Whether the service can only be ready once it is
+        """
+        with self._lock:
+            self._checks[name] = check
+            self._status[name] = {"state": "pending", "latency_ms": None, "error": None, "checked_at": None}
+            if required:
+                self._required.add(name)
+
+    def check(self, name: str, warming: bool = True) -> bool:
+        """
+        Run one dependency check, recording its state and latency.
+
+        Args:
+            name: Dependency to check
+            warming: Report the dependency as ``warming`` while the check
+                runs; re-checks of a ready dependency keep it ready instead
+        """
+        if warming:
+            with self._lock:
+                self._status[name]["state"] = "warming"
+        started = time.monotonic()
+        error: Optional[str] = None
+        state = "ready"
+        try:
+            if self._checks[name]() is False:
+                state = "disabled"
+        except Exception as e:
+            state, error = "failed", str(e)
+        with self._lock:
+            self._status[name] = {
+                "state": state,
+                "latency_ms": round(1000 * (time.monotonic() - started), 1),
+                "error": error,
+                "checked_at": time.time(),
+            }
+        return state == "ready"
+
+    def warm_up(self, names: Optional[Iterable[str]] = None):
+        """Run the checks concurrently so one slow dependency does not delay the others"""
+        names = list(names or self._checks)
+        with ThreadPoolExecutor(max_workers=max(len(names), 1), thread_name_prefix="warm-up") as pool:
+            list(pool.map(self.check, names))
+
+    def recheck(self, failed_interval: float = 30, ready_ttl: float = 60):
+        """
+        Re-run, in the background, the checks whose result is stale.
+
+        Failed dependencies are retried ``failed_interval`` seconds after
+        their last check. Ready ones are checked again once their result is
+        ``ready_ttl`` seconds old, so a dependency lost after warm-up (an MCP
+        server gone, expired credentials) takes the replica out of rotation;
+        they stay ready while the re-check runs.
+
+        Args:
+            failed_interval: Seconds between two checks of a failed dependency
+            ready_ttl: Seconds a passed check is trusted (0: never re-checked)
+        """
+        now = time.time()
+        with self._lock:
+            stale = [
+                (name, status["state"]) for name, status in self._status.items()
+                if name not in self._rechecking and (
+                    (status["state"] == "failed" and now - status["checked_at"] >= failed_interval)
+                    or (status["state"] == "ready" and ready_ttl and now - status["checked_at"] >= ready_ttl)
+                )
+            ]
+            for name, state in stale:
+                self._rechecking.add(name)
+                if state == "failed":
+                    self._status[name]["state"] = "warming"
+        for name, state in stale:
+            threading.Thread(
+                target=self._recheck, args=(name, state == "failed"), daemon=True, name=f"recheck-{name}"
+            ).start()
+
+    def _recheck(self, name: str, warming: bool):
+        try:
+            self.check(name, warming)
+        finally:
+            with self._lock:
+                self._rechecking.discard(name)
+
+    def is_ready(self) -> bool:
+        with self._lock:
+            return all(self._status[name]["state"] == "ready" for name in self._required)
+
+    def report(self) -> Dict[str, Any]:
+        """Return overall readiness and the state of each dependency"""
+        with self._lock:
+            dependencies = {
+                name: dict(status, required=name in self._required)
+                for name, status in self._status.items()
+            }
+        return {"ready": self.is_ready(), "dependencies": dependencies}
@@ -0,0 +1,200 @@
+"""
+Semantic response cache matching paraphrased prompts.
+
+Prompts are embedded with Titan on Bedrock and stored in a fixed-size
+matrix; a lookup is a single matrix-vector product over every live entry.
+The closest earlier prompt is a hit when its cosine similarity reaches the
+threshold.
+
+The ``local`` hashed bag of words is for tests only: it scores different
+questions sharing most of their words (0.8 and above) higher than real
+paraphrases (0.3), so it would serve wrong answers.
+"""
+
+import json
+import threading
+import time
+from collections import OrderedDict
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+import numpy as np
+
+from .cache import normalize_prompt
+from .embeddings import hash_embedding
+
+# Upper bounds of the similarity histogram buckets
+SIMILARITY_BUCKETS = (0.5, 0.6, 0.7, 0.8, 0.85, 0.9, 0.95, 1.0)
+
+
+class TitanEmbedder:
+    """Embed text with an Amazon Titan embedding model on Bedrock"""
+
+    def __init__(
+        self,
+        model_id: str = "amazon.titan-embed-text-v2:0",
+        region_name: str = "us-east-1",
+        dimensions: int = 512,
+    ):
+        self.model_id = model_id
+        self.region_name = region_name
+        self.dimensions = dimensions
+        self._client = None
+
+    def __call__(self, text: str) -> List[float]:
+        if self._client is None:
+            import boto3
+
+            self._client = boto3.client("bedrock-runtime", region_name=self.region_name)
+        response = self._client.invoke_model(
+            modelId=self.model_id,
+            body=json.dumps({"inputText": text, "dimensions": self.dimensions, "normalize": True}),
+        )
+        return json.loads(response["body"].read())["embedding"]
+
+
+class SemanticCache:
+    """
+    Bounded cache answering prompts similar to earlier ones.
+
+    Args:
+        embed: Function embedding a prompt
+        threshold: Minimum cosine similarity for a hit
+        max_entries: Maximum number of prompts kept (least recently used evicted)
+        ttl: Entry lifetime in seconds
+    """
+
+    def __init__(
+        self,
+        embed: Callable[[str], List[float]],
+        threshold: float = 0.9,
+        max_entries: int = 2048,
+        ttl: float = 3600,
+    ):
+        self.embed = embed
+        self.threshold = threshold
+        self.max_entries = max_entries
+        self.ttl = ttl
+        self._lock = threading.Lock()
+        # Allocated on the first embedding, once its dimension is known
+        self._vectors: Optional[np.ndarray] = None
+        self._expires_at = np.zeros(max_entries)
+        self._stored_at = np.zeros(max_entries)
+        self._used_at = np.zeros(max_entries)
+        self._values: List[Any] = [None] * max_entries
+        # Recent embeddings, so a miss followed by a store embeds once
+        self._recent: "OrderedDict[str, np.ndarray]" = OrderedDict()
+        self.hits = 0
+        self.misses = 0
+        self._histogram = [0] * len(SIMILARITY_BUCKETS)
+
+    def _vector(self, prompt: str) -> np.ndarray:
+        key = normalize_prompt(prompt)
+        with self._lock:
+            vector = self._recent.get(key)
+        if vector is None:
+            vector = np.asarray(self.embed(key), dtype=np.float32)
+            norm = np.linalg.norm(vector)
+            if norm:
+                vector = vector / norm
+            with self._lock:
+                self._recent[key] = vector
+                while len(self._recent) > 256:
+                    self._recent.popitem(last=False)
+        return vector
+
+    def get(self, prompt: str) -> Optional[Tuple[Any, float, float]]:
+        """
+        Find the answer to the most similar earlier prompt.
+
+        Args:
+            prompt: The user prompt
+
+        Returns:
+            ``(value, similarity, age_seconds)`` or None below the threshold
+        """
+        vector = self._vector(prompt)
+        now = time.time()
+        with self._lock:
+            best, similarity = None, 0.0
+            if self._vectors is not None:
+                scores = self._vectors @ vector
+                scores[self._expires_at <= now] = -1.0
+                best = int(np.argmax(scores))
+                similarity = float(scores[best])
+            bucket = int(np.searchsorted(SIMILARITY_BUCKETS, max(similarity, 0.0)))
+            self._histogram[min(bucket, len(SIMILARITY_BUCKETS) - 1)] += 1
+            if best is None or similarity < self.threshold:
+                self.misses += 1
+                return None
+            self.hits += 1
+            self._used_at[best] = now
+            return self._values[best], similarity, now - self._stored_at[best]
+
+    def set(self, prompt: str, value: Any):
+        """Store the answer to a prompt, evicting the least recently used entry when full"""
+        vector = self._vector(prompt)
+        now = time.time()
+        with self._lock:
+            if self._vectors is None:
+                self._vectors = np.zeros((self.max_entries, vector.shape[0]), dtype=np.float32)
+            live = self._expires_at > now
+            scores = np.where(live, self._vectors @ vector, -1.0)
+            if scores.max() >= 0.999:
+                # Same prompt stored again: refresh its entry
+                slot = int(np.argmax(scores))
+            else:
+                # Free (expired or never used) slots first, then the least recently used
+                slot = int(np.argmin(np.where(live, self._used_at, -1.0)))
+            self._vectors[slot] = vector
+            self._values[slot] = value
+            self._stored_at[slot] = self._used_at[slot] = now
+            self._expires_at[slot] = now + self.ttl
+
+    def __len__(self) -> int:
+        return int(np.count_nonzero(self._expires_at > time.time()))
+
+    def stats(self) -> Dict[str, Any]:
+        """Return hits, misses and the histogram of best similarities per lookup"""
+        with self._lock:
+            histogram = {f"<={bound}": count for bound, count in zip(SIMILARITY_BUCKETS, self._histogram)}
+            return {
+                "entries": len(self),
+                "max_entries": self.max_entries,
+                "threshold": self.threshold,
+                "hits": self.hits,
+                "misses": self.misses,
+                "similarity_histogram": histogram,
+            }
+
+
+def create_semantic_cache(
+    embedder: str,
+    threshold: float = 0.9,
+    max_entries: int = 2048,
+    ttl: float = 3600,
+    model_id: str = "amazon.titan-embed-text-v2:0",
+    region_name: str = "us-east-1",
+) -> Optional[SemanticCache]:
+    """
+    Build the semantic cache.
+
+    Args:
+        embedder: ``titan``, ``off`` or, in tests, ``local`` (hashed bag of words)
+        threshold: Minimum cosine similarity for a hit
+        max_entries: Maximum number of prompts kept
+        ttl: Entry lifetime in seconds
+        model_id: Titan embedding model
+        region_name: Region of the Titan model
+
+    Returns:
+        The cache, or None when disabled
+    """
+    if embedder == "off":
+        return None
+    if embedder == "titan":
+        embed = TitanEmbedder(model_id, region_name)
+    elif embedder == "local":
+        embed = hash_embedding
+    else:
+        raise ValueError(f"Unknown semantic cache embedder: {embedder}")
+    return SemanticCache(embed, threshold=threshold, max_entries=max_entries, ttl=ttl)
@@ -0,0 +1,74 @@
+import asyncio
+from typing import Any, Awaitable, Callable, Dict, Optional
+
+
+class SingleFlight:
+    """
+    Coalesce identical concurrent calls into one computation.
+
+    The first caller for a key starts the computation; callers arriving while
+    it runs attach to it and receive the same result. Every caller waits with
+    its own timeout, and a caller that times out or is cancelled only detaches
+    itself. The shared computation is cancelled once nobody is waiting on it.
+    """
+
+    def __init__(self):
+        self._calls: Dict[str, asyncio.Future] = {}
+        self._waiters: Dict[str, int] = {}
+        self.leaders = 0
+        self.coalesced = 0
+        self.abandoned = 0
+
+    async def do(
+        self,
+        key: str,
+        fn: Callable[[], Awaitable[Any]],
+        timeout: Optional[float] = None,
+    ) -> Any:
+        """
+        Run ``fn`` for ``key`` unless an identical call is already in flight.
+
+        Args:
+            key: Identity of the computation
+            fn: Coroutine function starting the computation
+            timeout: Seconds this caller is willing to wait, None for no limit
+
+        Returns:
+            The result of the shared computation
+
+        Raises:
+            asyncio.TimeoutError: If this caller's timeout expires first
+        """
+        call = self._calls.get(key)
+        if call is None or call.done():
+            call = asyncio.ensure_future(fn())
+            self._calls[key] = call
+            self._waiters[key] = 0
+            call.add_done_callback(lambda _: self._forget(key, call))
+            self.leaders += 1
+        else:
+            self.coalesced += 1
+
+        self._waiters[key] += 1
+        try:
+            return await asyncio.wait_for(asyncio.shield(call), timeout)
+        finally:
+            if self._calls.get(key) is call:
+                self._waiters[key] -= 1
+                if self._waiters[key] == 0 and not call.done():
+                    self.abandoned += 1
+                    call.cancel()
+
+    def _forget(self, key: str, call: asyncio.Future):
+        if self._calls.get(key) is call:
+            del self._calls[key]
+            del self._waiters[key]
+
+    def stats(self) -> Dict[str, Any]:
+        """Return leader/coalesced counters and the number of calls in flight"""
+        return {
+            "in_flight": len(self._calls),
+            "leaders": self.leaders,
+            "coalesced": self.coalesced,
+            "abandoned": self.abandoned,
+        }
@@ -0,0 +1,62 @@
+"""
+Model token usage per agent, including Bedrock prompt-cache reads and writes.
+
+Cache reads are input tokens served from a prompt-cache checkpoint (cheaper
+and faster to first token); cache writes are tokens stored at a checkpoint.
+"""
+
+import threading
+from typing import Any, Dict, Mapping
+
+USAGE_FIELDS = ("inputTokens", "outputTokens", "cacheReadInputTokens", "cacheWriteInputTokens")
+
+
+class UsageTracker:
+    """Token counters per agent name"""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._agents: Dict[str, Dict[str, int]] = {}
+
+    def record(self, name: str, before: Mapping[str, int], after: Mapping[str, int]):
+        """Add the usage between two snapshots of an agent's accumulated usage"""
+        with self._lock:
+            totals = self._agents.setdefault(name, {"invocations": 0, **dict.fromkeys(USAGE_FIELDS, 0)})
+            totals["invocations"] += 1
+            for field in USAGE_FIELDS:
+                totals[field] += after.get(field, 0) - before.get(field, 0)
+
+    def stats(self) -> Dict[str, Any]:
+        """Return each agent's token counters and share of input read from the prompt cache"""
+        with self._lock:
+            stats = {}
+            for name, totals in self._agents.items():
+                # Bedrock reports cached tokens apart from inputTokens
+                prompt = totals["inputTokens"] + totals["cacheReadInputTokens"] + totals["cacheWriteInputTokens"]
+                stats[name] = dict(
+                    totals, cache_read_ratio=round(totals["cacheReadInputTokens"] / prompt, 3) if prompt else 0.0
+                )
+            return stats
+
+
+# Shared by every agent of the process, reported by /metrics
+usage = UsageTracker()
+
+
+def run_tracked(name: str, agent, prompt: str):
+    """
+    Invoke a strands agent and record the tokens of this call.
+
+    Args:
+        name: Agent name used in the usage report
+        agent: The strands agent
+        prompt: The prompt sent to the agent
+
+    Returns:
+        The agent result
+    """
+    before = dict(agent.event_loop_metrics.accumulated_usage)
+    try:
+        return agent(prompt)
+    finally:
+        usage.record(name, before, agent.event_loop_metrics.accumulated_usage)
@@ -18,6 +18,7 @@ from retrying import retry
 import yaml
 import os
 import argparse
+from ..agents.source_cache import invalidate_source_results
 
 valid_embedding_models = [
     "cohere.embed-multilingual-v3",
@@ -697,6 +698,9 @@ class KnowledgeBasesForAmazonBedrock:
             job = get_job_response["ingestionJob"]
             interactive_sleep(5)
         pp.pprint(job)
+        if job["status"] == "COMPLETE":
+            # Cached documentation answers may predate the new documents
+            invalidate_source_results("s3")
         # interactive_sleep(40)
 
     def get_kb(self, kb_id):
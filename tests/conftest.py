@@ -1,5 +1,8 @@
 """Shared test fixtures and configuration"""
 
+import time
+from types import SimpleNamespace
+
 import pytest
 
 
@@ -8,3 +11,59 @@ def sample_prompt():
     """Sample user prompt for testing"""
     return "Find projects similar to a React dashboard with authentication"
 
+
+class FakeSynthesis:
+    """Synthesis agent recording its prompts and reporting prompt-cache reads"""
+
+    def __init__(self, delay=0.0):
+        self.delay = delay
+        self.prompts = []
+        self.messages = []
+        self.event_loop_metrics = SimpleNamespace(accumulated_usage={"inputTokens": 0})
+
+    def __call__(self, prompt):
+        time.sleep(self.delay)
+        self.prompts.append(prompt)
+        self.event_loop_metrics.accumulated_usage = {"inputTokens": 100, "cacheReadInputTokens": 900}
+        return "synthesis"
+
+
+class FakeSubAgents:
+    """Stand-ins for the sub-agents: each answers "<source> answer" unless overridden"""
+
+    def __init__(self):
+        self.calls = []
+        self.overrides = {}
+
+    def query(self, source):
+        def run(prompt):
+            self.calls.append(source)
+            override = self.overrides.get(source)
+            return override(prompt) if override else f"{source} answer"
+        return run
+
+
+@pytest.fixture
+def sub_agents(monkeypatch):
+    """Replace the orchestrator's GitLab, GitHub and S3 sub-agents with fakes"""
+    from bookkeeper.agents import orchestrator
+
+    fakes = FakeSubAgents()
+    monkeypatch.setattr(orchestrator, "SOURCE_AGENTS", {s: fakes.query(s) for s in ("gitlab", "github", "s3")})
+    return fakes
+
+
+@pytest.fixture
+def make_orchestrator(sub_agents):
+    """Build direct fan-out orchestrators on the fake sub-agents, with a fake synthesis"""
+    from strands.models import BedrockModel
+
+    from bookkeeper.agents.orchestrator import BookkeeperOrchestrator
+
+    def make(synthesis_delay=0.0, **kwargs):
+        # Building the model opens no connection; only the synthesis call is faked
+        orchestrator = BookkeeperOrchestrator(model=BedrockModel(region_name="us-east-1"), fan_out="direct", **kwargs)
+        orchestrator.synthesis_agent = FakeSynthesis(synthesis_delay)
+        return orchestrator
+
+    return make
@@ -0,0 +1,48 @@
+"""Tests for the response cache backends"""
+
+import time
+
+import pytest
+
+from bookkeeper.core.cache import InMemoryCache, SQLiteCache, cache_key, create_cache
+
+
+@pytest.fixture(params=["memory", "sqlite"])
+def cache(request, tmp_path):
+    return create_cache(request.param, max_entries=2, ttl=60, path=str(tmp_path / "cache.sqlite"))
+
+
+def test_normalized_prompts_share_a_key(sample_prompt):
+    """Case, spacing and trailing punctuation do not change the key"""
+    variant = "  " + sample_prompt.upper().replace(" ", "   ") + " ?"
+    assert cache_key(sample_prompt) == cache_key(variant)
+    assert cache_key(sample_prompt) != cache_key(sample_prompt + " in Go")
+
+
+def test_get_set_and_lru_eviction(cache):
+    """The least recently used entry is evicted once the cache is full"""
+    cache.set("a", "answer a")
+    cache.set("b", "answer b")
+    assert cache.get("a")[0] == "answer a"
+    cache.set("c", "answer c")
+
+    assert cache.get("b") is None
+    assert cache.get("a")[0] == "answer a"
+    assert len(cache) == 2
+    assert cache.stats()["hits"] == 2
+
+
+def test_entries_expire(cache):
+    """Entries are not returned after their TTL"""
+    cache.set("a", {"message": "answer"}, ttl=0.01)
+    time.sleep(0.02)
+    assert cache.get("a") is None
+
+
+def test_sqlite_cache_is_shared_between_instances(tmp_path):
+    """Two backends on the same file see each other's entries"""
+    path = str(tmp_path / "cache.sqlite")
+    SQLiteCache(path).set("a", "answer")
+    assert SQLiteCache(path).get("a")[0] == "answer"
+    assert isinstance(create_cache("memory"), InMemoryCache)
+    assert create_cache("none") is None
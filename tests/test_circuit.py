@@ -0,0 +1,97 @@
+import time
+
+import pytest
+
+from bookkeeper.agents.circuit import CLOSED, HALF_OPEN, OPEN, CircuitBreaker
+from bookkeeper.agents.mcp_pool import PoolExhaustedError
+
+
+def failing(query):
+    return "Error running GitHub agent: 503 Service Unavailable"
+
+
+def test_error_rate_opens_the_circuit():
+    """Once enough calls fail the source is refused without being called"""
+    breaker = CircuitBreaker(error_rate=0.5, min_calls=4, open_seconds=60)
+    for _ in range(4):
+        assert breaker.allow("github")
+        breaker.call("github", failing, "q")
+
+    assert breaker.state("github") == OPEN
+    assert not breaker.allow("github")
+    stats = breaker.stats()["sources"]["github"]
+    assert stats["opened"] == 1
+    assert stats["rejected"] == 1
+
+
+def test_slow_calls_count_as_failures():
+    """With a latency threshold, calls slower than it open the circuit"""
+    breaker = CircuitBreaker(error_rate=0.5, latency_threshold=1, min_calls=2)
+    breaker.record("gitlab", True, 5)
+    breaker.record("gitlab", True, 0.1)
+
+    assert breaker.state("gitlab") == OPEN
+
+
+def test_half_open_trial_call_closes_the_circuit():
+    """Without a probe, one call is let through after the open period"""
+    breaker = CircuitBreaker(min_calls=1, open_seconds=0.05)
+    breaker.call("s3", failing, "q")
+    time.sleep(0.1)
+
+    assert breaker.allow("s3")
+    assert breaker.state("s3") == HALF_OPEN
+    # Other calls wait for the trial
+    assert not breaker.allow("s3")
+    breaker.call("s3", lambda q: "answer", "q")
+    assert breaker.state("s3") == CLOSED
+
+
+def test_trial_answered_elsewhere_frees_the_half_open_circuit():
+    """A trial that never reached the source lets the next call try again"""
+    breaker = CircuitBreaker(min_calls=1, open_seconds=0.05)
+    breaker.call("s3", failing, "q")
+    time.sleep(0.1)
+
+    assert breaker.allow("s3")
+    # Answered by a concurrent identical sub-query: nothing recorded
+    breaker.release("s3")
+    assert breaker.allow("s3")
+
+
+def test_busy_mcp_pool_is_not_a_failure():
+    """Waiting for a free MCP session says nothing about the server's health"""
+    def busy(query):
+        raise PoolExhaustedError("No github MCP session free after 30s")
+
+    breaker = CircuitBreaker(min_calls=1)
+    for _ in range(3):
+        assert breaker.allow("github")
+        with pytest.raises(PoolExhaustedError):
+            breaker.call("github", busy, "q")
+        breaker.release("github")
+
+    assert breaker.state("github") == CLOSED
+    assert breaker.stats()["sources"]["github"]["failure_rate"] == 0.0
+
+
+def test_background_probe_reopens_then_closes():
+    """A failed probe keeps the circuit open; a passing one closes it"""
+    attempts = []
+
+    def probe():
+        attempts.append(time.monotonic())
+        if len(attempts) == 1:
+            raise ConnectionError("still down")
+
+    breaker = CircuitBreaker(min_calls=1, open_seconds=0.05, probes={"github": probe})
+    breaker.call("github", failing, "q")
+    # Calls are refused while the probe decides, never used as trials
+    assert not breaker.allow("github")
+
+    deadline = time.monotonic() + 2
+    while breaker.state("github") != CLOSED and time.monotonic() < deadline:
+        time.sleep(0.02)
+    assert breaker.state("github") == CLOSED
+    assert len(attempts) == 2
+    assert breaker.stats()["sources"]["github"]["opened"] == 2
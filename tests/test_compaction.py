@@ -0,0 +1,47 @@
+import json
+
+from bookkeeper.agents.compaction import ResultCompactor, count_tokens
+from bookkeeper.agents.results import parse_source_result
+
+
+def gitlab_answer(projects=20):
+    payload = {"projets_similaires": [
+        {"nom": f"projet-{i}", "url": f"https://gitlab.example.com/p/{i}", "similarite_score": i * 5,
+         "resume": "README " * 400, "technologies": ["Python"], "contributeurs": []}
+        for i in range(projects)
+    ]}
+    return "Voici ce que j'ai trouvé dans GitLab :\n" + json.dumps(payload, indent=2) + "\nBonne journée !"
+
+
+def test_json_answers_keep_best_items_within_budget():
+    """Prose is dropped, fields truncated and the best-scored items fill the budget"""
+    compactor = ResultCompactor({"gitlab": 300}, field_chars=100)
+    answer = gitlab_answer()
+    compacted = compactor.compact("gitlab", answer)
+
+    assert count_tokens(compacted) <= 300
+    assert "Bonne journée" not in compacted
+    projects = parse_source_result(compacted).projets_similaires
+    assert projects[0].nom == "projet-19"
+    assert [p.similarite_score for p in projects] == sorted((p.similarite_score for p in projects), reverse=True)
+    assert all(len(p.resume) <= 100 for p in projects)
+
+    stats = compactor.stats()
+    assert stats["tokens_before"] == count_tokens(answer)
+    assert stats["tokens_saved"] == count_tokens(answer) - count_tokens(compacted)
+
+
+def test_text_answers_are_deduplicated_and_truncated():
+    """Answers without JSON lose repeated lines and are cut to the budget"""
+    compactor = ResultCompactor({"s3": 50})
+    compacted = compactor.compact("s3", "Même ligne\n" * 100 + "Détail " * 500)
+
+    assert compacted.count("Même ligne") == 1
+    assert len(compacted) <= 50 * 4
+
+
+def test_small_answers_and_unbudgeted_sources_pass_unchanged():
+    """Compaction never grows an answer and sources without budget are untouched"""
+    compactor = ResultCompactor({"gitlab": 2000, "github": 0})
+    assert compactor.compact("gitlab", "Aucun projet trouvé.") == "Aucun projet trouvé."
+    assert compactor.compact("github", gitlab_answer()) == gitlab_answer()
@@ -0,0 +1,35 @@
+import warnings
+
+from strands.models import BedrockModel
+
+import bookkeeper.core
+from bookkeeper.core import config
+
+
+def test_prompt_cache_uses_cache_config_without_deprecation_warnings(monkeypatch):
+    """Cache points land after the tools and the messages, with the configured TTL"""
+    monkeypatch.setattr(config, "PROMPT_CACHE", "1h")
+    with warnings.catch_warnings():
+        warnings.simplefilter("error")
+        model = BedrockModel(model_id="eu.anthropic.claude-3-5-sonnet-20240620-v1:0", region_name="eu-west-1",
+                             **config.prompt_cache_config())
+        request = model.format_request(
+            [{"role": "user", "content": [{"text": "hi"}]}],
+            tool_specs=[{"name": "search", "description": "Search", "inputSchema": {"json": {"type": "object"}}}],
+            system_prompt="You are helpful",
+        )
+
+    assert request["toolConfig"]["tools"][-1] == {"cachePoint": {"type": "default", "ttl": "1h"}}
+    assert request["messages"][-1]["content"][-1] == {"cachePoint": {"type": "default", "ttl": "1h"}}
+
+    monkeypatch.setattr(config, "PROMPT_CACHE", "off")
+    assert config.prompt_cache_config() == {}
+
+
+def test_core_package_keeps_the_former_instances_lazily():
+    """``from bookkeeper.core import bedrock_model`` still works, built on first access"""
+    from bookkeeper.core import bedrock_model
+
+    assert bedrock_model is config.get_bedrock_model()
+    assert "bedrock_model" in bookkeeper.core.__all__
+    assert not hasattr(bookkeeper.core, "warm_up")
@@ -0,0 +1,44 @@
+"""Tests for the bounded invocation executor"""
+
+import asyncio
+import threading
+
+import pytest
+
+from bookkeeper.api.executor import InvocationExecutor, QueueFullError
+
+
+def test_runs_blocking_call_off_event_loop():
+    """The blocking callable runs on a worker thread and its result is returned"""
+    executor = InvocationExecutor(max_workers=1, max_queue=1)
+    loop_thread = threading.get_ident()
+
+    result = asyncio.run(executor.run(lambda: threading.get_ident()))
+
+    assert result != loop_thread
+    assert executor.stats()["completed"] == 1
+    executor.shutdown()
+
+
+def test_rejects_when_queue_is_full():
+    """Requests beyond workers + queue are rejected with a retry hint"""
+    executor = InvocationExecutor(max_workers=1, max_queue=1, retry_after=7)
+    release = threading.Event()
+
+    async def scenario():
+        running = asyncio.ensure_future(executor.run(release.wait))
+        queued = asyncio.ensure_future(executor.run(release.wait))
+        await asyncio.sleep(0.05)
+        assert executor.stats()["in_flight"] == 1
+        assert executor.stats()["queue_depth"] == 1
+        with pytest.raises(QueueFullError) as exc_info:
+            await executor.run(release.wait)
+        assert exc_info.value.retry_after == 7
+        release.set()
+        await asyncio.gather(running, queued)
+
+    asyncio.run(scenario())
+    stats = executor.stats()
+    assert stats["rejected"] == 1
+    assert stats["queue_depth"] == 0 and stats["in_flight"] == 0
+    executor.shutdown()
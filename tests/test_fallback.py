@@ -0,0 +1,72 @@
+import asyncio
+
+from strands.models import Model
+from strands.types.exceptions import ModelThrottledException
+
+from bookkeeper.core.fallback import FallbackModel
+
+
+class FakeModel(Model):
+    def __init__(self, name, delay=0.0, throttle=False):
+        self.name = name
+        self.delay = delay
+        self.throttle = throttle
+        self.calls = 0
+
+    def update_config(self, **model_config):
+        pass
+
+    def get_config(self):
+        return {"model_id": self.name}
+
+    async def stream(self, messages, tool_specs=None, system_prompt=None, **kwargs):
+        self.calls += 1
+        await asyncio.sleep(self.delay)
+        if self.throttle:
+            raise ModelThrottledException("Too many requests")
+        yield {"text": self.name}
+        yield {"text": "done"}
+
+    async def structured_output(self, output_model, prompt, system_prompt=None, **kwargs):
+        yield {"output": self.name}
+
+
+def collect(model):
+    async def run():
+        return [event async for event in model.stream([{"role": "user", "content": [{"text": "hi"}]}])]
+
+    return asyncio.run(run())
+
+
+def test_throttled_primary_falls_back_then_cools_down():
+    """A throttle moves the call to the fallback, and the next calls skip the primary"""
+    primary, fallback = FakeModel("primary", throttle=True), FakeModel("fallback")
+    model = FallbackModel(primary, fallback, latency_slo=1, cooldown=60)
+
+    assert collect(model) == [{"text": "fallback"}, {"text": "done"}]
+    assert collect(model)[0] == {"text": "fallback"}
+    assert primary.calls == 1
+    stats = model.stats()
+    assert stats["throttled"] == 1
+    assert stats["fallback_calls"] == 2
+    assert stats["degraded"] is True
+
+
+def test_slow_first_event_breaches_latency_slo():
+    """A primary silent past the SLO is abandoned for the fallback"""
+    model = FallbackModel(FakeModel("primary", delay=1), FakeModel("fallback"), latency_slo=0.05, cooldown=0)
+
+    assert collect(model)[0] == {"text": "fallback"}
+    assert model.stats()["slo_breaches"] == 1
+    # Without cooldown the next call tries the primary again
+    assert model._use_primary()
+
+
+def test_healthy_primary_is_used():
+    """A fast primary answers and the fallback is never called"""
+    fallback = FakeModel("fallback")
+    model = FallbackModel(FakeModel("primary"), fallback, latency_slo=1)
+
+    assert collect(model) == [{"text": "primary"}, {"text": "done"}]
+    assert fallback.calls == 0
+    assert model.get_config() == {"model_id": "primary"}
@@ -0,0 +1,142 @@
+import time
+
+import pytest
+from strands.models import BedrockModel
+
+from bookkeeper.agents import orchestrator as orchestrator_module
+from bookkeeper.agents.circuit import CircuitBreaker
+from bookkeeper.agents.orchestrator import BookkeeperOrchestrator, build_synthesis_prompt
+from bookkeeper.agents.router import QueryRouter
+from bookkeeper.agents.source_cache import create_source_cache
+from bookkeeper.core import usage as usage_module
+from bookkeeper.core.usage import UsageTracker
+
+
+def slow_answer(prompt):
+    time.sleep(2)
+    return "late answer"
+
+
+def broken(prompt):
+    raise RuntimeError("boom")
+
+
+def open_circuit(source):
+    breaker = CircuitBreaker(min_calls=1, open_seconds=60)
+    breaker.record(source, False, 1)
+    return breaker
+
+
+def test_direct_fan_out_queries_sources_concurrently(sub_agents, make_orchestrator, sample_prompt):
+    """All sub-agents run at once and their answers reach a single synthesis call"""
+    for source in ("gitlab", "github", "s3"):
+        sub_agents.overrides[source] = lambda prompt, source=source: time.sleep(0.3) or f"{source} answer"
+    orchestrator = make_orchestrator()
+
+    started = time.monotonic()
+    assert orchestrator.invoke(sample_prompt) == "synthesis"
+    assert time.monotonic() - started < 0.8
+
+    (prompt,) = orchestrator.synthesis_agent.prompts
+    assert prompt == build_synthesis_prompt(
+        sample_prompt, {"gitlab": "gitlab answer", "github": "github answer", "s3": "s3 answer"}
+    )
+
+
+@pytest.mark.parametrize(
+    "source, override, make_kwargs, deadline, missing, marker",
+    [
+        ("gitlab", broken, lambda: {}, None, [], "Error in GitLab assistant: boom"),
+        ("gitlab", slow_answer, lambda: {}, 0.5, ["gitlab"], "GitLab did not answer in time"),
+        ("github", None, lambda: {"breaker": open_circuit("github")}, None, ["github"], "GitHub unavailable"),
+    ],
+    ids=["error", "deadline", "open-circuit"],
+)
+def test_failing_source_leaves_the_others_in_the_answer(
+    sub_agents, make_orchestrator, sample_prompt, source, override, make_kwargs, deadline, missing, marker
+):
+    """An error, a missed deadline or an open circuit costs one source, not the query"""
+    if override:
+        sub_agents.overrides[source] = override
+    orchestrator = make_orchestrator(**make_kwargs())
+
+    started = time.monotonic()
+    assert orchestrator.invoke(sample_prompt, deadline=deadline) == "synthesis"
+    assert time.monotonic() - started < 1
+
+    assert orchestrator.missing_sources == missing
+    (prompt,) = orchestrator.synthesis_agent.prompts
+    assert marker in prompt
+    assert "s3 answer" in prompt
+
+
+def test_open_circuit_source_is_not_queried(sub_agents, make_orchestrator, sample_prompt):
+    """A source with an open circuit fails fast, without a sub-agent call"""
+    make_orchestrator(breaker=open_circuit("github")).invoke(sample_prompt)
+
+    assert sorted(sub_agents.calls) == ["gitlab", "s3"]
+
+
+def test_router_limits_the_fan_out(sub_agents, make_orchestrator):
+    """Sources left out by the router are neither queried nor synthesized"""
+    orchestrator = make_orchestrator(router=QueryRouter(threshold=0.5))
+    orchestrator.invoke("Find the post-mortem doc for project X")
+
+    assert sub_agents.calls == ["s3"]
+    (prompt,) = orchestrator.synthesis_agent.prompts
+    assert "GitLab" not in prompt
+    # Tools the model calls anyway are answered without running the sub-agent
+    assert "skipped" in orchestrator._run_source("github", sub_agents.query("github"), "query")
+    assert sub_agents.calls == ["s3"]
+
+
+def test_unknown_fan_out_mode_is_rejected():
+    """The fan-out mode is checked before any model is built"""
+    with pytest.raises(ValueError):
+        BookkeeperOrchestrator(fan_out="sometimes")
+
+
+def test_model_id_reports_the_model_in_use():
+    """The configured orchestrator model is the default; an injected one is reported as is"""
+    default = BookkeeperOrchestrator()
+    assert default.model_id == orchestrator_module.AGENT_MODEL_IDS["orchestrator"]
+
+    injected = BookkeeperOrchestrator(model=BedrockModel(model_id="eu.amazon.nova-pro-v1:0", region_name="eu-west-1"))
+    assert injected.model_id == "eu.amazon.nova-pro-v1:0"
+
+
+def test_source_cache_answers_repeated_sub_queries(sub_agents, make_orchestrator, sample_prompt):
+    """A sub-query already answered for another request costs no sub-agent call"""
+    cache = create_source_cache("memory", {"gitlab": 60, "github": 60, "s3": 60})
+
+    make_orchestrator(source_cache=cache).invoke(sample_prompt)
+    second = make_orchestrator(source_cache=cache)
+    second.invoke(sample_prompt.upper())
+
+    assert sorted(sub_agents.calls) == ["github", "gitlab", "s3"]
+    (prompt,) = second.synthesis_agent.prompts
+    assert "gitlab answer" in prompt
+
+
+def test_synthesis_usage_includes_prompt_cache_reads(monkeypatch, make_orchestrator, sample_prompt):
+    """Tokens read from the prompt cache are reported per agent"""
+    tracker = UsageTracker()
+    monkeypatch.setattr(usage_module, "usage", tracker)
+
+    make_orchestrator().invoke(sample_prompt)
+
+    stats = tracker.stats()["synthesis"]
+    assert stats["cacheReadInputTokens"] == 900
+    assert stats["cache_read_ratio"] == 0.9
+
+
+def test_synthesis_is_bounded_by_the_deadline(make_orchestrator, sample_prompt):
+    """A synthesis turn running past the deadline ends the query with an error"""
+    orchestrator = make_orchestrator(synthesis_delay=1)
+
+    started = time.monotonic()
+    result = orchestrator.invoke(sample_prompt, deadline=0.2)
+
+    assert result.startswith(orchestrator_module.INVOKE_ERROR_PREFIX)
+    assert "deadline" in result
+    assert time.monotonic() - started < 0.9
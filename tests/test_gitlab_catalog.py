@@ -0,0 +1,73 @@
+import httpx
+
+from bookkeeper.agents.gitlab_catalog import GitLabCatalog, GitLabIndexer
+
+PROJECTS = [
+    {
+        "id": 1, "name": "billing-api", "path_with_namespace": "finance/billing-api",
+        "description": "Invoicing REST API in FastAPI", "topics": ["finance", "api"],
+        "default_branch": "main", "readme_url": "https://gitlab.example.com/finance/billing-api/-/blob/main/README.md",
+        "web_url": "https://gitlab.example.com/finance/billing-api", "last_activity_at": "2026-01-10T08:00:00Z",
+    },
+    {
+        "id": 2, "name": "hr-portal", "path_with_namespace": "rh/hr-portal",
+        "description": "Leave requests portal", "topics": ["rh"], "default_branch": "main", "readme_url": None,
+        "web_url": "https://gitlab.example.com/rh/hr-portal", "last_activity_at": "2026-02-01T08:00:00Z",
+    },
+]
+
+
+def fake_gitlab(requests):
+    def handler(request):
+        requests.append(request)
+        path = request.url.path
+        if path == "/api/v4/projects":
+            after = request.url.params.get("last_activity_after")
+            projects = [p for p in PROJECTS if not after or p["last_activity_at"] > after]
+            return httpx.Response(200, json=projects)
+        if path.endswith("/languages"):
+            return httpx.Response(200, json={"Python": 90.0, "Dockerfile": 10.0})
+        if path.endswith("/raw"):
+            return httpx.Response(200, text="# Billing\nGenerates PDF invoices from Stripe payments.")
+        return httpx.Response(404)
+
+    return httpx.Client(base_url="https://gitlab.example.com/api/v4", transport=httpx.MockTransport(handler))
+
+
+def test_sync_is_incremental():
+    """The second sync only asks for projects active after the stored cursor"""
+    requests = []
+    indexer = GitLabIndexer(GitLabCatalog(":memory:"), fake_gitlab(requests))
+
+    assert indexer.sync_once() == 2
+    assert len(indexer.catalog) == 2
+    assert indexer.sync_once() == 0
+    last_listing = [r for r in requests if r.url.path == "/api/v4/projects"][-1]
+    assert last_listing.url.params["last_activity_after"] == "2026-02-01T08:00:00Z"
+
+
+def test_search_ranks_readme_and_metadata_matches():
+    """Keywords found in the README, topics or languages rank the project first"""
+    indexer = GitLabIndexer(GitLabCatalog(":memory:"), fake_gitlab([]))
+    indexer.sync_once()
+
+    results = indexer.catalog.search("PDF invoices for Stripe payments")
+    assert results[0]["nom"] == "billing-api"
+    assert results[0]["technologies"] == ["Python", "Dockerfile"]
+    assert results[0]["url"] == "https://gitlab.example.com/finance/billing-api"
+    assert indexer.catalog.search("") == []
+
+
+def test_upsert_replaces_a_project():
+    """A resynced project replaces its earlier copy in both indexes"""
+    catalog = GitLabCatalog(":memory:")
+    project = {
+        "id": 7, "name": "etl", "path": "data/etl", "description": "Kafka ingestion", "topics": [],
+        "languages": ["Scala"], "readme": "", "web_url": "", "last_activity_at": "2026-01-01",
+    }
+    catalog.upsert(project)
+    catalog.upsert(dict(project, description="Spark batch jobs"))
+
+    assert len(catalog) == 1
+    assert catalog.search("Spark batch")[0]["description"] == "Spark batch jobs"
+    assert not [r for r in catalog.search("Kafka") if r["description"] == "Kafka ingestion"]
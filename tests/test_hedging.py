@@ -0,0 +1,54 @@
+import threading
+import time
+
+from bookkeeper.agents.hedging import Hedger
+
+
+def warm(hedger, source="gitlab", latency=0.01, samples=5):
+    for _ in range(samples):
+        hedger.run(source, lambda q: (time.sleep(latency), "ok")[1], "warm-up")
+
+
+def test_slow_call_is_hedged_and_first_answer_wins():
+    """A call stuck past the latency percentile is duplicated and the fast attempt answers"""
+    hedger = Hedger(percentile=90, budget=1, min_samples=5)
+    warm(hedger)
+    assert hedger.delay("gitlab") is not None
+
+    attempts = []
+    lock = threading.Lock()
+
+    def stalls_once(query):
+        with lock:
+            attempts.append(query)
+            first = len(attempts) == 1
+        if first:
+            time.sleep(1)
+            return "slow"
+        return "fast"
+
+    started = time.monotonic()
+    assert hedger.run("gitlab", stalls_once, "q") == "fast"
+    assert time.monotonic() - started < 0.5
+    assert hedger.stats()["hedge_wins"] == 1
+
+
+def test_no_hedging_before_enough_samples():
+    """Without latency history calls are never duplicated"""
+    hedger = Hedger(percentile=50, budget=1, min_samples=5)
+    calls = []
+    assert hedger.run("s3", lambda q: calls.append(q) or "answer", "q") == "answer"
+    assert calls == ["q"]
+    assert hedger.stats()["hedged"] == 0
+
+
+def test_hedge_budget_caps_extra_load():
+    """Hedges are refused once the budget earned by regular calls is spent"""
+    hedger = Hedger(percentile=50, budget=0.1, min_samples=5)
+    warm(hedger, latency=0.001)
+    # Five warm-up calls earned half a hedge: not enough for one
+    hedger.run("gitlab", lambda q: (time.sleep(0.05), "ok")[1], "q")
+
+    stats = hedger.stats()
+    assert stats["hedged"] == 0
+    assert stats["budget_denied"] == 1
@@ -0,0 +1,38 @@
+"""Cold start budget: importing the app must stay cheap"""
+
+import json
+import os
+import subprocess
+import sys
+
+# Seconds allowed for `import bookkeeper.api.app` in a fresh interpreter
+IMPORT_BUDGET = float(os.getenv("BOOKKEEPER_IMPORT_BUDGET", "1.0"))
+
+# Modules that must only be loaded lazily (warm-up or first request)
+DEFERRED_MODULES = ["strands", "mcp", "litellm", "boto3", "opentelemetry.sdk"]
+
+PROBE = """
+import json, sys, time
+start = time.perf_counter()
+import bookkeeper.api.app
+elapsed = time.perf_counter() - start
+from bookkeeper.core import config
+print(json.dumps({
+    "elapsed": elapsed,
+    "loaded": [name for name in %r if name in sys.modules],
+    "instances": sorted(config._instances),
+}))
+""" % (DEFERRED_MODULES,)
+
+
+def test_app_import_is_lazy_and_within_budget():
+    """Importing the app builds no client and stays under the time budget"""
+    env = {key: value for key, value in os.environ.items() if not key.startswith("LANGFUSE_")}
+    completed = subprocess.run(
+        [sys.executable, "-c", PROBE], env=env, capture_output=True, text=True, check=True
+    )
+    result = json.loads(completed.stdout.strip().splitlines()[-1])
+
+    assert result["loaded"] == []
+    assert result["instances"] == []
+    assert result["elapsed"] < IMPORT_BUDGET
@@ -0,0 +1,37 @@
+"""Tests for the asynchronous job stores"""
+
+import time
+
+import pytest
+
+from bookkeeper.api.jobs import create_job_store
+
+
+@pytest.fixture(params=["memory", "sqlite"])
+def store(request, tmp_path):
+    return create_job_store(request.param, ttl=60, path=str(tmp_path / "jobs.sqlite"))
+
+
+def test_job_lifecycle(store, sample_prompt):
+    """A job moves from queued to succeeded and collects partial results"""
+    job = store.create(sample_prompt)
+    assert store.get(job["job_id"])["status"] == "queued"
+
+    store.update(job["job_id"], status="running")
+    store.add_partial(job["job_id"], {"source": "gitlab", "result": "..."})
+    store.update(job["job_id"], status="succeeded", output={"message": "done"})
+
+    stored = store.get(job["job_id"])
+    assert stored["status"] == "succeeded"
+    assert stored["partial"] == [{"source": "gitlab", "result": "..."}]
+    assert stored["output"] == {"message": "done"}
+    assert store.stats()["succeeded"] == 1
+
+
+def test_jobs_expire(store, sample_prompt):
+    """Expired jobs are no longer returned"""
+    store.ttl = 0.01
+    job = store.create(sample_prompt)
+    time.sleep(0.02)
+    assert store.get(job["job_id"]) is None
+    assert store.get("unknown") is None
@@ -0,0 +1,118 @@
+import threading
+
+import pytest
+
+from bookkeeper.agents.mcp_pool import MCPSessionPool
+
+
+class FakeClient:
+    def __init__(self, clients):
+        clients.append(self)
+        self.started = False
+        self.stopped = False
+        self.listings = 0
+        self.broken = False
+
+    def start(self):
+        self.started = True
+        return self
+
+    def stop(self, exc_type, exc_val, exc_tb):
+        self.stopped = True
+
+    def list_tools_sync(self):
+        if self.broken:
+            raise ConnectionError("session closed")
+        self.listings += 1
+        return ["search_repositories"]
+
+
+def make_pool(**kwargs):
+    clients = []
+    return MCPSessionPool(lambda: FakeClient(clients), name="test", **kwargs), clients
+
+
+def test_sessions_are_reused_across_queries():
+    """The connection and tool listing are paid once, not per query"""
+    pool, clients = make_pool(size=2)
+    for _ in range(3):
+        with pool.session() as session:
+            assert session.tools == ["search_repositories"]
+
+    assert len(clients) == 1
+    assert clients[0].listings == 1
+    assert pool.stats()["connects"] == 1
+
+
+def test_failed_query_triggers_health_check_and_reconnect():
+    """A session broken during a query is replaced on the next borrow"""
+    pool, clients = make_pool(size=1)
+    with pytest.raises(RuntimeError):
+        with pool.session():
+            clients[0].broken = True
+            raise RuntimeError("stream closed")
+
+    with pool.session() as session:
+        assert session.client is clients[1]
+    assert clients[0].stopped
+    assert pool.stats()["reconnects"] == 1
+
+
+def test_pool_size_limits_concurrent_sessions():
+    """A query waits for a free session, up to the acquire timeout"""
+    pool, clients = make_pool(size=1, acquire_timeout=0.05)
+    borrowed = threading.Event()
+    release = threading.Event()
+
+    def hold():
+        with pool.session():
+            borrowed.set()
+            release.wait()
+
+    thread = threading.Thread(target=hold)
+    thread.start()
+    borrowed.wait()
+    with pytest.raises(TimeoutError):
+        with pool.session():
+            pass
+    release.set()
+    thread.join()
+
+    assert len(clients) == 1
+    assert pool.stats()["timeouts"] == 1
+
+
+def test_session_is_recycled_after_max_uses():
+    """A server process is replaced once it answered max_uses queries"""
+    pool, clients = make_pool(size=1, max_uses=2)
+    for _ in range(3):
+        with pool.session():
+            pass
+
+    assert len(clients) == 2
+    assert clients[0].stopped
+    assert pool.stats()["recycled"] == 1
+
+
+def test_supervisor_check_restarts_crashed_sessions():
+    """An idle session whose server crashed is restarted before the next query"""
+    pool, clients = make_pool(size=2)
+    with pool.session():
+        pass
+    clients[0].broken = True
+    pool.check_idle()
+
+    assert clients[0].stopped
+    assert pool.stats()["restarts"] == 1
+    with pool.session() as session:
+        assert session.client is clients[1]
+    assert len(clients) == 2
+
+
+def test_check_borrows_a_session_and_counts_its_tools():
+    """Readiness checks and circuit probes reuse the pooled sessions"""
+    pool, clients = make_pool(size=1)
+
+    assert pool.check() == 1
+    assert pool.check() == 1
+    assert len(clients) == 1
@@ -0,0 +1,30 @@
+"""Tests for per-client rate limiting"""
+
+from bookkeeper.api.ratelimit import RateLimiter, estimate_tokens
+
+
+def test_request_budget_is_per_client():
+    """A client over its request budget is throttled, others are not"""
+    limiter = RateLimiter(requests_per_minute=2, tokens_per_minute=0)
+
+    assert limiter.check("a") == 0
+    assert limiter.check("a") == 0
+    wait = limiter.check("a")
+    assert 0 < wait <= 30
+    assert limiter.check("b") == 0
+    assert limiter.stats()["throttled"] == 1
+
+
+def test_token_budget(sample_prompt):
+    """Estimated tokens are charged against the token bucket"""
+    tokens = estimate_tokens(sample_prompt, output_tokens=1000)
+    limiter = RateLimiter(requests_per_minute=0, tokens_per_minute=1500)
+
+    assert limiter.check("a", tokens) == 0
+    assert limiter.check("a", tokens) > 0
+
+
+def test_disabled_limits_admit_everything():
+    """Limits of 0 disable rate limiting"""
+    limiter = RateLimiter(requests_per_minute=0, tokens_per_minute=0)
+    assert all(limiter.check("a", 10 ** 9) == 0 for _ in range(100))
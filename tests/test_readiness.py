@@ -0,0 +1,67 @@
+"""Tests for dependency warm-up tracking"""
+
+import time
+
+from bookkeeper.core.readiness import Readiness
+
+
+def test_ready_once_required_dependencies_are_warm():
+    """Optional or disabled dependencies do not block readiness"""
+    readiness = Readiness()
+    readiness.register("model", lambda: time.sleep(0.01))
+    readiness.register("telemetry", lambda: False, required=False)
+    readiness.register("optional", lambda: 1 / 0, required=False)
+    assert readiness.report()["dependencies"]["model"]["state"] == "pending"
+    assert not readiness.is_ready()
+
+    readiness.warm_up()
+    report = readiness.report()
+
+    assert report["ready"]
+    assert report["dependencies"]["model"]["latency_ms"] >= 10
+    assert report["dependencies"]["telemetry"]["state"] == "disabled"
+    assert report["dependencies"]["optional"]["state"] == "failed"
+    assert "division by zero" in report["dependencies"]["optional"]["error"]
+
+
+def test_failed_required_dependency_is_rechecked():
+    """A failed required dependency can become ready on a later check"""
+    attempts = []
+
+    def flaky():
+        attempts.append(1)
+        if len(attempts) == 1:
+            raise RuntimeError("image still pulling")
+
+    readiness = Readiness()
+    readiness.register("gitlab_mcp", flaky)
+    readiness.warm_up()
+    assert not readiness.is_ready()
+
+    readiness.recheck(failed_interval=0)
+    time.sleep(0.05)
+    assert readiness.is_ready()
+
+
+def test_ready_dependency_is_rechecked_once_stale():
+    """A dependency lost after warm-up turns readiness off at its next re-check"""
+    healthy = [True]
+
+    def mcp():
+        if not healthy[0]:
+            raise ConnectionError("MCP server gone")
+
+    readiness = Readiness()
+    readiness.register("github_mcp", mcp)
+    readiness.warm_up()
+    healthy[0] = False
+
+    # Still fresh: trusted without a new check
+    readiness.recheck(ready_ttl=60)
+    time.sleep(0.05)
+    assert readiness.is_ready()
+
+    readiness.recheck(ready_ttl=0.01)
+    time.sleep(0.05)
+    assert not readiness.is_ready()
+    assert readiness.report()["dependencies"]["github_mcp"]["error"] == "MCP server gone"
@@ -0,0 +1,65 @@
+import json
+
+from bookkeeper.agents.orchestrator import build_synthesis_prompt
+from bookkeeper.agents.results import is_error_answer, merge_results, parse_source_result
+
+GITLAB_ANSWER = """Voici les projets trouvés :
+```json
+{"projets_similaires": [
+  {"nom": "dashboard-rh", "url": "https://gitlab.example.com/rh/dashboard", "similarite_score": 70,
+   "technologies": ["React"], "contributeurs": ["alice"]},
+  {"nom": "auth-proxy", "url": "https://gitlab.example.com/infra/auth-proxy", "similarite_score": "55%"}
+]}
+```
+N'hésitez pas si vous avez d'autres questions."""
+
+GITHUB_ANSWER = json.dumps({"projets_similaires": [
+    {"nom": "dashboard-rh", "url": "https://gitlab.example.com/rh/dashboard/", "similarite_score": 85,
+     "technologies": ["React", "Keycloak"], "contributeurs": ["bob"]},
+    {"nom": "old-portal", "url": "https://github.com/example/old-portal", "similarite_score": 20},
+]})
+
+S3_ANSWER = 'Résultat : {"documents_pertinents": [{"nom_fichier": "spec.pdf", "pertinence_score": 90}]}'
+
+
+def test_payload_is_found_in_prose_and_scores_are_coerced():
+    """JSON is extracted from fenced or inline answers and "55%" reads as 55"""
+    parsed = parse_source_result(GITLAB_ANSWER)
+    assert [p.similarite_score for p in parsed.projets_similaires] == [70, 55]
+    assert parse_source_result(S3_ANSWER).documents_pertinents[0].nom_fichier == "spec.pdf"
+    assert parse_source_result("Error running GitLab agent: timeout") is None
+
+
+def test_projects_from_several_sources_are_merged_and_ranked():
+    """Duplicates keep the best score and the union of their details; top-k is kept"""
+    merged = merge_results({"gitlab": GITLAB_ANSWER, "github": GITHUB_ANSWER, "s3": S3_ANSWER}, top_k=2)
+
+    first, second = merged.projets_similaires
+    assert first.nom == "dashboard-rh"
+    assert first.similarite_score == 85
+    assert first.technologies == ["React", "Keycloak"]
+    assert first.contributeurs == ["alice", "bob"]
+    assert first.sources == ["gitlab", "github"]
+    assert second.nom == "auth-proxy"
+    assert [d.nom_fichier for d in merged.documents_pertinents] == ["spec.pdf"]
+    assert merged.unparsed == {}
+
+
+def test_synthesis_prompt_is_compact_and_keeps_unparsed_answers(sample_prompt):
+    """Only the ranked items reach synthesis; answers without JSON are passed as is"""
+    results = {"gitlab": GITLAB_ANSWER, "github": "Error running GitHub agent: boom", "s3": S3_ANSWER}
+    prompt = build_synthesis_prompt(sample_prompt, results, top_k=10)
+
+    assert "N'hésitez pas" not in prompt
+    assert "dashboard-rh" in prompt
+    assert "Error running GitHub agent: boom" in prompt
+    assert len(prompt) < len(build_synthesis_prompt(sample_prompt, results))
+
+
+def test_error_messages_of_every_layer_are_recognized():
+    """Sub-agent, orchestrator tool and orchestrator errors share one predicate"""
+    assert is_error_answer("Error running GitLab agent: timeout")
+    assert is_error_answer("Error in GitHub assistant: 503")
+    assert is_error_answer("Error invoking agent: the synthesis turn missed the request deadline")
+    assert not is_error_answer(GITLAB_ANSWER)
+    assert not is_error_answer("Errors in the billing module are tracked in dashboard-rh")
@@ -0,0 +1,63 @@
+from bookkeeper.agents.router import EXAMPLES, CentroidModel, QueryRouter, create_router
+
+
+def test_keywords_route_to_the_named_sources():
+    """Source names restrict the fan-out, topical words add their source"""
+    router = QueryRouter()
+
+    decision = router.route("Find the post-mortem doc for project X")
+    assert decision.sources == ["s3"]
+    assert decision.method == "keywords"
+    assert not decision.fallback
+
+    assert router.route("Quels dépôts GitHub ont une documentation ?").sources == ["github", "s3"]
+
+
+def test_topical_words_never_exclude_sources():
+    """Without a source name, topical words leave every source in the fan-out"""
+    router = QueryRouter()
+
+    for query in (
+        "Find projects with a PDF parser",
+        "Which projects run our data pipeline on Kafka?",
+        "Projets open source similaires à notre outil de facturation",
+    ):
+        decision = router.route(query)
+        assert decision.sources == ["gitlab", "github", "s3"]
+        assert decision.fallback
+
+    # A lone source name stays below the default threshold
+    assert router.route("the github repo").fallback
+
+
+def test_low_confidence_falls_back_to_every_source():
+    """Queries the router is unsure about are sent to every sub-agent"""
+    router = QueryRouter(threshold=0.9)
+
+    decision = router.route("bonjour")
+    assert decision.sources == ["gitlab", "github", "s3"]
+    assert decision.fallback
+
+    # A single keyword hit is not confident enough for this threshold
+    assert router.route("the github repo").fallback
+
+    stats = router.stats()
+    assert stats["decisions"] == 2
+    assert stats["fallbacks"] == 2
+    assert stats["skipped"] == {"gitlab": 0, "github": 0, "s3": 0}
+
+
+def test_centroid_model_routes_queries_without_keywords():
+    """Without keywords the nearest example queries decide the source"""
+    router = QueryRouter(threshold=0.5, model=CentroidModel(EXAMPLES))
+
+    decision = router.route("trouve le retour sur le projet de migration cloud")
+    assert decision.method == "centroid"
+    assert decision.sources == ["s3"]
+    assert router.stats()["skipped"] == {"gitlab": 1, "github": 1, "s3": 0}
+
+
+def test_router_can_be_disabled():
+    """The "off" mode builds no router at all"""
+    assert create_router("off", 0.5) is None
+    assert create_router("keywords", 0.5).model is None
@@ -0,0 +1,347 @@
+import asyncio
+import json
+import time
+
+import httpx
+import pytest
+from fastapi.testclient import TestClient
+
+from bookkeeper.api import routes
+from bookkeeper.api.app import app
+from bookkeeper.api.executor import InvocationExecutor
+from bookkeeper.api.ratelimit import RateLimiter
+from bookkeeper.core.cache import create_cache
+
+
+class FakeOrchestrator:
+    def __init__(self):
+        self.missing_sources = []
+
+    def invoke(self, user_query, mode=None, deadline=None):
+        return f"answer to {user_query}"
+
+    async def stream(self, user_query, mode=None, deadline=None):
+        for word in ("answer", "to", user_query):
+            yield word
+
+
+@pytest.fixture
+def client(monkeypatch):
+    """App client whose orchestrators are fakes, without limits or caches"""
+    monkeypatch.setattr(routes, "new_orchestrator", lambda **kwargs: FakeOrchestrator())
+    monkeypatch.setattr(routes.sessions, "factory", lambda session_id: FakeOrchestrator())
+    monkeypatch.setattr(routes, "limiter", RateLimiter(0, 0))
+    monkeypatch.setattr(routes, "response_cache", None)
+    monkeypatch.setattr(routes, "semantic_cache", None)
+    return TestClient(app)
+
+
+def invoke(client, prompt="hello", **headers):
+    return client.post("/invocations", json={"input": {"prompt": prompt}}, headers=headers)
+
+
+def test_deadline_counts_the_time_spent_queued(client, monkeypatch):
+    """A request queued behind busy workers gets only what is left of its deadline"""
+    deadlines = []
+
+    class RecordingOrchestrator(FakeOrchestrator):
+        def invoke(self, user_query, mode=None, deadline=None):
+            deadlines.append(deadline)
+            return super().invoke(user_query, mode, deadline)
+
+    busy = InvocationExecutor(max_workers=1, max_queue=4)
+    monkeypatch.setattr(routes, "executor", busy)
+    monkeypatch.setattr(routes.sessions, "factory", lambda session_id: RecordingOrchestrator())
+    # The only worker stays busy for 0.4s
+    busy._pool.submit(time.sleep, 0.4)
+
+    response = client.post("/invocations", json={"input": {"prompt": "queued", "deadline": 1}})
+    assert response.status_code == 200
+    assert deadlines[0] <= 0.65
+
+    busy._pool.submit(time.sleep, 0.4)
+    late = client.post("/invocations", json={"input": {"prompt": "too late", "deadline": 0.2}})
+    assert late.status_code == 504
+
+
+def test_only_identical_requests_share_a_run(client, monkeypatch):
+    """Concurrent requests differing in mode or deadline get runs of their own"""
+    runs = []
+
+    class SlowOrchestrator(FakeOrchestrator):
+        def invoke(self, user_query, mode=None, deadline=None):
+            runs.append((mode, deadline))
+            time.sleep(0.3)
+            return super().invoke(user_query, mode, deadline)
+
+    monkeypatch.setattr(routes, "new_orchestrator", lambda **kwargs: SlowOrchestrator())
+    monkeypatch.setattr(routes.sessions, "factory", lambda session_id: SlowOrchestrator())
+    bodies = [
+        {"prompt": "same"},
+        {"prompt": "same"},
+        {"prompt": "same", "mode": "direct"},
+        {"prompt": "same", "deadline": 5},
+    ]
+
+    async def post_all():
+        transport = httpx.ASGITransport(app=app)
+        async with httpx.AsyncClient(transport=transport, base_url="http://test") as http:
+            return await asyncio.gather(*(http.post("/invocations", json={"input": body}) for body in bodies))
+
+    responses = asyncio.run(post_all())
+    assert [response.status_code for response in responses] == [200] * 4
+    assert len(runs) == 3
+    assert sorted(mode or "" for mode, _ in runs) == ["", "", "direct"]
+
+
+def test_full_queue_answers_503_with_retry_after(client, monkeypatch):
+    """Once every worker and queue slot is taken, requests are refused at once"""
+    full = InvocationExecutor(max_workers=1, max_queue=0, retry_after=7)
+    full.reserve()
+    monkeypatch.setattr(routes, "executor", full)
+
+    response = invoke(client)
+
+    assert response.status_code == 503
+    assert response.headers["Retry-After"] == "7"
+    assert full.stats()["rejected"] == 1
+
+
+def test_cache_metadata_is_reported_in_output(client, monkeypatch):
+    """Sessionless answers say whether they came from the cache, and how old they are"""
+    calls = []
+
+    class CountingOrchestrator(FakeOrchestrator):
+        def invoke(self, user_query, mode=None, deadline=None):
+            calls.append(user_query)
+            return super().invoke(user_query, mode, deadline)
+
+    monkeypatch.setattr(routes.sessions, "factory", lambda session_id: CountingOrchestrator())
+    monkeypatch.setattr(routes, "response_cache", create_cache("memory", max_entries=8, ttl=60))
+
+    first = invoke(client, "Projets RAG").json()["output"]
+    second = invoke(client, "  projets rag ?").json()["output"]
+    with_session = client.post("/invocations", json={"input": {"prompt": "Projets RAG"}, "session_id": "s1"})
+
+    assert first["cache"] == {"hit": False}
+    assert second["cache"]["hit"] is True
+    assert second["cache"]["age_seconds"] >= 0
+    assert second["message"] == first["message"]
+    assert "cache" not in with_session.json()["output"]
+    assert calls == ["Projets RAG", "Projets RAG"]
+
+
+def test_rate_limited_client_gets_429_with_retry_after(client, monkeypatch):
+    """Past its budget a client is told when to come back"""
+    monkeypatch.setattr(routes, "limiter", RateLimiter(1, 0))
+
+    assert invoke(client).status_code == 200
+    response = invoke(client)
+
+    assert response.status_code == 429
+    assert 1 <= int(response.headers["Retry-After"]) <= 60
+    assert routes.limiter.stats()["throttled"] == 1
+
+
+def test_batch_streams_one_ndjson_line_per_prompt_then_a_summary(client):
+    """Items arrive as they finish, tagged with their index; a summary closes the stream"""
+    response = client.post("/invocations/batch", json={"prompts": ["a", "b", "c"], "max_parallel": 2})
+
+    assert response.status_code == 200
+    assert response.headers["content-type"].startswith("application/x-ndjson")
+    lines = [json.loads(line) for line in response.text.splitlines()]
+    items = sorted(lines[:-1], key=lambda item: item["index"])
+    assert [item["output"]["message"] for item in items] == ["answer to a", "answer to b", "answer to c"]
+    assert all(item["output"]["cache"] == {"hit": False} for item in items)
+    assert lines[-1]["summary"]["items"] == 3
+
+
+def test_batch_rejects_empty_prompts(client):
+    """A batch needs at least one prompt and no empty one"""
+    assert client.post("/invocations/batch", json={"prompts": []}).status_code == 400
+    assert client.post("/invocations/batch", json={"prompts": ["a", ""]}).status_code == 400
+
+
+def test_batch_traffic_is_shed_under_load(client, monkeypatch):
+    """Above the shed threshold batches get 429 while interactive requests run"""
+    monkeypatch.setattr(routes.executor, "utilization", lambda: routes.BATCH_SHED_THRESHOLD)
+    shed = client.get("/metrics").json()["rate_limits"]["shed"]
+
+    batch = client.post("/invocations/batch", json={"prompts": ["a", "b"]})
+
+    assert batch.status_code == 429
+    assert batch.headers["Retry-After"] == str(routes.executor.retry_after)
+    assert invoke(client).status_code == 200
+    assert client.get("/metrics").json()["rate_limits"]["shed"] == shed + 1
+
+
+def test_forged_headers_do_not_escape_the_rate_limit(client, monkeypatch):
+    """Rotating X-Forwarded-For or unknown API keys still spends one budget"""
+    monkeypatch.setattr(routes, "limiter", RateLimiter(2, 0))
+    statuses = [
+        invoke(client, f"prompt {i}", **{"X-Forwarded-For": f"10.0.0.{i}", "Authorization": f"Bearer forged-{i}"})
+        .status_code
+        for i in range(4)
+    ]
+
+    assert statuses == [200, 200, 429, 429]
+
+
+def test_clients_are_keyed_by_known_key_or_trusted_hop(client, monkeypatch):
+    """A configured key gets its own budget; behind a proxy the IP it appended counts"""
+    monkeypatch.setattr(routes, "limiter", RateLimiter(1, 0))
+    monkeypatch.setattr(routes, "API_KEYS", {"secret-a": "team-a"})
+    monkeypatch.setattr(routes, "TRUSTED_PROXY_HOPS", 1)
+
+    assert invoke(client, **{"X-Forwarded-For": "1.1.1.1, 10.0.0.1"}).status_code == 200
+    assert invoke(client, **{"X-Forwarded-For": "2.2.2.2, 10.0.0.1"}).status_code == 429
+    assert invoke(client, **{"X-Forwarded-For": "2.2.2.2, 10.0.0.2"}).status_code == 200
+    assert invoke(client, **{"X-Api-Key": "secret-a"}).status_code == 200
+    assert invoke(client, **{"X-Api-Key": "secret-a"}).status_code == 429
+
+
+def test_priority_comes_from_endpoint_and_key(client, monkeypatch):
+    """Under load batch traffic is shed whatever X-Priority says"""
+    monkeypatch.setattr(routes.executor, "utilization", lambda: 1.0)
+    monkeypatch.setattr(routes, "API_KEYS", {"secret-b": "nightly"})
+    monkeypatch.setattr(routes, "BATCH_CLIENTS", {"nightly"})
+
+    assert invoke(client, **{"X-Priority": "batch"}).status_code == 200
+    batch = client.post("/invocations/batch", json={"prompts": ["a"]}, headers={"X-Priority": "interactive"})
+    assert batch.status_code == 429
+    assert batch.headers["Retry-After"]
+    assert invoke(client, **{"X-Api-Key": "secret-b", "X-Priority": "interactive"}).status_code == 429
+
+
+def wait_for_job(client, job_id, timeout=5):
+    deadline = time.monotonic() + timeout
+    while True:
+        job = client.get(f"/jobs/{job_id}").json()
+        if job["status"] in ("succeeded", "failed") or time.monotonic() > deadline:
+            return job
+        time.sleep(0.02)
+
+
+def test_job_reports_partial_results_then_output(client, monkeypatch):
+    """A job runs in the background; polling and its event stream show its progress"""
+    class ReportingOrchestrator(FakeOrchestrator):
+        def __init__(self, on_source_result=None, **kwargs):
+            super().__init__()
+            self.on_source_result = on_source_result
+
+        def invoke(self, user_query, mode=None, deadline=None):
+            self.on_source_result("gitlab", user_query, "gitlab answer")
+            return super().invoke(user_query, mode, deadline)
+
+    monkeypatch.setattr(routes, "new_orchestrator", ReportingOrchestrator)
+    submitted = client.post("/jobs", json={"input": {"prompt": "hello"}})
+    assert submitted.status_code == 202
+    job_id = submitted.json()["job_id"]
+
+    job = wait_for_job(client, job_id)
+    assert job["status"] == "succeeded"
+    assert job["output"]["message"] == "answer to hello"
+    assert [(p["source"], p["result"]) for p in job["partial"]] == [("gitlab", "gitlab answer")]
+
+    frames = sse_frames(client.get(f"/jobs/{job_id}/events").text)
+    assert json.loads(frames[0].removeprefix("data: "))["status"] == "succeeded"
+    assert frames[-1] == "event: done\ndata: {}"
+    assert client.get("/jobs/unknown").status_code == 404
+    assert client.get("/jobs/unknown/events").status_code == 404
+
+
+def test_failed_job_reports_its_error(client, monkeypatch):
+    """An orchestrator error ends the job as failed with the error message"""
+    class FailingOrchestrator(FakeOrchestrator):
+        def invoke(self, user_query, mode=None, deadline=None):
+            return "Error invoking agent: Bedrock unavailable"
+
+    monkeypatch.setattr(routes, "new_orchestrator", lambda **kwargs: FailingOrchestrator())
+    job_id = client.post("/jobs", json={"input": {"prompt": "hello"}}).json()["job_id"]
+
+    job = wait_for_job(client, job_id)
+    assert job["status"] == "failed"
+    assert job["error"] == "Error invoking agent: Bedrock unavailable"
+
+
+def sse_frames(text):
+    return [frame for frame in text.split("\n\n") if frame]
+
+
+def test_stream_sends_sse_chunks_then_done(client):
+    """Each chunk is a data frame and the stream ends with a done event"""
+    response = client.post("/invocations/stream", json={"input": {"prompt": "hello"}})
+
+    assert response.status_code == 200
+    assert response.headers["content-type"].startswith("text/event-stream")
+    frames = sse_frames(response.text)
+    assert [json.loads(f.removeprefix("data: "))["data"] for f in frames[:-1]] == ["answer", "to", "hello"]
+    assert frames[-1] == 'event: done\ndata: {"missing_sources": []}'
+    assert routes.executor.stats()["in_flight"] == 0
+
+
+def test_stream_is_refused_when_executor_is_full(client, monkeypatch):
+    """Streams share the executor capacity and get 503 when it is full"""
+    monkeypatch.setattr(routes.executor, "utilization", lambda: 1.0)
+    response = client.post("/invocations/stream", json={"input": {"prompt": "hello"}})
+
+    assert response.status_code == 503
+    assert response.headers["Retry-After"]
+
+
+def test_stream_stops_the_agent_when_the_client_disconnects(monkeypatch):
+    """A disconnect seen while waiting for a chunk closes the orchestrator stream"""
+    closed = asyncio.Event()
+
+    class StalledOrchestrator(FakeOrchestrator):
+        async def stream(self, user_query, mode=None, deadline=None):
+            try:
+                yield "first"
+                await asyncio.sleep(60)
+                yield "never sent"
+            finally:
+                closed.set()
+
+    class DisconnectingRequest:
+        def __init__(self):
+            self.polls = 0
+
+        async def is_disconnected(self):
+            self.polls += 1
+            return self.polls > 1
+
+    monkeypatch.setattr(routes.sessions, "factory", lambda session_id: StalledOrchestrator())
+
+    async def run():
+        events = routes._sse_events("hello", None, None, None, DisconnectingRequest())
+        frames = [frame async for frame in events]
+        return frames
+
+    frames = asyncio.run(asyncio.wait_for(run(), 5))
+    assert frames == ['data: {"data": "first"}\n\n']
+    assert closed.is_set()
+    assert routes.executor.stats()["in_flight"] == 0
+
+
+@pytest.mark.parametrize("deadline", ["soon", -1, "nan"])
+def test_invalid_deadline_is_rejected(client, deadline):
+    """A deadline that is not a positive number of seconds gets 400 on every endpoint"""
+    body = {"input": {"prompt": "hello", "deadline": deadline}}
+    for path in ("/invocations", "/invocations/stream", "/jobs"):
+        assert client.post(path, json=body).status_code == 400
+
+
+def test_deadline_bounds_the_http_wait(client, monkeypatch):
+    """A run still going at the deadline answers 504 without waiting for it"""
+    class SlowOrchestrator(FakeOrchestrator):
+        def invoke(self, user_query, mode=None, deadline=None):
+            time.sleep(1)
+            return "late"
+
+    monkeypatch.setattr(routes, "new_orchestrator", lambda **kwargs: SlowOrchestrator())
+    monkeypatch.setattr(routes.sessions, "factory", lambda session_id: SlowOrchestrator())
+    started = time.monotonic()
+    response = client.post("/invocations", json={"input": {"prompt": "slow", "deadline": 0.2}})
+
+    assert response.status_code == 504
+    assert time.monotonic() - started < 0.9
@@ -0,0 +1,83 @@
+import pytest
+
+from bookkeeper.core.semantic_cache import SemanticCache, create_semantic_cache
+
+# Paraphrases share a topic axis; the fake embedder stands in for Titan
+TOPICS = {"rag": [1.0, 0.0, 0.0], "bedrock": [0.0, 1.0, 0.0], "kafka": [0.0, 0.0, 1.0]}
+
+
+def embed(text):
+    vector = [0.0, 0.0, 0.0]
+    for word, axis in TOPICS.items():
+        if word in text:
+            vector = [a + b for a, b in zip(vector, axis)]
+    return vector
+
+
+def test_paraphrase_hits_above_threshold():
+    """A differently worded prompt close enough to an earlier one reuses its answer"""
+    cache = SemanticCache(embed, threshold=0.9)
+    cache.set("projets RAG Bedrock", "answer")
+
+    value, similarity, age = cache.get("Bedrock retrieval projects using RAG")
+    assert value == "answer"
+    assert similarity > 0.99
+    assert age >= 0
+
+    # Shares one topic out of two: similarity ~0.71, below the threshold
+    assert cache.get("Bedrock with Kafka") is None
+
+    stats = cache.stats()
+    assert (stats["hits"], stats["misses"]) == (1, 1)
+    assert sum(stats["similarity_histogram"].values()) == 2
+
+
+def test_cache_is_bounded_and_evicts_least_recently_used():
+    """Once full, the least recently used prompt makes room for the new one"""
+    cache = SemanticCache(embed, threshold=0.9, max_entries=2)
+    cache.set("rag", "rag answer")
+    cache.set("bedrock", "bedrock answer")
+    assert cache.get("rag")[0] == "rag answer"
+
+    cache.set("kafka", "kafka answer")
+
+    assert len(cache) == 2
+    assert cache.get("bedrock") is None
+    assert cache.get("rag")[0] == "rag answer"
+
+
+def test_storing_the_same_prompt_refreshes_its_entry():
+    """Re-caching a prompt replaces its answer instead of adding a duplicate"""
+    cache = SemanticCache(embed, threshold=0.9)
+    cache.set("rag", "old")
+    cache.set("RAG ?", "new")
+    assert len(cache) == 1
+    assert cache.get("rag")[0] == "new"
+
+
+def test_local_embedder_needs_no_model(sample_prompt):
+    """The hashed stand-in matches spelling variants without calling Bedrock"""
+    cache = create_semantic_cache("local", threshold=0.9)
+    cache.set(sample_prompt, "answer")
+    assert cache.get(sample_prompt.upper() + " ?")[0] == "answer"
+    assert create_semantic_cache("off") is None
+
+
+def test_near_miss_prompts_do_not_hit():
+    """Questions differing by the one word that matters get their own answer"""
+    cache = create_semantic_cache("local", threshold=0.9)
+    cache.set("projets RAG Bedrock en Python", "python answer")
+    cache.set("Quels projets utilisent Kafka ?", "kafka answer")
+
+    assert cache.get("projets RAG Bedrock en Java") is None
+    assert cache.get("Quels projets utilisent RabbitMQ ?") is None
+    assert cache.stats()["hits"] == 0
+
+
+def test_service_refuses_the_local_embedder(monkeypatch):
+    """The hashed stand-in scores near misses above paraphrases: tests only"""
+    from bookkeeper.api import routes
+
+    monkeypatch.setattr(routes, "SEMANTIC_CACHE", "local")
+    with pytest.raises(ValueError):
+        routes._create_semantic_cache()
@@ -0,0 +1,92 @@
+"""Tests for the session-scoped orchestrator pool"""
+
+import asyncio
+import time
+
+import pytest
+from strands.models import Model
+
+from bookkeeper.agents.orchestrator import BookkeeperOrchestrator
+from bookkeeper.agents.sessions import SessionBusyError, SessionPool
+
+
+def make_pool(**kwargs):
+    return SessionPool(factory=lambda session_id: object(), **kwargs)
+
+
+def test_session_reuses_orchestrator_and_anonymous_requests_do_not():
+    """Same session id gets the same orchestrator, no session id never does"""
+    pool = make_pool()
+    with pool.acquire("abc") as first:
+        pass
+    with pool.acquire("abc") as second:
+        pass
+    with pool.acquire() as anonymous:
+        pass
+
+    assert first is second
+    assert anonymous is not first
+    assert pool.stats()["active"] == 1
+
+
+def test_lru_and_ttl_eviction():
+    """Least recently used and idle sessions are dropped"""
+    pool = make_pool(max_sessions=2, ttl=0.05)
+    for session_id in ("a", "b", "c"):
+        with pool.acquire(session_id):
+            pass
+    assert pool.stats()["active"] == 2
+
+    time.sleep(0.06)
+    with pool.acquire("d"):
+        pass
+    stats = pool.stats()
+    assert stats["active"] == 1
+    assert stats["evicted"] == 3
+
+
+def test_busy_session_raises_when_not_blocking():
+    """A session serves one request at a time"""
+    pool = make_pool()
+    with pool.acquire("abc"):
+        with pytest.raises(SessionBusyError):
+            with pool.acquire("abc", blocking=False):
+                pass
+
+
+class StubModel(Model):
+    """Model answering "answer", after the given delay for each successive call"""
+
+    def __init__(self, delays):
+        self.delays = list(delays)
+
+    def update_config(self, **model_config):
+        pass
+
+    def get_config(self):
+        return {"model_id": "stub"}
+
+    async def stream(self, messages, tool_specs=None, system_prompt=None, **kwargs):
+        await asyncio.sleep(self.delays.pop(0) if self.delays else 0)
+        yield {"messageStart": {"role": "assistant"}}
+        yield {"contentBlockDelta": {"delta": {"text": "answer"}}}
+        yield {"contentBlockStop": {}}
+        yield {"messageStop": {"stopReason": "end_turn"}}
+
+    async def structured_output(self, output_model, prompt, system_prompt=None, **kwargs):
+        yield {}
+
+
+def test_turn_abandoned_at_the_deadline_keeps_the_session_until_it_ends():
+    """The next request waits for the late turn, which is left out of the history"""
+    pool = SessionPool(factory=lambda session_id: BookkeeperOrchestrator(model=StubModel([0.5])))
+
+    with pool.acquire("abc") as orchestrator:
+        assert "missed the request deadline" in orchestrator.invoke("first", deadline=0.2)
+    with pytest.raises(SessionBusyError):
+        with pool.acquire("abc", blocking=False):
+            pass
+
+    with pool.acquire("abc") as orchestrator:
+        assert orchestrator.invoke("second") == "answer\n"
+        assert [m["content"][0]["text"] for m in orchestrator.agent.messages] == ["second", "answer"]
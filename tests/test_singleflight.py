@@ -0,0 +1,64 @@
+"""Tests for coalescing identical in-flight calls"""
+
+import asyncio
+
+import pytest
+
+from bookkeeper.core.singleflight import SingleFlight
+
+
+def test_concurrent_callers_share_one_computation():
+    """Callers with the same key get the result of a single run"""
+    flight = SingleFlight()
+    runs = []
+
+    async def compute():
+        runs.append(1)
+        await asyncio.sleep(0.05)
+        return "answer"
+
+    async def scenario():
+        return await asyncio.gather(*(flight.do("key", compute) for _ in range(5)))
+
+    assert asyncio.run(scenario()) == ["answer"] * 5
+    assert len(runs) == 1
+    assert flight.stats() == {"in_flight": 0, "leaders": 1, "coalesced": 4, "abandoned": 0}
+
+
+def test_waiter_timeout_does_not_cancel_shared_run():
+    """A caller timing out detaches without affecting the others"""
+    flight = SingleFlight()
+
+    async def compute():
+        await asyncio.sleep(0.05)
+        return "answer"
+
+    async def scenario():
+        patient = asyncio.ensure_future(flight.do("key", compute))
+        with pytest.raises(asyncio.TimeoutError):
+            await flight.do("key", compute, timeout=0.01)
+        return await patient
+
+    assert asyncio.run(scenario()) == "answer"
+
+
+def test_run_is_cancelled_when_every_waiter_leaves():
+    """Nobody waiting means the shared computation is cancelled"""
+    flight = SingleFlight()
+    cancelled = []
+
+    async def compute():
+        try:
+            await asyncio.sleep(1)
+        except asyncio.CancelledError:
+            cancelled.append(True)
+            raise
+
+    async def scenario():
+        with pytest.raises(asyncio.TimeoutError):
+            await flight.do("key", compute, timeout=0.01)
+        await asyncio.sleep(0.01)
+
+    asyncio.run(scenario())
+    assert cancelled == [True]
+    assert flight.stats()["abandoned"] == 1
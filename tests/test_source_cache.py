@@ -0,0 +1,48 @@
+from bookkeeper.agents.source_cache import create_source_cache, invalidate_source_results
+
+
+def test_results_are_cached_per_source_and_normalized_query(sample_prompt):
+    """Spelling variants of a sub-query share an entry, other sources do not"""
+    cache = create_source_cache("memory", {"gitlab": 60, "s3": 60})
+    cache.set("gitlab", sample_prompt, "gitlab answer")
+
+    assert cache.get("gitlab", f"  {sample_prompt.upper()} ?") == "gitlab answer"
+    assert cache.get("s3", sample_prompt) is None
+
+
+def test_errors_and_disabled_sources_are_not_cached(sample_prompt):
+    """Error strings are retried next time; a TTL of 0 turns a source off"""
+    cache = create_source_cache("memory", {"gitlab": 60, "github": 0})
+    cache.set("gitlab", sample_prompt, "Error running GitLab agent: timeout")
+    cache.set("gitlab", sample_prompt, "Error in GitLab assistant: timeout")
+    cache.set("github", sample_prompt, "github answer")
+
+    assert cache.get("gitlab", sample_prompt) is None
+    assert cache.get("github", sample_prompt) is None
+    assert "github" not in cache.stats()["sources"]
+
+
+def test_invalidation_hook_clears_one_source(sample_prompt):
+    """Knowledge base ingestion forgets documentation answers only"""
+    cache = create_source_cache("memory", {"gitlab": 60, "s3": 60})
+    cache.set("gitlab", sample_prompt, "gitlab answer")
+    cache.set("s3", sample_prompt, "s3 answer")
+
+    invalidate_source_results("s3")
+
+    assert cache.get("s3", sample_prompt) is None
+    assert cache.get("gitlab", sample_prompt) == "gitlab answer"
+
+
+def test_sqlite_sources_share_one_file(tmp_path, sample_prompt):
+    """Each source gets its own table, so eviction and invalidation stay per source"""
+    path = str(tmp_path / "sources.sqlite")
+    cache = create_source_cache("sqlite", {"gitlab": 60, "s3": 60}, max_entries=1, path=path)
+    cache.set("gitlab", sample_prompt, "gitlab answer")
+    cache.set("s3", sample_prompt, "s3 answer")
+    cache.set("s3", "another question", "another answer")
+
+    reopened = create_source_cache("sqlite", {"gitlab": 60, "s3": 60}, max_entries=1, path=path)
+    assert reopened.get("gitlab", sample_prompt) == "gitlab answer"
+    assert reopened.get("s3", sample_prompt) is None
+    assert reopened.get("s3", "another question") == "another answer"
@@ -0,0 +1,28 @@
+"""Tests for sharing sub-agent results across a batch"""
+
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+from bookkeeper.agents.subqueries import SubQueryMemo
+
+
+def test_identical_subqueries_run_once():
+    """Concurrent identical questions to a source run the sub-agent once"""
+    memo = SubQueryMemo()
+    runs = []
+
+    def query_fn(query):
+        runs.append(query)
+        time.sleep(0.05)
+        return f"answer to {query.split()[0].lower()}"
+
+    with ThreadPoolExecutor(max_workers=4) as pool:
+        results = list(pool.map(
+            lambda query: memo.run("gitlab", query, query_fn),
+            ["React dashboard", "react  dashboard", "React dashboard?", "Go CLI"],
+        ))
+
+    assert results == ["answer to react"] * 3 + ["answer to go"]
+    assert len(runs) == 2
+    assert memo.stats() == {"subqueries_run": 2, "subqueries_shared": 2}
+    assert memo.run("github", "Go CLI", lambda query: "github answer") == "github answer"
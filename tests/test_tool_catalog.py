@@ -0,0 +1,44 @@
+from types import SimpleNamespace
+
+import pytest
+
+from bookkeeper.agents.tool_catalog import ToolCatalog, allowed_tools
+
+
+def fake_tool(name, schema=None):
+    return SimpleNamespace(tool_name=name, tool_spec={"name": name, "inputSchema": {"json": schema or {}}})
+
+
+def listing():
+    return [fake_tool(n) for n in ("search_repositories", "create_issue", "get_file_contents", "push_files")]
+
+
+def test_read_only_profile_prunes_write_tools():
+    """Only tools matching the profile reach the agent, sorted by name"""
+    catalog = ToolCatalog(allowed_tools("read-only-search"), name="github")
+    tools = catalog.select(listing())
+
+    assert [t.tool_name for t in tools] == ["get_file_contents", "search_repositories"]
+    assert catalog.stats()["listed"] == 4
+
+
+def test_catalog_refreshes_on_version_change():
+    """The same listing reuses the selection; a changed schema refreshes it"""
+    catalog = ToolCatalog(["search_*"])
+    catalog.select(listing())
+    catalog.select(listing())
+    assert catalog.stats()["refreshes"] == 1
+    version = catalog.version
+
+    upgraded = listing() + [fake_tool("search_code", {"type": "object"})]
+    assert [t.tool_name for t in catalog.select(upgraded)] == ["search_code", "search_repositories"]
+    assert catalog.stats()["refreshes"] == 2
+    assert catalog.version != version
+
+
+def test_explicit_tools_override_the_profile():
+    """A tool list replaces the profile; unknown profiles are rejected"""
+    assert allowed_tools("all", "search_code, get_me") == ["search_code", "get_me"]
+    assert allowed_tools("all") is None
+    with pytest.raises(ValueError):
+        allowed_tools("write-everything")